@@ -0,0 +1,333 @@
+"""
+Audio Intel — Sparse BM25 Engine
+================================
+Okapi BM25 over a precomputed inverted index.
+
+The index is stored CSR-style (term-major) as flat NumPy arrays:
+
+    indptr[t] : indptr[t+1]   → slice of the postings for term id *t*
+    postings[...]             → document ids containing the term
+    weights[...]              → precomputed BM25 contribution of (term, doc)
+
+Scoring a query only touches the posting lists of its terms, so query cost
+scales with posting-list length instead of corpus size. Top-k selection uses
+``np.argpartition`` rather than sorting every candidate.
+
+Scores match ``rank_bm25.BM25Okapi`` (same idf flooring with *epsilon*).
+
+Snapshots
+---------
+The embedder persists the index beside its Chroma collection (the ``bm25/``
+directory of an index generation, see backend/index_generations.py) as a
+versioned directory of ``.npy`` arrays plus JSON side files::
+
+    bm25/
+        meta.json       version, collection fingerprint, BM25 params
+        vocab.json      terms, ordered by term id
+        doc_ids.json    Chroma ids, ordered by BM25 doc id
+        indptr.npy  postings.npy  tf.npy  weights.npy  doc_len.npy
+        facet_*.npy     per-doc type / connectivity / brand / price_current
+
+The arrays are opened with ``mmap_mode="r"`` so loading is near-instant and
+several workers share the same pages. ``meta.json`` records a fingerprint of
+the Chroma collection; readers rebuild only when it no longer matches.
+
+The facet arrays mirror the filterable chunk metadata so keyword search can
+apply the same filters as Chroma's ``where`` clause (see backend/filters.py).
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+K1 = 1.5
+B = 0.75
+EPSILON = 0.25
+
+SNAPSHOT_VERSION = 2
+_ARRAYS = ("indptr", "postings", "tf", "weights", "doc_len")
+
+# Filterable metadata copied into the index: name → (dtype, default)
+FACETS = {
+    "type": ("U16", "unknown"),
+    "connectivity": ("U16", "unknown"),
+    "brand": ("U48", "unknown"),
+    "price_current": (np.int32, 0),
+}
+
+
+def tokenize(text: str) -> list[str]:
+    """Simple whitespace + punctuation tokeniser, lowercased."""
+    return re.findall(r"\w+", text.lower())
+
+
+def build_facets(metadatas: list[dict | None]) -> dict[str, np.ndarray]:
+    """Column arrays of the filterable metadata, one row per document."""
+    facets = {}
+    for name, (dtype, default) in FACETS.items():
+        values = [(meta or {}).get(name) or default for meta in metadatas]
+        facets[name] = np.asarray(values, dtype=dtype)
+    return facets
+
+
+class SparseBM25:
+    """BM25 scorer backed by term-major posting arrays."""
+
+    def __init__(
+        self,
+        vocab: dict[str, int],
+        indptr: np.ndarray,
+        postings: np.ndarray,
+        weights: np.ndarray,
+        n_docs: int,
+        tf: np.ndarray | None = None,
+        doc_len: np.ndarray | None = None,
+        facets: dict[str, np.ndarray] | None = None,
+    ):
+        self.vocab = vocab
+        self.indptr = indptr
+        self.postings = postings
+        self.weights = weights
+        self.n_docs = n_docs
+        self.tf = tf            # raw term frequencies, kept for snapshots
+        self.doc_len = doc_len
+        self.facets = facets or {}
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    # ─── construction ────────────────────────────────────────────────────
+    @classmethod
+    def build(
+        cls,
+        corpus_tokens: list[list[str]],
+        k1: float = K1,
+        b: float = B,
+        epsilon: float = EPSILON,
+    ) -> "SparseBM25":
+        """Build the inverted index from a tokenised corpus."""
+        n_docs = len(corpus_tokens)
+        vocab: dict[str, int] = {}
+        term_ids: list[int] = []
+        doc_ids: list[int] = []
+        tfs: list[int] = []
+
+        for doc_id, tokens in enumerate(corpus_tokens):
+            for term, tf in Counter(tokens).items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                doc_ids.append(doc_id)
+                tfs.append(tf)
+
+        term_arr = np.asarray(term_ids, dtype=np.int32)
+        doc_arr = np.asarray(doc_ids, dtype=np.int32)
+        tf_arr = np.asarray(tfs, dtype=np.float32)
+        doc_len = np.asarray([len(t) for t in corpus_tokens], dtype=np.float32)
+
+        # Group postings by term (stable → doc ids stay ascending per term)
+        order = np.argsort(term_arr, kind="stable")
+        term_arr, doc_arr, tf_arr = term_arr[order], doc_arr[order], tf_arr[order]
+
+        df = np.bincount(term_arr, minlength=len(vocab))
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(df, out=indptr[1:])
+
+        weights = cls._term_weights(
+            term_arr, doc_arr, tf_arr, df, doc_len, n_docs, k1, b, epsilon
+        )
+        return cls(
+            vocab, indptr, doc_arr, weights, n_docs, tf=tf_arr, doc_len=doc_len
+        )
+
+    @staticmethod
+    def _term_weights(
+        term_arr: np.ndarray,
+        doc_arr: np.ndarray,
+        tf_arr: np.ndarray,
+        df: np.ndarray,
+        doc_len: np.ndarray,
+        n_docs: int,
+        k1: float,
+        b: float,
+        epsilon: float,
+    ) -> np.ndarray:
+        """Vectorised BM25 weight for every (term, doc) posting."""
+        if n_docs == 0 or len(df) == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        idf = np.log(n_docs - df + 0.5) - np.log(df + 0.5)
+        # Same flooring as rank_bm25: very common terms get epsilon * mean idf
+        idf = np.where(idf < 0, epsilon * idf.mean(), idf)
+
+        avgdl = float(doc_len.mean()) or 1.0
+        norm = k1 * (1 - b + b * doc_len[doc_arr] / avgdl)
+        weights = idf[term_arr] * (tf_arr * (k1 + 1)) / (tf_arr + norm)
+        return weights.astype(np.float32)
+
+    # ─── querying ────────────────────────────────────────────────────────
+    def score(self, tokens: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """Return ``(doc_ids, scores)`` for every document matching *tokens*."""
+        counts = Counter(t for t in tokens if t in self.vocab)
+        if not counts:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+
+        doc_parts, weight_parts = [], []
+        for term, qf in counts.items():
+            t = self.vocab[term]
+            start, end = self.indptr[t], self.indptr[t + 1]
+            doc_parts.append(self.postings[start:end])
+            # Repeated query terms count once per occurrence (as BM25Okapi)
+            weight_parts.append(self.weights[start:end] * qf)
+
+        docs = np.concatenate(doc_parts)
+        weights = np.concatenate(weight_parts)
+        doc_ids, inverse = np.unique(docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights)
+        return doc_ids, scores
+
+    def top_k(
+        self, tokens: list[str], k: int = 10, mask: np.ndarray | None = None
+    ) -> list[tuple[int, float]]:
+        """Top-*k* ``(doc_id, score)`` pairs with a positive score, best first.
+
+        *mask* is an optional boolean array over doc ids; documents where it
+        is ``False`` are dropped before top-k selection.
+        """
+        doc_ids, scores = self.score(tokens)
+        if mask is not None and len(doc_ids):
+            keep = mask[doc_ids]
+            doc_ids, scores = doc_ids[keep], scores[keep]
+        if len(doc_ids) == 0 or k <= 0:
+            return []
+
+        if len(doc_ids) > k:
+            part = np.argpartition(-scores, k - 1)[:k]
+            doc_ids, scores = doc_ids[part], scores[part]
+
+        # Highest score first; ties broken by document order
+        order = np.lexsort((doc_ids, -scores))
+        return [
+            (int(doc_ids[i]), float(scores[i])) for i in order if scores[i] > 0
+        ]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  ON-DISK SNAPSHOTS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def collection_fingerprint(collection) -> str:
+    """Cheap identity of a Chroma collection's contents (no text is read).
+
+    Chunk ids plus their ``content_hash`` metadata (written by the
+    incremental embedder), so a chunk re-embedded in place under the same id
+    still changes the fingerprint.
+    """
+    data = collection.get(include=["metadatas"])
+    entries = sorted(
+        (doc_id, (meta or {}).get("content_hash", ""))
+        for doc_id, meta in zip(data["ids"], data["metadatas"])
+    )
+    digest = hashlib.sha256(f"{len(entries)}\n".encode())
+    for doc_id, content_hash in entries:
+        digest.update(f"{doc_id}\t{content_hash}\n".encode())
+    return digest.hexdigest()
+
+
+def save_snapshot(
+    index: SparseBM25, doc_ids: list[str], directory: str | Path, fingerprint: str
+) -> None:
+    """Write *index* to *directory*, replacing any previous snapshot atomically."""
+    directory = Path(directory)
+    tmp_dir = directory.with_name(f"{directory.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    for name in _ARRAYS:
+        np.save(tmp_dir / f"{name}.npy", getattr(index, name))
+    for name, values in index.facets.items():
+        np.save(tmp_dir / f"facet_{name}.npy", values)
+
+    terms = sorted(index.vocab, key=index.vocab.__getitem__)
+    (tmp_dir / "vocab.json").write_text(json.dumps(terms, ensure_ascii=False), "utf-8")
+    (tmp_dir / "doc_ids.json").write_text(json.dumps(doc_ids), "utf-8")
+
+    # meta.json last: a directory without it is never treated as complete
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "fingerprint": fingerprint,
+        "n_docs": index.n_docs,
+        "n_terms": len(terms),
+        "params": {"k1": K1, "b": B, "epsilon": EPSILON},
+        "built_at": time.time(),
+    }
+    (tmp_dir / "meta.json").write_text(json.dumps(meta, indent=2), "utf-8")
+
+    old_dir = directory.with_name(f"{directory.name}.old-{os.getpid()}")
+    if directory.exists():
+        directory.rename(old_dir)
+    tmp_dir.rename(directory)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def load_snapshot(directory: str | Path) -> tuple[SparseBM25, list[str], dict]:
+    """Memory-map a snapshot. Raises ``FileNotFoundError`` / ``ValueError``."""
+    directory = Path(directory)
+    meta = json.loads((directory / "meta.json").read_text("utf-8"))
+    if meta.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(
+            f"BM25 snapshot version {meta.get('version')} != {SNAPSHOT_VERSION}"
+        )
+
+    arrays = {
+        name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in _ARRAYS
+    }
+    facets = {
+        name: np.load(directory / f"facet_{name}.npy", mmap_mode="r")
+        for name in FACETS
+    }
+    terms = json.loads((directory / "vocab.json").read_text("utf-8"))
+    doc_ids = json.loads((directory / "doc_ids.json").read_text("utf-8"))
+
+    index = SparseBM25(
+        vocab={term: i for i, term in enumerate(terms)},
+        indptr=arrays["indptr"],
+        postings=arrays["postings"],
+        weights=arrays["weights"],
+        n_docs=meta["n_docs"],
+        tf=arrays["tf"],
+        doc_len=arrays["doc_len"],
+        facets=facets,
+    )
+    return index, doc_ids, meta
+
+
+def build_snapshot_from_collection(
+    collection, directory: str | Path
+) -> tuple[SparseBM25, list[str], str]:
+    """Tokenise every chunk in *collection*, build the index and persist it."""
+    fingerprint = collection_fingerprint(collection)
+    data = collection.get(include=["documents", "metadatas"])
+    index = SparseBM25.build([tokenize(doc or "") for doc in data["documents"]])
+    index.facets = build_facets(data["metadatas"])
+    save_snapshot(index, data["ids"], directory, fingerprint)
+    return index, data["ids"], fingerprint
+
+
+def load_or_build_snapshot(
+    collection, directory: str | Path
+) -> tuple[SparseBM25, list[str], str]:
+    """Load the snapshot if it matches *collection*, otherwise rebuild it."""
+    fingerprint = collection_fingerprint(collection)
+    try:
+        index, doc_ids, meta = load_snapshot(directory)
+        if meta.get("fingerprint") == fingerprint:
+            return index, doc_ids, fingerprint
+    except (FileNotFoundError, ValueError, json.JSONDecodeError):
+        pass
+    return build_snapshot_from_collection(collection, directory)
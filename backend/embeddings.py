@@ -0,0 +1,69 @@
+"""
+Audio Intel — Embedding Backends
+================================
+The embedding model shared by the embedder (documents) and the backend
+(queries). Selected with the ``EMBEDDINGS`` environment variable:
+
+    ollama  — OllamaEmbeddings($EMBEDDING_MODEL) on the local Ollama server
+    hash    — deterministic, dependency-free stand-in (hashed token vectors),
+              for offline runs, benchmarks and load tests
+
+Both sides must use the same backend: vectors from different backends are
+not comparable, so switching means re-embedding the collection.
+"""
+
+import hashlib
+import os
+import re
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_EMBEDDING_MODEL = "nomic-embed-text:latest"
+HASH_EMBEDDING_DIM = 768
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class HashEmbeddings(Embeddings):
+    """
+    Feature-hashing embedder: every lower-cased token adds ±1 to a bucket
+    picked by its hash, and the vector is L2-normalised. Texts that share
+    words get similar vectors, so retrieval still behaves sensibly.
+    """
+
+    def __init__(self, dim: int = HASH_EMBEDDING_DIM):
+        self.dim = dim
+
+    def _embed(self, text: str) -> list[float]:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for token in _TOKEN_RE.findall(text.lower()):
+            h = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+            vec[h % self.dim] += 1.0 if (h >> 63) else -1.0
+        norm = float(np.linalg.norm(vec))
+        return (vec / norm if norm else vec).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+
+def embeddings_key(embeddings: Embeddings) -> str:
+    """Identifies the backend + model, e.g. for query-embedding cache keys."""
+    return f"{type(embeddings).__name__}:{getattr(embeddings, 'model', getattr(embeddings, 'dim', ''))}"
+
+
+def make_embeddings(name: str | None = None) -> Embeddings:
+    """Embedding backend selected by *name* (default: ``$EMBEDDINGS`` or ollama)."""
+    name = name or os.getenv("EMBEDDINGS", "ollama")
+    if name == "ollama":
+        from langchain_ollama import OllamaEmbeddings
+
+        return OllamaEmbeddings(
+            model=os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+        )
+    if name == "hash":
+        return HashEmbeddings()
+    raise ValueError(f"Unknown EMBEDDINGS '{name}', expected 'ollama' or 'hash'")
@@ -0,0 +1,100 @@
+"""
+Audio Intel — Retrieval Filters
+===============================
+Turns ``ChatFilters`` into constraints that retrieval can apply *before*
+ranking, instead of only describing them to the LLMs in prose:
+
+    • a Chroma ``where`` clause for semantic search
+    • a boolean mask over the BM25 document facets for keyword search
+
+Products whose attribute could not be inferred ("unknown", or an unknown
+price stored as 0) are kept, so sparse scraped data does not silently drop
+out of the candidate set.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from backend.product_attributes import (
+    CONNECTIVITY_KEYWORDS,
+    TYPE_KEYWORDS,
+    budget_cap,
+)
+
+UNKNOWN = "unknown"
+
+
+class MetadataFilter(NamedTuple):
+    """Hashable retrieval constraints (usable as part of a cache key)."""
+
+    product_type: str | None = None
+    connectivity: str | None = None
+    brand: str | None = None
+    max_price: int | None = None
+
+    @classmethod
+    def from_chat_filters(cls, filters) -> "MetadataFilter":
+        if filters is None:
+            return cls()
+
+        def chosen(value, allowed=None):
+            value = (value or "").strip().lower()
+            if not value or value == "all":
+                return None
+            return value if allowed is None or value in allowed else None
+
+        return cls(
+            product_type=chosen(filters.product_type, TYPE_KEYWORDS),
+            connectivity=chosen(filters.connectivity, CONNECTIVITY_KEYWORDS),
+            brand=chosen(filters.brand),
+            max_price=budget_cap(filters.budget),
+        )
+
+    def is_empty(self) -> bool:
+        return not any(self)
+
+    # ─── semantic side ───────────────────────────────────────────────────
+    def chroma_where(self) -> dict | None:
+        """Chroma ``where`` clause, or ``None`` when nothing is filtered."""
+        clauses = []
+        if self.product_type:
+            others = [t for t in TYPE_KEYWORDS if t != self.product_type]
+            clauses.append({"type": {"$nin": others}})
+        if self.connectivity:
+            others = [c for c in CONNECTIVITY_KEYWORDS if c != self.connectivity]
+            clauses.append({"connectivity": {"$nin": others}})
+        if self.brand:
+            clauses.append({"brand": {"$in": [self.brand, UNKNOWN]}})
+        if self.max_price:
+            clauses.append(
+                {"$or": [
+                    {"price_current": {"$lte": self.max_price}},
+                    {"price_current": 0},
+                ]}
+            )
+
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+    # ─── keyword side ────────────────────────────────────────────────────
+    def bm25_mask(self, facets: dict[str, np.ndarray]) -> np.ndarray | None:
+        """Boolean mask over BM25 doc ids, or ``None`` when nothing is filtered."""
+        if self.is_empty() or not facets:
+            return None
+
+        mask = np.ones(len(facets["price_current"]), dtype=bool)
+        if self.product_type:
+            col = facets["type"]
+            mask &= (col == self.product_type) | (col == UNKNOWN)
+        if self.connectivity:
+            col = facets["connectivity"]
+            mask &= (col == self.connectivity) | (col == UNKNOWN)
+        if self.brand:
+            col = facets["brand"]
+            mask &= (col == self.brand) | (col == UNKNOWN)
+        if self.max_price:
+            col = facets["price_current"]
+            mask &= (col <= self.max_price) | (col == 0)
+        return mask
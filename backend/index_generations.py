@@ -0,0 +1,198 @@
+"""
+Audio Intel — Index Generations
+===============================
+Every embedder run builds a complete new *generation*, meaning a Chroma
+collection plus its BM25 snapshot. It is built beside the one being served
+and then published by atomically rewriting a pointer file:
+
+    indexes/
+        CURRENT                      name of the live generation
+        serving/<pid>                generations a backend process has open
+        gen-20261016-225509-4242/
+            chroma/                  Chroma persist directory
+            bm25/                    BM25 snapshot (backend/bm25.py)
+        gen-20261016-221101-4117/    previous generation
+
+A new generation starts as a copy of the live one, so the embedder's
+incremental diff still only embeds what changed.
+
+The backend loads a published generation in full (Chroma client and BM25
+memory-map) off the request path, then swaps a single reference. Requests
+already running finish on the generation they started with. Only the live
+and the previous generation are kept: older ones (and abandoned builds)
+are pruned on publish, and the backend closes a retired generation on the
+swap after the one that retired it.
+
+Each backend process lists the generations it has open in
+``serving/<pid>`` and pruning never removes those, so a backend that has
+not reloaded yet (a slow watcher, or ``INDEX_WATCH_INTERVAL=0``) keeps
+serving even after several publishes. Markers of dead processes are
+ignored and cleaned up.
+
+Trees from before generations existed (``chroma_db/`` plus ``bm25_index/``
+at the repo root) are served as the ``legacy`` generation until the first
+publish.
+"""
+
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+
+from langchain_chroma import Chroma
+
+from backend.bm25 import load_or_build_snapshot
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+INDEX_ROOT = Path(os.getenv("INDEX_ROOT") or REPO_ROOT / "indexes")
+LEGACY_CHROMA_DIR = REPO_ROOT / "chroma_db"
+LEGACY_BM25_DIR = REPO_ROOT / "bm25_index"
+COLLECTION_NAME = "products_collection"
+
+CURRENT_FILE = "CURRENT"
+SERVING_DIR = "serving"
+
+
+class GenerationPaths(NamedTuple):
+    name: str
+    chroma_dir: Path
+    bm25_dir: Path
+
+
+def _generation_paths(root: Path, name: str) -> GenerationPaths:
+    return GenerationPaths(name, root / name / "chroma", root / name / "bm25")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# ON DISK (embedder side)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def current_generation(root: Path = INDEX_ROOT) -> GenerationPaths:
+    """The published generation, or the legacy directories before any publish."""
+    try:
+        name = (root / CURRENT_FILE).read_text("utf-8").strip()
+    except FileNotFoundError:
+        name = ""
+    if name and (root / name).is_dir():
+        return _generation_paths(root, name)
+    return GenerationPaths("legacy", LEGACY_CHROMA_DIR, LEGACY_BM25_DIR)
+
+
+def create_generation(root: Path = INDEX_ROOT) -> GenerationPaths:
+    """A new, unpublished generation seeded with a copy of the live one."""
+    name = f"gen-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+    gen = _generation_paths(root, name)
+    gen.chroma_dir.parent.mkdir(parents=True)
+
+    live = current_generation(root)
+    if live.chroma_dir.is_dir():
+        shutil.copytree(live.chroma_dir, gen.chroma_dir)
+    if live.bm25_dir.is_dir():
+        # Reused as-is when nothing changed (same collection fingerprint)
+        shutil.copytree(live.bm25_dir, gen.bm25_dir)
+    return gen
+
+
+def publish_generation(gen: GenerationPaths, root: Path = INDEX_ROOT) -> None:
+    """Point ``CURRENT`` at *gen* (atomic rename), then prune old generations."""
+    previous = current_generation(root).name
+    tmp = root / f"{CURRENT_FILE}.tmp-{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(gen.name + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, root / CURRENT_FILE)
+    prune_generations(root, keep={gen.name, previous})
+
+
+def discard_generation(gen: GenerationPaths) -> None:
+    """Remove an unpublished generation (a failed build)."""
+    shutil.rmtree(gen.chroma_dir.parent, ignore_errors=True)
+
+
+def prune_generations(root: Path, keep: set[str]) -> list[str]:
+    """Delete generations older than the live one, except those in *keep* or
+    open in a backend (``serving_generations``).
+
+    Newer directories belong to a build still in progress and are left alone.
+    """
+    live = current_generation(root).name
+    keep = keep | serving_generations(root)
+    removed = sorted(
+        p.name for p in root.glob("gen-*")
+        if p.is_dir() and p.name < live and p.name not in keep
+    )
+    for name in removed:
+        shutil.rmtree(root / name, ignore_errors=True)
+    return removed
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True         # exists, owned by another user
+    return True
+
+
+def serving_generations(root: Path = INDEX_ROOT) -> set[str]:
+    """Generations some live backend process has open (stale markers removed)."""
+    names: set[str] = set()
+    for marker in (root / SERVING_DIR).glob("*"):
+        if not marker.name.isdigit():
+            continue        # a marker being written
+        if not _pid_alive(int(marker.name)):
+            marker.unlink(missing_ok=True)
+            continue
+        try:
+            names.update(marker.read_text("utf-8").split())
+        except FileNotFoundError:
+            pass
+    return names
+
+
+def mark_serving(names: list[str], root: Path = INDEX_ROOT) -> None:
+    """Record the generations this process has open (atomic rewrite)."""
+    directory = root / SERVING_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp = directory / f"{os.getpid()}.tmp"
+    tmp.write_text("\n".join(n for n in names if n != "legacy") + "\n", "utf-8")
+    os.replace(tmp, directory / str(os.getpid()))
+
+
+def clear_serving(root: Path = INDEX_ROOT) -> None:
+    """Drop this process's marker (backend shutdown)."""
+    (root / SERVING_DIR / str(os.getpid())).unlink(missing_ok=True)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# LOADED (backend side)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class IndexGeneration:
+    """One generation, loaded and ready to serve: Chroma collection + BM25."""
+
+    def __init__(self, paths: GenerationPaths, embeddings):
+        self.name = paths.name
+        self.vectorstore = Chroma(
+            persist_directory=str(paths.chroma_dir),
+            embedding_function=embeddings,
+            collection_name=COLLECTION_NAME,
+        )
+        self.collection = self.vectorstore._collection
+        # Normally just memory-maps the embedder's snapshot; rebuilds only
+        # if it is missing or does not match the collection
+        self.bm25, self.doc_ids, self.fingerprint = load_or_build_snapshot(
+            self.collection, paths.bm25_dir
+        )
+        self.loaded_at = time.time()
+
+    def close(self):
+        """Release the Chroma client (SQLite handles) of a retired generation."""
+        close = getattr(self.vectorstore._client, "close", None)
+        if close is not None:
+            close()
@@ -4,33 +4,89 @@ Audio Intel — FastAPI Backend (Advanced RAG)
 • Advanced RAG Chatbot:
     ① Query Rewriting   — Groq rewrites user query into search-optimised keywords
     ② Hybrid Search     — Semantic (ChromaDB) + Keyword (BM25) via Reciprocal Rank Fusion
-    ③ LLM Re-ranking    — Groq scores each candidate's relevance, top-K selected
+    ③ Re-ranking        — Groq LLM judge or a local CPU re-ranker picks the top-K
     ④ Generation        — Groq produces the final answer from re-ranked context
+• /chat returns the full answer; /chat/stream sends sources, then tokens (SSE)
+• /metrics exposes per-stage latency histograms and Groq / cache / fallback
+  counters in Prometheus format (backend/metrics.py)
 """
 
+import asyncio
+import contextvars
+import functools
 import json
 import os
 import re
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Optional
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
 
 
 # ─── Groq SDK (direct, no LangChain wrapper) ────────────────────────────────
-from groq import Groq
+from groq import AsyncGroq
 
-# ─── LangChain only for ChromaDB retrieval ───────────────────────────────────
-from langchain_chroma import Chroma
-from langchain_ollama import OllamaEmbeddings
+# ─── LangChain documents for retrieved chunks ───────────────────────────────
 from langchain_core.documents import Document
 
-# ─── BM25 for keyword search ────────────────────────────────────────────────
-from rank_bm25 import BM25Okapi
+# ─── Embedding backend (Ollama, or an offline stand-in) ─────────────────────
+from backend.embeddings import embeddings_key, make_embeddings
+
+# ─── BM25 for keyword search (sparse inverted index) ────────────────────────
+from backend.bm25 import tokenize
+
+# ─── Index generations (Chroma + BM25, hot-swapped on publish) ──────────────
+from backend.index_generations import (
+    IndexGeneration,
+    clear_serving,
+    current_generation,
+    mark_serving,
+)
+
+# ─── Query caches (LRU + TTL) ───────────────────────────────────────────────
+from backend.cache import TTLCache, normalize_query
+
+# ─── Re-rankers (Groq LLM judge or local CPU scorers) ───────────────────────
+from backend.rerankers import make_reranker
+
+# ─── Metadata pre-filtering (ChatFilters → Chroma where / BM25 mask) ────────
+from backend.filters import MetadataFilter
+from backend.product_attributes import budget_cap
+
+# ─── Latency spans, counters and the Prometheus /metrics registry ───────────
+from backend.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    ERRORS,
+    FALLBACKS,
+    REGISTRY,
+    REQUESTS,
+    observe,
+    record_groq_call,
+    span,
+    start_request_timings,
+)
+
+# ─── Server-side chat sessions (recent turns + rolling summary) ─────────────
+from backend.sessions import (
+    RECENT_MESSAGES,
+    SUMMARY_MAX_CHARS,
+    Session,
+    apply_fold,
+    extractive_summary,
+    fold_candidates,
+    make_session_store,
+    new_session_id,
+)
 
 # ─────────────────────────────────────────────────────────────────────────────
 # ENV VARIABLES
@@ -44,59 +100,203 @@ if not GROQ_API_KEY:
     raise RuntimeError("GROQ_API_KEY is missing from .env")
 
 # ─────────────────────────────────────────────────────────────────────────────
-# CHROMA VECTORSTORE (already persisted)
+# INDEX GENERATION (Chroma collection + memory-mapped BM25 snapshot)
+# The embedder publishes each refresh as a new generation under indexes/.
+# It is loaded beside the live one and swapped in with a single assignment.
+# A request leases the live generation and finishes on it; a swapped-out
+# generation is closed (and left to pruning) once its last lease is released.
 # ─────────────────────────────────────────────────────────────────────────────
-CHROMA_DIR = str(Path(__file__).resolve().parent.parent / "chroma_db")
-COLLECTION_NAME = "products_collection"
-
-embeddings = OllamaEmbeddings(model="nomic-embed-text:latest")
-vectorstore = Chroma(
-    persist_directory=CHROMA_DIR,
-    embedding_function=embeddings,
-    collection_name=COLLECTION_NAME,
-)
+embeddings = make_embeddings()          # EMBEDDINGS=ollama | hash
+EMBEDDING_MODEL = embeddings_key(embeddings)
 
-# ─────────────────────────────────────────────────────────────────────────────
-# BM25 INDEX (built once at startup from ChromaDB contents)
-# ─────────────────────────────────────────────────────────────────────────────
-print("⏳ Building BM25 index from ChromaDB collection …")
+INDEX_WATCH_INTERVAL = float(os.getenv("INDEX_WATCH_INTERVAL", "5"))   # seconds; 0 = off
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")   # required by /admin/* when set
 
-_collection = vectorstore._collection
-_all_data   = _collection.get(include=["documents", "metadatas"])
-_all_docs   = _all_data["documents"]   # list[str]
-_all_metas  = _all_data["metadatas"]   # list[dict]
-_all_ids    = _all_data["ids"]         # list[str]
+_index_lock = threading.Lock()           # one loader at a time
+_lease_lock = threading.Lock()           # guards _active / _draining / _leases
+_active: IndexGeneration | None = None
+_draining: list[IndexGeneration] = []    # swapped out, still leased by requests
+_leases: dict[IndexGeneration, int] = {}  # generation → requests running on it
 
 
-def _tokenize(text: str) -> list[str]:
-    """Simple whitespace + punctuation tokeniser, lowercased."""
-    return re.findall(r"\w+", text.lower())
+def _generation() -> IndexGeneration:
+    """The generation being served; loaded on first use."""
+    if _active is None:
+        with _index_lock:
+            if _active is None:
+                _swap_to(_load(current_generation()))
+    return _active
 
 
-_tokenized_corpus = [_tokenize(doc) for doc in _all_docs]
-bm25_index = BM25Okapi(_tokenized_corpus)
+def _open_names() -> list[str]:
+    return [g.name for g in (_active, *_draining) if g is not None]
 
-print(f"✅ BM25 index ready — {len(_all_docs)} chunks indexed.")
+
+def _load(paths) -> IndexGeneration:
+    # Claimed before loading, so a publish meanwhile cannot prune it
+    with _lease_lock:
+        mark_serving(_open_names() + [paths.name])
+    try:
+        return IndexGeneration(paths, embeddings)
+    except Exception:
+        with _lease_lock:
+            mark_serving(_open_names())
+        raise
+
+
+def _swap_to(generation: IndexGeneration):
+    global _active
+    with _lease_lock:
+        if _active is not None:
+            _draining.append(_active)
+        _active = generation
+    _close_idle()
+    print(
+        f"✅ Serving index generation {generation.name} — "
+        f"{len(generation.bm25)} chunks indexed."
+    )
+
+
+def reload_index(force: bool = False) -> dict:
+    """Load the published generation and swap it in if it is not live yet.
+
+    Blocking: runs on the retrieval executor, never in a request path.
+    *force* reloads even an unchanged generation name (e.g. a legacy tree
+    rewritten in place).
+    """
+    with _index_lock:
+        paths = current_generation()
+        previous = _active.name if _active is not None else None
+        if previous == paths.name and not force:
+            return {"swapped": False, "generation": previous}
+        _swap_to(_load(paths))
+        return {"swapped": True, "generation": paths.name, "previous": previous}
+
+
+def _close_idle():
+    """Close the swapped-out generations no request holds any more."""
+    with _lease_lock:
+        idle = [g for g in _draining if not _leases.get(g)]
+        _draining[:] = [g for g in _draining if g not in idle]
+        mark_serving(_open_names())     # the idle generations may now be pruned
+    for generation in idle:
+        generation.close()
+
+
+def _acquire() -> IndexGeneration:
+    """Lease the live generation: it stays open and unpruned until released."""
+    _generation()
+    with _lease_lock:
+        generation = _active
+        _leases[generation] = _leases.get(generation, 0) + 1
+    return generation
+
+
+def _release(generation: IndexGeneration):
+    with _lease_lock:
+        _leases[generation] -= 1
+        if _leases[generation]:
+            return
+        del _leases[generation]
+        if generation not in _draining:
+            return
+    # Last lease on a swapped-out generation: close it off the event loop
+    try:
+        _retrieval_executor.submit(_close_idle)
+    except RuntimeError:
+        pass    # executor already shut down
+
+
+@asynccontextmanager
+async def _leased_generation():
+    """The live generation, held for the duration of the ``async with`` block."""
+    generation = await _run_blocking(_acquire)
+    try:
+        yield generation
+    finally:
+        _release(generation)
+
+
+async def _watch_index():
+    """Poll indexes/CURRENT and hot-swap when the embedder publishes."""
+    while True:
+        await asyncio.sleep(INDEX_WATCH_INTERVAL)
+        try:
+            published = await _run_blocking(current_generation)
+            if _active is None or published.name != _active.name:
+                await _run_blocking(reload_index)
+        except Exception as e:
+            # Keep serving the live generation; retried on the next tick
+            ERRORS.inc(component="index_reload")
+            print(f"⚠ Index reload failed: {e}")
 
 # ─────────────────────────────────────────────────────────────────────────────
-# GROQ CLIENT
+# QUERY CACHES
+# Embeddings depend only on the model, so they outlive index refreshes.
+# Hybrid results are keyed by the index version and go stale with it.
 # ─────────────────────────────────────────────────────────────────────────────
-groq_client = Groq(api_key=GROQ_API_KEY)
+embedding_cache = TTLCache(
+    maxsize=int(os.getenv("EMBED_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("EMBED_CACHE_TTL", "86400")),
+)
+hybrid_cache = TTLCache(
+    maxsize=int(os.getenv("QUERY_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("QUERY_CACHE_TTL", "600")),
+)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# GROQ CLIENT (async — never blocks the event loop)
+# ─────────────────────────────────────────────────────────────────────────────
+groq_client = AsyncGroq(api_key=GROQ_API_KEY)
 GROQ_MODEL = "openai/gpt-oss-120b"
 GROQ_MODEL_FAST = "llama-3.1-8b-instant"  # lightweight model for rewrite + rerank
-MAX_HISTORY_TURNS = 20  # cap to prevent token overflow in Groq calls
+MAX_HISTORY_TURNS = 20  # cap for clients that still post their own history
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CHAT SESSIONS
+# Clients send only the new message plus a session_id; the server keeps the
+# recent turns verbatim and folds older ones into a rolling summary, so the
+# generation prompt stays a constant size. Store ops may hit disk (sqlite), so
+# they run on the retrieval executor; a per-session lock keeps each
+# read-modify-write from interleaving with another on the same session.
+# ─────────────────────────────────────────────────────────────────────────────
+session_store = make_session_store()     # SESSION_STORE=memory | sqlite
+_folding: set[str] = set()               # sessions with a summary update running
+_session_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+_background_tasks: set[asyncio.Future] = set()
+
+# ─────────────────────────────────────────────────────────────────────────────
+# RETRIEVAL EXECUTOR
+# Chroma, Ollama embeddings and BM25 scoring are synchronous; they run on a
+# bounded thread pool so concurrent chats overlap instead of queueing on the
+# event loop.
+# ─────────────────────────────────────────────────────────────────────────────
+RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "8"))
+_retrieval_executor = ThreadPoolExecutor(
+    max_workers=RETRIEVAL_WORKERS, thread_name_prefix="retrieval"
+)
+
+
+async def _run_blocking(fn, *args, **kwargs):
+    """Run a blocking retrieval call on the bounded executor."""
+    loop = asyncio.get_running_loop()
+    # Carry the context over so spans inside *fn* reach the request timings
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _retrieval_executor, ctx.run, functools.partial(fn, *args, **kwargs)
+    )
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # HELPER: format conversation history for text-based prompts
 # ─────────────────────────────────────────────────────────────────────────────
-def _format_history_for_prompt(history: list[dict] | None) -> str:
+def _format_history_for_prompt(history: list[dict] | None, summary: str = "") -> str:
     """Convert history dicts into a readable string for text-template prompts
     (used in query-rewriting where we inject history into a template)."""
-    if not history:
+    if not history and not summary:
         return "(no prior conversation)"
-    lines = []
-    for msg in history[-10:]:  # last 10 msgs is enough context for rewriting
+    lines = [f"Earlier (summary): {summary}"] if summary else []
+    for msg in (history or [])[-10:]:  # last 10 msgs is enough context for rewriting
         role_label = "User" if msg["role"] == "user" else "Assistant"
         # Truncate long assistant replies to keep the prompt lean
         content = msg["content"]
@@ -138,17 +338,33 @@ User's latest question: {question}
 """
 
 
-def rewrite_query(
-    question: str, filter_text: str, history: list[dict] | None = None
+async def rewrite_query(
+    question: str,
+    filter_text: str,
+    history: list[dict] | None = None,
+    summary: str = "",
 ) -> list[str]:
     """Use a fast LLM to expand the user question into search-optimised queries.
 
-    Conversation *history* is injected so the rewriter can resolve references
-    like "those", "the first one", or "something cheaper".
+    Conversation *history* (and the session *summary*) is injected so the
+    rewriter can resolve references like "those", "the first one", or
+    "something cheaper".
     """
-    history_text = _format_history_for_prompt(history)
+    history_text = _format_history_for_prompt(history, summary)
+    with span("rewrite"):
+        queries = await _rewrite_with_groq(question, filter_text, history_text)
+    if queries is None:
+        # Fallback: use original question
+        FALLBACKS.inc(component="rewrite_query")
+        return [question]
+    return queries
+
+
+async def _rewrite_with_groq(
+    question: str, filter_text: str, history_text: str
+) -> list[str] | None:
     try:
-        resp = groq_client.chat.completions.create(
+        resp = await groq_client.chat.completions.create(
             model=GROQ_MODEL_FAST,
             messages=[
                 {
@@ -164,6 +380,12 @@ def rewrite_query(
             temperature=0.0,
             max_tokens=256,
         )
+    except Exception:
+        record_groq_call("rewrite", GROQ_MODEL_FAST, ok=False)
+        return None
+    record_groq_call("rewrite", GROQ_MODEL_FAST, resp.usage)
+
+    try:
         raw = resp.choices[0].message.content.strip()
         # Parse the JSON array from the response
         # Handle cases where LLM wraps in ```json ... ```
@@ -174,35 +396,98 @@ def rewrite_query(
             return queries
     except Exception:
         pass
-    # Fallback: use original question
-    return [question]
+    return None
 
 
 # ──────────────── ② HYBRID SEARCH ────────────────────────────────────────────
 
-def _semantic_search(query: str, k: int = 10) -> list[Document]:
+# Retrieval depth per deployment; benchmarks/eval_retrieval.py measures the
+# quality and latency of each setting
+K_PER_QUERY = int(os.getenv("RETRIEVAL_K_PER_QUERY", "10"))  # hits per search, per query
+FINAL_K = int(os.getenv("RETRIEVAL_FINAL_K", "15"))          # fused candidates re-ranked
+RRF_K = int(os.getenv("RRF_K", "60"))                        # RRF rank-damping constant
+
+def _embed_queries(queries: list[str]) -> list[list[float]]:
+    """Embed *queries* in one Ollama call; cached vectors are not re-sent."""
+    keys = [(EMBEDDING_MODEL, normalize_query(q)) for q in queries]
+    vectors = [embedding_cache.get(key) for key in keys]
+
+    missing = [i for i, v in enumerate(vectors) if v is None]
+    if missing:
+        with span("embed"):
+            fresh = embeddings.embed_documents([queries[i] for i in missing])
+        for i, vector in zip(missing, fresh):
+            vectors[i] = vector
+            embedding_cache.set(keys[i], vector)
+    return vectors
+
+
+def _semantic_search_batch(
+    queries: list[str],
+    k: int = 10,
+    metadata_filter: MetadataFilter | None = None,
+    generation: IndexGeneration | None = None,
+) -> list[list[Document]]:
+    """ChromaDB cosine-similarity search for all *queries* in one query call."""
+    if not queries:
+        return []
+    generation = generation or _generation()
+    vectors = _embed_queries(queries)
+    with span("chroma_query"):
+        result = generation.collection.query(
+            query_embeddings=vectors,
+            n_results=k,
+            where=metadata_filter.chroma_where() if metadata_filter else None,
+            include=["documents", "metadatas"],
+        )
+    return [
+        [
+            Document(page_content=doc, metadata=meta or {})
+            for doc, meta in zip(docs, metas)
+        ]
+        for docs, metas in zip(result["documents"], result["metadatas"])
+    ]
+
+
+def _semantic_search(
+    query: str,
+    k: int = 10,
+    metadata_filter: MetadataFilter | None = None,
+    generation: IndexGeneration | None = None,
+) -> list[Document]:
     """ChromaDB cosine-similarity search."""
-    return vectorstore.similarity_search(query, k=k)
-
-
-def _bm25_search(query: str, k: int = 10) -> list[Document]:
-    """BM25 keyword search over the same corpus."""
-    tokens = _tokenize(query)
-    scores = bm25_index.get_scores(tokens)
+    return _semantic_search_batch(
+        [query], k=k, metadata_filter=metadata_filter, generation=generation
+    )[0]
 
-    # Get top-k indices
-    top_indices = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:k]
 
-    results = []
-    for idx in top_indices:
-        if scores[idx] > 0:  # skip zero-score results
-            results.append(
-                Document(
-                    page_content=_all_docs[idx],
-                    metadata=_all_metas[idx],
-                )
-            )
-    return results
+def _bm25_search(
+    query: str,
+    k: int = 10,
+    metadata_filter: MetadataFilter | None = None,
+    generation: IndexGeneration | None = None,
+) -> list[Document]:
+    """BM25 keyword search over the same corpus (zero-score docs skipped)."""
+    generation = generation or _generation()
+    index = generation.bm25
+    with span("bm25"):
+        mask = metadata_filter.bm25_mask(index.facets) if metadata_filter else None
+        hits = index.top_k(tokenize(query), k=k, mask=mask)
+    hit_ids = [generation.doc_ids[idx] for idx, _ in hits]
+    if not hit_ids:
+        return []
+
+    # Only the hits' text/metadata is fetched from Chroma, in BM25 rank order
+    with span("chroma_get"):
+        data = generation.collection.get(
+            ids=hit_ids, include=["documents", "metadatas"]
+        )
+    by_id = dict(zip(data["ids"], zip(data["documents"], data["metadatas"])))
+    return [
+        Document(page_content=by_id[i][0], metadata=by_id[i][1])
+        for i in hit_ids
+        if i in by_id
+    ]
 
 
 def reciprocal_rank_fusion(
@@ -230,104 +515,104 @@ def reciprocal_rank_fusion(
     return [doc_map[k] for k in ranked_keys]
 
 
-def hybrid_search(queries: list[str], k_per_query: int = 10, final_k: int = 15) -> list[Document]:
-    """
-    Run semantic + BM25 for each rewritten query, then fuse all results.
+async def hybrid_search(
+    queries: list[str],
+    k_per_query: int = K_PER_QUERY,
+    final_k: int = FINAL_K,
+    metadata_filter: MetadataFilter | None = None,
+    rrf_k: int = RRF_K,
+) -> list[Document]:
     """
-    all_result_lists = []
-
-    for q in queries:
-        sem_results = _semantic_search(q, k=k_per_query)
-        bm25_results = _bm25_search(q, k=k_per_query)
-        all_result_lists.append(sem_results)
-        all_result_lists.append(bm25_results)
-
-    fused = reciprocal_rank_fusion(all_result_lists)
-    return fused[:final_k]
+    Run semantic + BM25 for the rewritten queries, then fuse all results.
 
+    All uncached queries are embedded in a single Ollama call and searched
+    with a single multi-query Chroma call; the BM25 searches run on the
+    retrieval executor in parallel with it.
 
-# ──────────────── ③ LLM RE-RANKING ───────────────────────────────────────────
+    *metadata_filter* (from ChatFilters) is pushed into both searches, so
+    mismatching products never reach re-ranking.
 
-RERANK_PROMPT = """\
-You are a relevance judge for an audio-products recommendation system.
+    Per-query (semantic, BM25) result pairs are cached against the index
+    version, so repeated queries skip both Ollama and BM25 entirely.
 
-Given a user's QUERY and a list of CANDIDATE products, score each candidate's
-relevance to the query on a scale of 0-10 (10 = perfect match).
-
-Consider: product type match, connectivity match, budget fit, use-case match,
-brand preference, and how well the product description answers the query.
-
-Output ONLY a JSON array of objects: [{{"index": 0, "score": 8}}, ...]
-No explanation, just the JSON array.
-
-QUERY: {query}
-FILTERS: {filters}
-
-CANDIDATES:
-{candidates}
-"""
-
-
-def rerank_documents(
-    query: str, filter_text: str, docs: list[Document], top_k: int = 5
-) -> list[Document]:
-    """Use a fast LLM to score & re-rank the retrieved candidates."""
-    if len(docs) <= top_k:
-        return docs
-
-    # Format candidates for the LLM
-    candidates_text = ""
-    for i, doc in enumerate(docs):
-        meta = doc.metadata
-        candidates_text += (
-            f"[{i}] {meta.get('product_name', 'N/A')} | "
-            f"Price: {meta.get('price', 'N/A')} | "
-            f"Type: {meta.get('type', 'N/A')} | "
-            f"Connectivity: {meta.get('connectivity', 'N/A')}\n"
-            f"    {doc.page_content[:200]}\n\n"
-        )
-
-    try:
-        resp = groq_client.chat.completions.create(
-            model=GROQ_MODEL_FAST,
-            messages=[
-                {
-                    "role": "system",
-                    "content": RERANK_PROMPT.format(
-                        query=query,
-                        filters=filter_text,
-                        candidates=candidates_text,
-                    ),
-                },
-                {"role": "user", "content": "Score each candidate now."},
-            ],
-            temperature=0.0,
-            max_tokens=512,
-        )
-        raw = resp.choices[0].message.content.strip()
-        raw = re.sub(r"```json\s*", "", raw)
-        raw = re.sub(r"```\s*$", "", raw)
-        scores = json.loads(raw)
-
-        if isinstance(scores, list):
-            # Build index→score map
-            score_map = {}
-            for item in scores:
-                if isinstance(item, dict) and "index" in item and "score" in item:
-                    score_map[item["index"]] = item["score"]
-
-            # Sort docs by score descending
-            indexed_docs = [(i, doc) for i, doc in enumerate(docs)]
-            indexed_docs.sort(
-                key=lambda x: score_map.get(x[0], 0), reverse=True
+    Both searches use the generation live when the call starts, leased so a
+    swap meanwhile cannot close it under them.
+    """
+    metadata_filter = metadata_filter or MetadataFilter()
+    async with _leased_generation() as generation:
+        keys = [
+            (generation.fingerprint, normalize_query(q), k_per_query, metadata_filter)
+            for q in queries
+        ]
+
+        per_query: dict[tuple, list[list[Document]]] = {}
+        pending_keys, pending_queries = [], []
+        for q, key in zip(queries, keys):
+            if key in per_query or key in pending_keys:
+                continue
+            cached = hybrid_cache.get(key)
+            if cached is not None:
+                per_query[key] = cached
+                continue
+            pending_keys.append(key)
+            pending_queries.append(q)
+
+        if pending_queries:
+            sem_task = _run_blocking(
+                _semantic_search_batch,
+                pending_queries,
+                k=k_per_query,
+                metadata_filter=metadata_filter,
+                generation=generation,
             )
-            return [doc for _, doc in indexed_docs[:top_k]]
+            bm25_tasks = [
+                _run_blocking(
+                    _bm25_search,
+                    q,
+                    k=k_per_query,
+                    metadata_filter=metadata_filter,
+                    generation=generation,
+                )
+                for q in pending_queries
+            ]
+            # Let every search finish before the lease is released
+            results = await asyncio.gather(sem_task, *bm25_tasks, return_exceptions=True)
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+            sem_lists, *bm25_lists = results
+            for key, sem_results, bm25_results in zip(pending_keys, sem_lists, bm25_lists):
+                per_query[key] = [sem_results, bm25_results]
+                hybrid_cache.set(key, per_query[key])
+
+        all_result_lists = [lst for key in keys for lst in per_query[key]]
+        with span("rrf"):
+            fused = reciprocal_rank_fusion(all_result_lists, k=rrf_k)
+        return fused[:final_k]
+
+
+# ──────────────── ③ RE-RANKING (pluggable, see backend/rerankers.py) ─────────
+
+RERANKER = os.getenv("RERANKER", "groq")
+reranker = make_reranker(
+    RERANKER,
+    groq_client=groq_client,
+    groq_model=GROQ_MODEL_FAST,
+    run_blocking=_run_blocking,
+)
 
-    except Exception:
-        pass
 
-    # Fallback: return first top_k (original RRF order)
-    return docs[:top_k]
+async def rerank_documents(
+    query: str,
+    filter_text: str,
+    docs: list[Document],
+    top_k: int = 5,
+    filters: "ChatFilters | None" = None,
+) -> list[Document]:
+    """Score & re-rank the retrieved candidates with the configured re-ranker."""
+    return await reranker.rerank(
+        query, docs, top_k=top_k, filters=filters, filter_text=filter_text
+    )
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -375,7 +660,7 @@ def _format_docs(docs: list[Document]) -> str:
         meta = doc.metadata
         formatted.append(
             f"[{i}] {meta.get('product_name', 'N/A')} | "
-            f"Price: {meta.get('price', 'N/A')} | "
+            f"Price: {meta.get('price') or 'N/A'} | "
             f"Type: {meta.get('type', 'N/A')} | "
             f"Connectivity: {meta.get('connectivity', 'N/A')} | "
             f"URL: {meta.get('url', 'N/A')}\n"
@@ -392,8 +677,10 @@ def _build_filter_text(f: "ChatFilters | None") -> str:
         parts.append(f"Product type: {f.product_type}")
     if f.connectivity and f.connectivity != "all":
         parts.append(f"Connectivity: {f.connectivity}")
-    if f.budget is not None and f.budget < 500:
-        parts.append(f"Max budget: ${f.budget}")
+    # The same cap MetadataFilter pushes down, so prompts and retrieval agree
+    max_price = budget_cap(f.budget)
+    if max_price:
+        parts.append(f"Budget: around ৳{f.budget:,} (max ৳{max_price:,})")
     if f.use_case and f.use_case != "general":
         parts.append(f"Use case: {f.use_case}")
     if f.brand and f.brand != "all":
@@ -404,10 +691,38 @@ def _build_filter_text(f: "ChatFilters | None") -> str:
 # ─────────────────────────────────────────────────────────────────────────────
 # FASTAPI APP
 # ─────────────────────────────────────────────────────────────────────────────
+def _report_startup_load(future: asyncio.Future):
+    if future.cancelled() or future.exception() is None:
+        return
+    # Requests retry the load; this only makes the failure visible now
+    ERRORS.inc(component="index_load")
+    print(f"⚠ Index load at startup failed: {future.exception()}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the live generation in the background; requests never wait on startup
+    startup_load = asyncio.get_running_loop().run_in_executor(_retrieval_executor, _generation)
+    _background_tasks.add(startup_load)
+    startup_load.add_done_callback(_background_tasks.discard)
+    startup_load.add_done_callback(_report_startup_load)
+    watcher = asyncio.create_task(_watch_index()) if INDEX_WATCH_INTERVAL > 0 else None
+    yield
+    if watcher is not None:
+        watcher.cancel()
+    # Release retrieval threads and the Groq connection pool on shutdown
+    _retrieval_executor.shutdown(wait=False, cancel_futures=True)
+    await groq_client.close()
+    if hasattr(session_store, "close"):
+        session_store.close()
+    clear_serving()
+
+
 app = FastAPI(
     title="Audio Intel API",
     version="2.0.0",
     description="Advanced RAG Chatbot (Hybrid Search, Re-ranking, Query Rewriting)",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -426,7 +741,7 @@ app.add_middleware(
 class ChatFilters(BaseModel):
     product_type: Optional[str] = "all"
     connectivity: Optional[str] = "all"
-    budget: Optional[int] = 500
+    budget: Optional[int] = None   # None = no price cap
     use_case: Optional[str] = "general"
     brand: Optional[str] = "all"
 
@@ -438,11 +753,14 @@ class ChatMessage(BaseModel):
 class ChatRequest(BaseModel):
     message: str
     filters: Optional[ChatFilters] = None
-    history: Optional[list[ChatMessage]] = None  # prior conversation turns
+    session_id: Optional[str] = None   # from the previous response; omit to start
+    history: Optional[list[ChatMessage]] = None  # legacy: only used without session_id
+    include_timings: bool = False      # per-stage latencies (ms) in debug.timings_ms
 
 class ChatResponse(BaseModel):
     reply: str
     sources: list[dict] = []
+    session_id: Optional[str] = None   # send back with the next message
     debug: Optional[dict] = None   # optional: pipeline telemetry
 
 
@@ -450,96 +768,397 @@ class ChatResponse(BaseModel):
 # CHATBOT ENDPOINT — ADVANCED RAG PIPELINE
 # ─────────────────────────────────────────────────────────────────────────────
 
+SUMMARY_PROMPT = """\
+You keep a running summary of a shopping conversation about audio products
+(headphones, earphones, TWS, neckbands).
+
+Update the current summary with the new messages. Keep what later turns may
+refer to: the user's needs, budget, preferred brands and features, the
+products discussed (names and prices) and anything decided or ruled out.
+Drop greetings and filler. Plain sentences, at most {max_chars} characters.
+Output ONLY the updated summary.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}
+"""
+
+
+async def summarize_turns(summary: str, messages: tuple[dict, ...]) -> str:
+    """Fold *messages* into *summary* with the fast model (extractive fallback)."""
+    try:
+        resp = await groq_client.chat.completions.create(
+            model=GROQ_MODEL_FAST,
+            messages=[
+                {
+                    "role": "system",
+                    "content": SUMMARY_PROMPT.format(
+                        max_chars=SUMMARY_MAX_CHARS,
+                        summary=summary or "(empty)",
+                        messages=_format_history_for_prompt(list(messages)),
+                    ),
+                },
+            ],
+            temperature=0.0,
+            max_tokens=400,
+        )
+        record_groq_call("summary", GROQ_MODEL_FAST, resp.usage)
+        text = (resp.choices[0].message.content or "").strip()
+        if text:
+            return text
+    except Exception:
+        record_groq_call("summary", GROQ_MODEL_FAST, ok=False)
+    FALLBACKS.inc(component="session_summary")
+    return extractive_summary(summary, messages)
+
+
+def _session_lock(session_id: str) -> asyncio.Lock:
+    """Lock serialising store read-modify-writes on one session."""
+    lock = _session_locks.get(session_id)
+    if lock is None:
+        lock = _session_locks[session_id] = asyncio.Lock()
+    return lock
+
+
+async def _resolve_session(body: ChatRequest) -> Session:
+    """The request's session; a new one for a missing or expired id."""
+    if body.session_id:
+        session = await _run_blocking(session_store.get, body.session_id)
+        if session is not None:
+            return session
+    # Clients without sessions may still post their own history
+    legacy_turns = tuple(
+        {"role": m.role, "content": m.content}
+        for m in (body.history or [])
+        if m.role in ("user", "assistant") and m.content.strip()
+    )[-MAX_HISTORY_TURNS:]
+    session = Session(new_session_id(), turns=legacy_turns, updated_at=time.time())
+    # Only RECENT_MESSAGES go out verbatim: fold the rest into the summary now
+    # rather than dropping it from this request's prompt
+    folded = fold_candidates(session, RECENT_MESSAGES)
+    if folded:
+        with span("summary"):
+            summary = await summarize_turns("", folded)
+        session = apply_fold(session, folded, summary)
+    return session
+
+
+async def _record_exchange(session: Session, user_message: str, reply: str):
+    """Append the finished exchange and fold older turns in the background."""
+    async with _session_lock(session.id):
+        latest = await _run_blocking(session_store.get, session.id) or session
+        updated = latest.with_exchange(user_message, reply)
+        await _run_blocking(session_store.save, updated)
+
+    if fold_candidates(updated) and session.id not in _folding:
+        task = asyncio.create_task(_fold_session(session.id))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+
+async def _fold_session(session_id: str):
+    _folding.add(session_id)
+    try:
+        session = await _run_blocking(session_store.get, session_id)
+        folded = fold_candidates(session) if session else ()
+        if not folded:
+            return
+        with span("summary"):
+            summary = await summarize_turns(session.summary, folded)
+        # Re-read: the user may have sent another message meanwhile
+        async with _session_lock(session_id):
+            latest = await _run_blocking(session_store.get, session_id)
+            updated = apply_fold(latest, folded, summary) if latest else None
+            if updated is not None:
+                await _run_blocking(session_store.save, updated)
+    finally:
+        _folding.discard(session_id)
+
+
+async def _prepare_generation(body: ChatRequest) -> dict:
+    """
+    Run stages ①–③ of the pipeline and build everything generation needs.
+
+    Shared by ``/chat`` and ``/chat/stream`` so both endpoints retrieve and
+    rank identically; only the way stage ④ is delivered differs.
+    """
+    filter_text = _build_filter_text(body.filters)
+
+    # Recent turns verbatim + a summary of the rest: a constant-size history
+    session = await _resolve_session(body)
+    history_dicts = session.recent()
+
+    # ─── ① QUERY REWRITING ───────────────────────────────────────────────
+    rewritten_queries = await rewrite_query(
+        body.message, filter_text, history=history_dicts, summary=session.summary
+    )
+
+    # ─── ② HYBRID SEARCH (Semantic + BM25 + RRF, filters pushed down) ────
+    metadata_filter = MetadataFilter.from_chat_filters(body.filters)
+    with span("hybrid_search"):
+        hybrid_results = await hybrid_search(
+            queries=rewritten_queries,
+            k_per_query=K_PER_QUERY,
+            final_k=FINAL_K,
+            metadata_filter=metadata_filter,
+        )
+
+    # ─── ③ RE-RANKING ────────────────────────────────────────────────────
+    with span("rerank"):
+        reranked_docs = await rerank_documents(
+            query=body.message,
+            filter_text=filter_text,
+            docs=hybrid_results,
+            top_k=5,
+            filters=body.filters,
+        )
+
+    # ─── Prompt for ④ GENERATION (with conversation history) ─────────────
+    context_text = _format_docs(reranked_docs)
+
+    system_msg = SYSTEM_PROMPT.format(
+        context=context_text,
+        filters=filter_text,
+    )
+
+    # Build the messages list: system → summary → recent turns → user message
+    llm_messages: list[dict] = [{"role": "system", "content": system_msg}]
+    if session.summary:
+        llm_messages.append(
+            {
+                "role": "system",
+                "content": f"Summary of the earlier conversation:\n{session.summary}",
+            }
+        )
+    llm_messages.extend(history_dicts)          # prior turns
+    llm_messages.append({"role": "user", "content": body.message})
+
+    # ─── Collect source metadata ─────────────────────────────────────────
+    sources = []
+    seen = set()
+    for doc in reranked_docs:
+        name = doc.metadata.get("product_name", "")
+        if name and name not in seen:
+            seen.add(name)
+            sources.append(
+                {
+                    "product_name": name,
+                    "price": doc.metadata.get("price"),
+                    "type": doc.metadata.get("type"),
+                    "connectivity": doc.metadata.get("connectivity"),
+                    "url": doc.metadata.get("url"),
+                }
+            )
+
+    # ─── Debug telemetry (helpful for development) ────────────────────────
+    debug_info = {
+        "rewritten_queries": rewritten_queries,
+        "metadata_filter": metadata_filter._asdict(),
+        "hybrid_candidates": len(hybrid_results),
+        "reranked_top_k": len(reranked_docs),
+        "history_turns_sent": len(history_dicts),
+        "summary_chars": len(session.summary),
+    }
+
+    return {
+        "session": session,
+        "llm_messages": llm_messages,
+        "sources": sources,
+        "debug": debug_info,
+    }
+
+
 @app.post("/chat", response_model=ChatResponse, tags=["Chatbot"])
 async def chat(body: ChatRequest):
     """
     Advanced RAG pipeline (with multi-turn conversation history):
       ① Query Rewriting   → Groq rewrites user query into search keywords
       ② Hybrid Search     → Semantic (ChromaDB) + Keyword (BM25) + RRF
-      ③ LLM Re-ranking    → Groq scores & sorts candidates by relevance
+      ③ Re-ranking        → configured re-ranker (RERANKER) sorts candidates
       ④ Generation        → Groq generates answer from top re-ranked context
                              **with conversation history for continuity**
     """
+    REQUESTS.inc(endpoint="chat")
+    timings = start_request_timings()
     try:
-        filter_text = _build_filter_text(body.filters)
-
-        # Sanitise & cap history to avoid token overflow (last 20 msgs)
-        raw_history = body.history or []
-        history_dicts = [
-            {"role": m.role, "content": m.content}
-            for m in raw_history
-            if m.role in ("user", "assistant") and m.content.strip()
-        ][-MAX_HISTORY_TURNS:]
-
-        # ─── ① QUERY REWRITING ───────────────────────────────────────────
-        rewritten_queries = rewrite_query(
-            body.message, filter_text, history=history_dicts
-        )
+        with span("request"):
+            prepared = await _prepare_generation(body)
 
-        # ─── ② HYBRID SEARCH (Semantic + BM25 + RRF) ─────────────────────
-        hybrid_results = hybrid_search(
-            queries=rewritten_queries, k_per_query=10, final_k=15
-        )
+            # ─── ④ GENERATION ────────────────────────────────────────────
+            with span("generation"):
+                chat_completion = await _generate(prepared["llm_messages"])
 
-        # ─── ③ LLM RE-RANKING ────────────────────────────────────────────
-        reranked_docs = rerank_documents(
-            query=body.message,
-            filter_text=filter_text,
-            docs=hybrid_results,
-            top_k=5,
+        reply = chat_completion.choices[0].message.content
+        session = prepared["session"]
+        await _record_exchange(session, body.message, reply)
+
+        debug = prepared["debug"]
+        if body.include_timings:
+            debug["timings_ms"] = timings
+        return ChatResponse(
+            reply=reply,
+            sources=prepared["sources"],
+            session_id=session.id,
+            debug=debug,
         )
 
-        # ─── ④ GENERATION (with conversation history) ────────────────────
-        context_text = _format_docs(reranked_docs)
-
-        system_msg = SYSTEM_PROMPT.format(
-            context=context_text,
-            filters=filter_text,
-        )
+    except Exception as e:
+        ERRORS.inc(component="chat")
+        raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
 
-        # Build the messages list: system → history → current user message
-        llm_messages: list[dict] = [{"role": "system", "content": system_msg}]
-        llm_messages.extend(history_dicts)          # prior turns
-        llm_messages.append({"role": "user", "content": body.message})
 
-        chat_completion = groq_client.chat.completions.create(
+async def _generate(llm_messages: list[dict], stream: bool = False):
+    """Stage ④ Groq call; counted (and, unless streamed, its tokens) in metrics."""
+    try:
+        response = await groq_client.chat.completions.create(
             model=GROQ_MODEL,
             messages=llm_messages,
             temperature=0.5,
             max_tokens=1024,
+            stream=stream,
         )
+    except Exception:
+        record_groq_call("generation", GROQ_MODEL, ok=False)
+        raise
+    if not stream:
+        record_groq_call("generation", GROQ_MODEL, response.usage)
+    return response
 
-        reply = chat_completion.choices[0].message.content
 
-        # ─── Collect source metadata ─────────────────────────────────────
-        sources = []
-        seen = set()
-        for doc in reranked_docs:
-            name = doc.metadata.get("product_name", "")
-            if name and name not in seen:
-                seen.add(name)
-                sources.append(
-                    {
-                        "product_name": name,
-                        "price": doc.metadata.get("price"),
-                        "type": doc.metadata.get("type"),
-                        "connectivity": doc.metadata.get("connectivity"),
-                        "url": doc.metadata.get("url"),
-                    }
-                )
+def _stream_usage(chunk):
+    """Token usage on a streamed chunk (Groq sends it on the last one)."""
+    return getattr(chunk, "usage", None) or getattr(
+        getattr(chunk, "x_groq", None), "usage", None
+    )
 
-        # ─── Debug telemetry (helpful for development) ────────────────────
-        debug_info = {
-            "rewritten_queries": rewritten_queries,
-            "hybrid_candidates": len(hybrid_results),
-            "reranked_top_k": len(reranked_docs),
-            "history_turns_sent": len(history_dicts),
-        }
 
-        return ChatResponse(reply=reply, sources=sources, debug=debug_info)
+def _sse_event(event: str, data: dict) -> str:
+    """Serialise one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
+
+@app.post("/chat/stream", tags=["Chatbot"])
+async def chat_stream(body: ChatRequest):
+    """
+    Same pipeline as ``/chat``, delivered as Server-Sent Events:
+
+      event: sources  → {"sources": [...], "session_id": "...", "debug": {...}}
+                                                            (right after ③)
+      event: token    → {"content": "..."}                  (one per Groq delta)
+      event: done     → {"reply": "<full text>", "session_id": "..."}
+      event: error    → {"detail": "..."}                   (terminates stream)
+
+    The exchange is added to the session once the reply is complete. With
+    ``include_timings``, ``sources`` carries the timings of ①–③ and
+    ``done`` the full set.
+    """
+
+    async def event_stream():
+        REQUESTS.inc(endpoint="chat_stream")
+        timings = start_request_timings()
+        request_start = time.perf_counter()
+        try:
+            prepared = await _prepare_generation(body)
+            session = prepared["session"]
+            debug = prepared["debug"]
+            if body.include_timings:
+                debug["timings_ms"] = dict(timings)
+            yield _sse_event(
+                "sources",
+                {
+                    "sources": prepared["sources"],
+                    "session_id": session.id,
+                    "debug": debug,
+                },
+            )
+
+            # ─── ④ GENERATION (streamed) ─────────────────────────────────
+            reply_parts = []
+            usage = None
+            with span("generation"):
+                generation_start = time.perf_counter()
+                stream = await _generate(prepared["llm_messages"], stream=True)
+                async for chunk in stream:
+                    usage = _stream_usage(chunk) or usage
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        if not reply_parts:
+                            observe(
+                                "generation_first_token",
+                                time.perf_counter() - generation_start,
+                            )
+                        reply_parts.append(delta)
+                        yield _sse_event("token", {"content": delta})
+            record_groq_call("generation", GROQ_MODEL, usage)
+            observe("request", time.perf_counter() - request_start)
+
+            reply = "".join(reply_parts)
+            await _record_exchange(session, body.message, reply)
+            done = {"reply": reply, "session_id": session.id}
+            if body.include_timings:
+                done["timings_ms"] = timings
+            yield _sse_event("done", done)
+
+        except Exception as e:
+            ERRORS.inc(component="chat_stream")
+            yield _sse_event("error", {"detail": f"Chat error: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.delete("/chat/sessions/{session_id}", tags=["Chatbot"])
+async def delete_session(session_id: str):
+    """Forget a conversation (e.g. the user starts a new chat)."""
+    async with _session_lock(session_id):
+        await _run_blocking(session_store.delete, session_id)
+    return {"deleted": session_id}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# METRICS (Prometheus text format)
+# ─────────────────────────────────────────────────────────────────────────────
+
+@REGISTRY.collector
+def _cache_metrics():
+    caches = {"embeddings": embedding_cache, "hybrid_results": hybrid_cache}
+    stats = {name: cache.stats() for name, cache in caches.items()}
+    return [
+        (
+            f"audiointel_cache_{field}_total",
+            "counter",
+            f"Query cache {field}.",
+            [({"cache": name}, s[field]) for name, s in stats.items()],
+        )
+        for field in ("hits", "misses", "evictions")
+    ] + [
+        (
+            "audiointel_cache_entries",
+            "gauge",
+            "Entries currently in each query cache.",
+            [({"cache": name}, s["size"]) for name, s in stats.items()],
+        ),
+        (
+            "audiointel_sessions",
+            "gauge",
+            "Conversation sessions held by the session store.",
+            [({"store": session_store.name}, session_store.stats()["size"])],
+        ),
+    ]
+
+
+@app.get("/metrics", tags=["Health"])
+async def metrics():
+    """Stage latency histograms, Groq calls + tokens, cache, fallback and error counts."""
+    body = await _run_blocking(REGISTRY.render)
+    return PlainTextResponse(body, media_type=METRICS_CONTENT_TYPE)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -558,18 +1177,49 @@ async def root():
 
 @app.get("/health", tags=["Health"])
 async def health_check():
-    count = vectorstore._collection.count()
+    async with _leased_generation() as generation:
+        count = await _run_blocking(generation.collection.count)
     return {
         "status": "healthy",
         "rag_type": "Advanced RAG (Hybrid Search + Re-ranking + Query Rewriting)",
         "chroma_documents": count,
-        "bm25_indexed": len(_all_docs),
+        "bm25_indexed": len(generation.bm25),
+        "index_generation": generation.name,
+        "index_version": generation.fingerprint,
+        "cache": {
+            "embeddings": embedding_cache.stats(),
+            "hybrid_results": hybrid_cache.stats(),
+        },
+        "sessions": await _run_blocking(session_store.stats),
         "llm_model_main": GROQ_MODEL,
         "llm_model_fast": GROQ_MODEL_FAST,
+        "reranker": reranker.name,
         "provider": "Groq",
     }
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# ADMIN
+# ─────────────────────────────────────────────────────────────────────────────
+
+@app.post("/admin/reload-index", tags=["Admin"])
+async def admin_reload_index(
+    force: bool = False, x_admin_token: Optional[str] = Header(default=None)
+):
+    """Swap to the latest published index generation now (no restart).
+
+    The same swap happens automatically within ``INDEX_WATCH_INTERVAL``
+    seconds of a publish; this endpoint is for pipelines that want it
+    immediately, or with the watcher turned off.
+    """
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    try:
+        return await _run_blocking(reload_index, force)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Index reload failed: {e}")
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # RUN WITH: uvicorn backend.main:app --reload --port 8000
 # ─────────────────────────────────────────────────────────────────────────────
@@ -0,0 +1,255 @@
+"""
+Audio Intel — Pipeline Metrics
+==============================
+Small, dependency-free counters and histograms for the RAG pipeline,
+rendered in the Prometheus text format (0.0.4) by ``GET /metrics``.
+
+    with span("bm25"):                 # → audiointel_stage_seconds{stage="bm25"}
+        hits = index.top_k(...)
+
+    FALLBACKS.inc(component="rewrite_query")
+
+``span`` also adds its duration to the current request's timings when
+``start_request_timings()`` was called for it (returned in ``debug``).
+Spans of one stage that run several times in a request (e.g. BM25 once per
+rewritten query, in parallel) are summed there.
+
+Cache statistics are read from the caches at scrape time (``collector``).
+"""
+
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterable
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class _Metric(ABC):
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Labels:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple((name, str(labels[name])) for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+            *self._samples(),
+        ]
+
+    @abstractmethod
+    def _samples(self) -> list[str]:
+        ...
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, *args, buckets: Iterable[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # labels → [per-bucket counts (non-cumulative), sum, count]
+        self._series: dict[Labels, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def _samples(self) -> list[str]:
+        lines = []
+        with self._lock:
+            items = sorted((k, (list(c), s, n)) for k, (c, s, n) in self._series.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = (("le", _format_value(bound)),)
+                lines.append(f"{self.name}_bucket{_format_labels(key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+# A collector returns ``[(name, type, help, [(labels dict, value), ...]), ...]``
+Collector = Callable[[], list[tuple[str, str, str, list[tuple[dict, float]]]]]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+        self._collectors: list[Collector] = []
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets=buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn: Collector) -> Collector:
+        """Register *fn*, called at every scrape for values owned elsewhere."""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        for fn in self._collectors:
+            for name, metric_type, documentation, samples in fn():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    key = tuple((k, str(v)) for k, v in labels.items())
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# ─────────────────────────────────────────────────────────────────────────────
+# PIPELINE METRICS
+# ─────────────────────────────────────────────────────────────────────────────
+STAGE_SECONDS = REGISTRY.histogram(
+    "audiointel_stage_seconds",
+    "Latency of each RAG pipeline stage in seconds.",
+    ("stage",),
+)
+REQUESTS = REGISTRY.counter(
+    "audiointel_requests_total", "Chat requests received.", ("endpoint",)
+)
+ERRORS = REGISTRY.counter(
+    "audiointel_errors_total", "Requests or background jobs that failed.", ("component",)
+)
+FALLBACKS = REGISTRY.counter(
+    "audiointel_fallbacks_total",
+    "Times a stage fell back to its degraded path (e.g. rewrite → original question).",
+    ("component",),
+)
+GROQ_REQUESTS = REGISTRY.counter(
+    "audiointel_groq_requests_total", "Groq API calls.", ("purpose", "model", "outcome")
+)
+GROQ_TOKENS = REGISTRY.counter(
+    "audiointel_groq_tokens_total",
+    "Tokens reported by Groq usage, by call purpose and kind (prompt | completion).",
+    ("purpose", "model", "kind"),
+)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# SPANS + PER-REQUEST TIMINGS
+# ─────────────────────────────────────────────────────────────────────────────
+_request_timings: ContextVar[dict | None] = ContextVar("request_timings", default=None)
+
+
+def start_request_timings() -> dict:
+    """Collect span durations (ms) for the current request into the returned dict.
+
+    Tasks and executor calls started afterwards share the dict (contextvars
+    are copied, the dict is not), so their spans land in it too.
+    """
+    timings: dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def observe(stage: str, seconds: float):
+    """Record a *stage* duration measured by the caller (see ``span``)."""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = round(timings.get(stage, 0.0) + seconds * 1000, 2)
+
+
+@contextmanager
+def span(stage: str):
+    """Time the block into ``audiointel_stage_seconds`` and the request timings."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+
+def record_groq_call(purpose: str, model: str, usage=None, ok: bool = True):
+    """Count a Groq call and the tokens in its ``usage`` (if reported)."""
+    GROQ_REQUESTS.inc(purpose=purpose, model=model, outcome="ok" if ok else "error")
+    if usage is None:
+        return
+    for kind in ("prompt", "completion"):
+        tokens = getattr(usage, f"{kind}_tokens", None)
+        if tokens:
+            GROQ_TOKENS.inc(tokens, purpose=purpose, model=model, kind=kind)
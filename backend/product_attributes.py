@@ -0,0 +1,121 @@
+"""
+Audio Intel — Product Attribute Helpers
+=======================================
+Keyword-based inference of the attributes the chat filters talk about
+(product type, connectivity, price), shared by re-ranking and retrieval.
+
+Values mirror the filter chips in ``frontend/chat.html``:
+    type          → headphone | tws | neckband | earphone
+    connectivity  → wired | wireless
+"""
+
+import re
+
+# Checked in order: the first type whose keywords appear wins, so the more
+# specific form factors come before the generic "headphone".
+TYPE_KEYWORDS: dict[str, tuple[str, ...]] = {
+    "tws": ("tws", "true wireless", "earbud", "earbuds", "airbuds", "buds"),
+    "neckband": ("neckband", "neck band"),
+    "earphone": ("earphone", "in-ear", "in ear", "iem", "earpod"),
+    "headphone": ("headphone", "headset", "over-ear", "on-ear", "over ear", "on ear"),
+}
+
+CONNECTIVITY_KEYWORDS: dict[str, tuple[str, ...]] = {
+    "wireless": ("wireless", "bluetooth", "tws", "true wireless", "2.4g"),
+    "wired": ("wired", "3.5mm", "3.5 mm", "aux", "type-c wired", "usb wired"),
+}
+
+USE_CASE_KEYWORDS: dict[str, tuple[str, ...]] = {
+    "gaming": ("gaming", "gamer", "rgb", "7.1", "surround"),
+    "music": ("bass", "hi-res", "hifi", "hi-fi", "music", "ldac", "aptx"),
+    "travel": ("anc", "noise cancel", "noise-cancel", "battery", "foldable", "portable"),
+    "studio": ("studio", "monitor", "professional", "open-back", "reference"),
+}
+
+# "1,600" / "16,900" / "349" — thousands groups are matched greedily, which
+# also splits the concatenated "discount+regular" strings StarTech yields
+# ("1,6003,250" → 1,600 and 3,250).
+_PRICE_RE = re.compile(r"\d{1,3}(?:,\d{3})+|\d+")
+MIN_PRICE = 50
+MAX_PRICE = 1_000_000
+
+
+def _contains(text: str, keywords: tuple[str, ...]) -> bool:
+    """Whole-word keyword match; a trailing plural "s" is allowed."""
+    return any(re.search(rf"(?<!\w){re.escape(kw)}s?(?!\w)", text) for kw in keywords)
+
+
+def infer_type(text: str) -> str | None:
+    """Best-guess product type from a name/description, or ``None``."""
+    text = text.lower()
+    for product_type, keywords in TYPE_KEYWORDS.items():
+        if _contains(text, keywords):
+            return product_type
+    return None
+
+
+def infer_connectivity(text: str) -> str | None:
+    """``"wireless"`` / ``"wired"`` from a name/description, or ``None``."""
+    text = text.lower()
+    # Wireless wins: most wireless products still mention a 3.5mm/AUX input
+    for connectivity, keywords in CONNECTIVITY_KEYWORDS.items():
+        if _contains(text, keywords):
+            return connectivity
+    return None
+
+
+def infer_brand(product_name: str | None) -> str | None:
+    """Brand as the lowercased first word of the product name."""
+    words = re.findall(r"[A-Za-z0-9][\w&-]*", product_name or "")
+    return words[0].lower() if words else None
+
+
+def matches_use_case(text: str, use_case: str) -> bool:
+    keywords = USE_CASE_KEYWORDS.get(use_case)
+    return bool(keywords) and _contains(text.lower(), keywords)
+
+
+def parse_price(text: str | None) -> int | None:
+    """First plausible taka amount in a scraped price string, else ``None``.
+
+    Placeholders such as "To be announced" and the hotline number Techland
+    shows instead of a price ("(+88) 09613828201") yield ``None``.
+    """
+    if not text or "+88" in text:
+        return None
+    for match in _PRICE_RE.findall(str(text)):
+        value = int(match.replace(",", ""))
+        if MIN_PRICE <= value <= MAX_PRICE:
+            return value
+    return None
+
+
+# ─── budget ──────────────────────────────────────────────────────────────────
+# The chat UI's budget slider reads "Around ৳X" and its top stop (10,000)
+# means "10,000+", i.e. no cap.
+BUDGET_UNCAPPED = 10_000
+BUDGET_TOLERANCE = 1.2   # "around" — allow 20% over the requested amount
+
+_QUERY_BUDGET_RE = re.compile(
+    r"(?:under|below|within|less than|upto|up to|max(?:imum)?|budget(?: of)?)"
+    r"\s*(?:tk\.?|bdt|৳)?\s*(\d[\d,]*)\s*(k)?",
+    re.IGNORECASE,
+)
+
+
+def budget_cap(budget: int | None) -> int | None:
+    """Highest acceptable price for a filter budget, or ``None`` for no cap."""
+    if budget is None or budget <= 0 or budget >= BUDGET_UNCAPPED:
+        return None
+    return int(budget * BUDGET_TOLERANCE)
+
+
+def query_budget(query: str) -> int | None:
+    """Budget stated in the query text ("under 3000", "below 5k"), if any."""
+    match = _QUERY_BUDGET_RE.search(query)
+    if not match:
+        return None
+    value = int(match.group(1).replace(",", ""))
+    if match.group(2):
+        value *= 1000
+    return value if MIN_PRICE <= value <= MAX_PRICE else None
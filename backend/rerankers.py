@@ -0,0 +1,331 @@
+"""
+Audio Intel — Re-rankers
+========================
+Pluggable stage ③ of the RAG pipeline. Every re-ranker takes the fused
+hybrid-search candidates and returns the *top_k* most relevant ones.
+
+    groq           — LLM judge on GROQ_MODEL_FAST (one network round-trip)
+    features       — CPU-only scorer: lexical overlap + type / connectivity /
+                     budget / brand / use-case matches against ChatFilters
+    cross-encoder  — local ONNX cross-encoder (optional sentence-transformers)
+    none           — no re-ranking: the first *top_k* in hybrid-search order
+
+Selected per deployment with the ``RERANKER`` environment variable. Local
+re-rankers score the whole candidate batch in one call on the retrieval
+executor, so they never block the event loop.
+"""
+
+import json
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable
+
+from langchain_core.documents import Document
+
+from backend.bm25 import tokenize
+from backend.metrics import FALLBACKS, record_groq_call
+from backend.product_attributes import (
+    budget_cap,
+    infer_connectivity,
+    infer_type,
+    matches_use_case,
+    parse_price,
+    query_budget,
+)
+
+RunBlocking = Callable[..., Awaitable]
+
+_STOPWORDS = {
+    "a", "an", "and", "best", "for", "good", "i", "in", "me", "my", "of",
+    "on", "or", "show", "some", "the", "to", "under", "want", "with",
+}
+
+
+def _describe(doc: Document, snippet: int = 200) -> str:
+    meta = doc.metadata
+    return (
+        f"{meta.get('product_name', 'N/A')} | "
+        f"Price: {meta.get('price') or 'N/A'} | "
+        f"Type: {meta.get('type', 'N/A')} | "
+        f"Connectivity: {meta.get('connectivity', 'N/A')}\n"
+        f"    {doc.page_content[:snippet]}"
+    )
+
+
+class Reranker(ABC):
+    """Interface: order *docs* by relevance to *query* and keep *top_k*."""
+
+    name = "base"
+
+    @abstractmethod
+    async def rerank(
+        self,
+        query: str,
+        docs: list[Document],
+        top_k: int = 5,
+        filters=None,
+        filter_text: str = "",
+    ) -> list[Document]:
+        ...
+
+
+# ──────────────── LLM JUDGE (Groq) ────────────────────────────────────────────
+
+RERANK_PROMPT = """\
+You are a relevance judge for an audio-products recommendation system.
+
+Given a user's QUERY and a list of CANDIDATE products, score each candidate's
+relevance to the query on a scale of 0-10 (10 = perfect match).
+
+Consider: product type match, connectivity match, budget fit, use-case match,
+brand preference, and how well the product description answers the query.
+
+Output ONLY a JSON array of objects: [{{"index": 0, "score": 8}}, ...]
+No explanation, just the JSON array.
+
+QUERY: {query}
+FILTERS: {filters}
+
+CANDIDATES:
+{candidates}
+"""
+
+
+class GroqReranker(Reranker):
+    """Use a fast LLM to score & re-rank the retrieved candidates."""
+
+    name = "groq"
+
+    def __init__(self, client, model: str):
+        self.client = client
+        self.model = model
+
+    async def rerank(self, query, docs, top_k=5, filters=None, filter_text=""):
+        if len(docs) <= top_k:
+            return docs
+
+        # Format candidates for the LLM
+        candidates_text = "".join(
+            f"[{i}] {_describe(doc)}\n\n" for i, doc in enumerate(docs)
+        )
+
+        try:
+            resp = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": RERANK_PROMPT.format(
+                            query=query,
+                            filters=filter_text,
+                            candidates=candidates_text,
+                        ),
+                    },
+                    {"role": "user", "content": "Score each candidate now."},
+                ],
+                temperature=0.0,
+                max_tokens=512,
+            )
+        except Exception:
+            record_groq_call("rerank", self.model, ok=False)
+            resp = None
+        else:
+            record_groq_call("rerank", self.model, resp.usage)
+
+        try:
+            raw = resp.choices[0].message.content.strip()
+            raw = re.sub(r"```json\s*", "", raw)
+            raw = re.sub(r"```\s*$", "", raw)
+            scores = json.loads(raw)
+
+            if isinstance(scores, list):
+                # Build index→score map
+                score_map = {}
+                for item in scores:
+                    if isinstance(item, dict) and "index" in item and "score" in item:
+                        score_map[item["index"]] = item["score"]
+
+                # Sort docs by score descending
+                indexed_docs = [(i, doc) for i, doc in enumerate(docs)]
+                indexed_docs.sort(
+                    key=lambda x: score_map.get(x[0], 0), reverse=True
+                )
+                return [doc for _, doc in indexed_docs[:top_k]]
+
+        except Exception:
+            pass
+
+        # Fallback: return first top_k (original RRF order)
+        FALLBACKS.inc(component="reranker")
+        return docs[:top_k]
+
+
+# ──────────────── LOCAL FEATURE SCORER ────────────────────────────────────────
+
+class FeatureReranker(Reranker):
+    """
+    Deterministic CPU scorer. Each candidate gets
+
+        lexical overlap with the query (product name weighted ×2)
+      + agreement of type / connectivity with the filters or the query text
+      + budget fit, brand match and use-case keywords
+
+    Ties keep the incoming RRF order, so with no signal the result equals
+    the hybrid-search ranking.
+    """
+
+    name = "features"
+
+    W_LEXICAL = 3.0
+    W_TYPE = 2.0
+    W_CONNECTIVITY = 1.5
+    W_BUDGET = 2.0
+    W_BRAND = 1.5
+    W_USE_CASE = 0.5
+
+    def __init__(self, run_blocking: RunBlocking):
+        self.run_blocking = run_blocking
+
+    async def rerank(self, query, docs, top_k=5, filters=None, filter_text=""):
+        if not docs:
+            return docs
+        scores = await self.run_blocking(self.score, query, docs, filters)
+        order = sorted(range(len(docs)), key=lambda i: (-scores[i], i))
+        return [docs[i] for i in order[:top_k]]
+
+    def score(self, query: str, docs: list[Document], filters=None) -> list[float]:
+        """Score a batch of candidates (pure function, safe to run in a thread)."""
+        wanted = self._wanted(query, filters)
+        q_tokens = {t for t in tokenize(query) if t not in _STOPWORDS}
+        return [self._score_one(doc, q_tokens, wanted) for doc in docs]
+
+    @staticmethod
+    def _wanted(query: str, filters) -> dict:
+        """Constraints from ChatFilters, falling back to what the query says."""
+        def chosen(value, default):
+            return value if value and value != default else None
+
+        product_type = chosen(getattr(filters, "product_type", None), "all")
+        connectivity = chosen(getattr(filters, "connectivity", None), "all")
+        return {
+            "type": product_type or infer_type(query),
+            "connectivity": connectivity or infer_connectivity(query),
+            "max_price": query_budget(query)
+            or budget_cap(getattr(filters, "budget", None)),
+            "brand": chosen(getattr(filters, "brand", None), "all"),
+            "use_case": chosen(getattr(filters, "use_case", None), "general"),
+        }
+
+    def _score_one(self, doc: Document, q_tokens: set[str], wanted: dict) -> float:
+        meta = doc.metadata
+        name = (meta.get("product_name") or "").lower()
+        text = f"{name}\n{doc.page_content.lower()}"
+        score = 0.0
+
+        if q_tokens:
+            name_hits = len(q_tokens & set(tokenize(name)))
+            text_hits = len(q_tokens & set(tokenize(doc.page_content)))
+            score += self.W_LEXICAL * (2 * name_hits + text_hits) / (3 * len(q_tokens))
+
+        for key, weight, infer in (
+            ("type", self.W_TYPE, infer_type),
+            ("connectivity", self.W_CONNECTIVITY, infer_connectivity),
+        ):
+            if wanted[key]:
+                actual = meta.get(key) or infer(name) or infer(text)
+                if actual:
+                    score += weight if actual == wanted[key] else -weight
+
+        if wanted["max_price"]:
+            price = meta.get("price_current") or parse_price(meta.get("price"))
+            if price:
+                over = (price - wanted["max_price"]) / wanted["max_price"]
+                score += self.W_BUDGET if over <= 0 else -self.W_BUDGET * min(over, 1.0)
+
+        if wanted["brand"] and wanted["brand"].lower() in name:
+            score += self.W_BRAND
+
+        if wanted["use_case"] and matches_use_case(text, wanted["use_case"]):
+            score += self.W_USE_CASE
+
+        return score
+
+
+# ──────────────── LOCAL CROSS-ENCODER (optional) ──────────────────────────────
+
+class CrossEncoderReranker(Reranker):
+    """
+    Small cross-encoder run on CPU through ONNX Runtime.
+
+    Needs the optional ``sentence-transformers[onnx]`` package; the model is
+    set with ``CROSS_ENCODER_MODEL`` and a quantised export can be picked
+    with ``CROSS_ENCODER_ONNX_FILE`` (e.g. ``onnx/model_qint8_avx512.onnx``).
+    """
+
+    name = "cross-encoder"
+
+    def __init__(self, run_blocking: RunBlocking, model_name: str, batch_size: int = 16):
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError as e:
+            raise RuntimeError(
+                "RERANKER=cross-encoder requires `pip install sentence-transformers[onnx]`"
+            ) from e
+
+        model_kwargs = {}
+        onnx_file = os.getenv("CROSS_ENCODER_ONNX_FILE")
+        if onnx_file:
+            model_kwargs["file_name"] = onnx_file
+        self.model = CrossEncoder(
+            model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs
+        )
+        self.batch_size = batch_size
+        self.run_blocking = run_blocking
+
+    async def rerank(self, query, docs, top_k=5, filters=None, filter_text=""):
+        if not docs:
+            return docs
+        pairs = [(query, _describe(doc, snippet=400)) for doc in docs]
+        scores = await self.run_blocking(
+            self.model.predict, pairs, batch_size=self.batch_size
+        )
+        order = sorted(range(len(docs)), key=lambda i: (-float(scores[i]), i))
+        return [docs[i] for i in order[:top_k]]
+
+
+# ──────────────── NO RE-RANKING ───────────────────────────────────────────────
+
+class PassthroughReranker(Reranker):
+    """Keep the RRF order (re-ranking off); the baseline the others must beat."""
+
+    name = "none"
+
+    async def rerank(self, query, docs, top_k=5, filters=None, filter_text=""):
+        return docs[:top_k]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# FACTORY
+# ─────────────────────────────────────────────────────────────────────────────
+RERANKERS = ("groq", "features", "cross-encoder", "none")
+
+
+def make_reranker(
+    name: str, *, groq_client, groq_model: str, run_blocking: RunBlocking
+) -> Reranker:
+    """Build the re-ranker selected by *name* (one of ``RERANKERS``)."""
+    if name == "groq":
+        return GroqReranker(groq_client, groq_model)
+    if name == "features":
+        return FeatureReranker(run_blocking)
+    if name == "cross-encoder":
+        return CrossEncoderReranker(
+            run_blocking,
+            model_name=os.getenv(
+                "CROSS_ENCODER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"
+            ),
+        )
+    if name == "none":
+        return PassthroughReranker()
+    raise ValueError(f"Unknown RERANKER '{name}', expected one of {RERANKERS}")
@@ -0,0 +1,206 @@
+"""
+Audio Intel — Conversation Sessions
+===================================
+Server-side chat state, so a client sends only its new message plus a
+``session_id`` instead of re-posting the whole conversation every turn.
+
+A session holds
+
+    summary   rolling summary of every turn folded out of ``turns``
+    turns     the most recent messages, verbatim
+
+The backend sends the generation model the summary plus at most
+``RECENT_MESSAGES`` verbatim messages, so the prompt stays the same size
+however long the chat runs. Older messages are folded into the summary
+after each reply (see ``fold_candidates`` / ``apply_fold``).
+
+Stores (``SESSION_STORE``):
+    memory   in-process LRU + TTL (default; lost on restart)
+    sqlite   a local SQLite file (``SESSION_DB``), shared by workers and
+             kept across restarts
+"""
+
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple, Protocol
+
+from backend.cache import TTLCache
+
+SESSION_TTL = float(os.getenv("SESSION_TTL", "86400"))          # idle seconds
+SESSION_MAX = int(os.getenv("SESSION_MAX", "10000"))            # sessions kept
+RECENT_MESSAGES = int(os.getenv("SESSION_RECENT_MESSAGES", "6"))  # verbatim, 3 exchanges
+SUMMARY_MAX_CHARS = int(os.getenv("SESSION_SUMMARY_MAX_CHARS", "1200"))
+SESSION_DB = os.getenv("SESSION_DB") or str(
+    Path(__file__).resolve().parent.parent / "sessions.sqlite3"
+)
+
+
+class Session(NamedTuple):
+    id: str
+    summary: str = ""
+    turns: tuple[dict, ...] = ()      # {"role": "user"|"assistant", "content": ...}
+    updated_at: float = 0.0
+
+    def recent(self, limit: int = RECENT_MESSAGES) -> list[dict]:
+        """The verbatim messages that go into prompts."""
+        return list(self.turns[-limit:]) if limit > 0 else []
+
+    def with_exchange(self, user: str, assistant: str) -> "Session":
+        turns = self.turns + (
+            {"role": "user", "content": user},
+            {"role": "assistant", "content": assistant},
+        )
+        return self._replace(turns=turns, updated_at=time.time())
+
+
+def new_session_id() -> str:
+    return secrets.token_urlsafe(16)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# ROLLING SUMMARY
+# ─────────────────────────────────────────────────────────────────────────────
+
+def fold_candidates(session: Session, keep: int = RECENT_MESSAGES) -> tuple[dict, ...]:
+    """Messages that have fallen out of the verbatim window and await folding."""
+    return session.turns[:-keep] if len(session.turns) > keep else ()
+
+
+def apply_fold(session: Session, folded: tuple[dict, ...], summary: str) -> Session | None:
+    """Replace *folded* (still the oldest turns) with the new *summary*.
+
+    Returns ``None`` if the session moved on meanwhile (e.g. it was
+    cleared), so the stale summary is dropped.
+    """
+    if not folded or session.turns[: len(folded)] != folded:
+        return None
+    return session._replace(
+        summary=summary[-SUMMARY_MAX_CHARS:], turns=session.turns[len(folded):]
+    )
+
+
+def extractive_summary(summary: str, messages: tuple[dict, ...]) -> str:
+    """Fallback when the summariser is unavailable: clipped message lines."""
+    lines = [summary] if summary else []
+    for msg in messages:
+        label = "User" if msg["role"] == "user" else "Assistant"
+        content = " ".join(msg["content"].split())
+        lines.append(f"{label}: {content[:150]}{'…' if len(content) > 150 else ''}")
+    # Newest lines win when the budget is exceeded
+    return "\n".join(lines)[-SUMMARY_MAX_CHARS:]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# STORES
+# ─────────────────────────────────────────────────────────────────────────────
+
+class SessionStore(Protocol):
+    name: str
+
+    def get(self, session_id: str) -> Session | None: ...
+    def save(self, session: Session) -> None: ...
+    def delete(self, session_id: str) -> None: ...
+    def stats(self) -> dict: ...
+
+
+class MemorySessionStore:
+    """In-process sessions: LRU-bounded by *maxsize*, expiring after *ttl* idle."""
+
+    name = "memory"
+
+    def __init__(self, maxsize: int = SESSION_MAX, ttl: float = SESSION_TTL):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, session_id: str) -> Session | None:
+        return self._cache.get(session_id)
+
+    def save(self, session: Session) -> None:
+        self._cache.set(session.id, session)     # also renews the TTL
+
+    def delete(self, session_id: str) -> None:
+        self._cache.delete(session_id)
+
+    def stats(self) -> dict:
+        return {"store": self.name, **self._cache.stats()}
+
+
+class SqliteSessionStore:
+    """Sessions in a local SQLite file; same LRU + TTL limits as the memory store."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str = SESSION_DB, maxsize: int = SESSION_MAX, ttl: float = SESSION_TTL):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, summary TEXT NOT NULL, turns TEXT NOT NULL, "
+            "updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Session | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, turns, updated_at FROM sessions WHERE id = ? AND updated_at > ?",
+                (session_id, time.time() - self.ttl),
+            ).fetchone()
+        if row is None:
+            return None
+        return Session(session_id, row[0], tuple(json.loads(row[1])), row[2])
+
+    def save(self, session: Session) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO sessions (id, summary, turns, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET summary = excluded.summary, "
+                "turns = excluded.turns, updated_at = excluded.updated_at",
+                (session.id, session.summary,
+                 json.dumps(session.turns, ensure_ascii=False), now),
+            )
+            # Expire idle sessions, then evict least recently used over the cap
+            self._conn.execute("DELETE FROM sessions WHERE updated_at <= ?", (now - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM sessions WHERE id IN (SELECT id FROM sessions "
+                "ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,),
+            )
+
+    def delete(self, session_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def stats(self) -> dict:
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()
+        return {"store": self.name, "size": size, "maxsize": self.maxsize, "ttl_seconds": self.ttl}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+SESSION_STORES = ("memory", "sqlite")
+
+
+def make_session_store(name: str | None = None) -> SessionStore:
+    """Session store selected by *name* (default: ``$SESSION_STORE`` or memory)."""
+    name = name or os.getenv("SESSION_STORE", "memory")
+    if name == "memory":
+        return MemorySessionStore()
+    if name == "sqlite":
+        return SqliteSessionStore()
+    raise ValueError(f"Unknown SESSION_STORE '{name}', expected one of {SESSION_STORES}")
@@ -0,0 +1,287 @@
+"""
+Retrieval + ranking benchmark
+=============================
+Replays a query set against the retrieval pipeline and reports, per stage,
+latency (mean / p50 / p95 / p99 / min / max, ms) and throughput (ops/s):
+
+    bm25              _bm25_search            (BM25 top-k + Chroma fetch)
+    semantic          _semantic_search        (query embedding + Chroma query)
+    rrf               reciprocal_rank_fusion  (over each query's result lists)
+    hybrid            hybrid_search           (semantic ‖ BM25 → RRF)
+    rerank:<name>     rerank_documents        (per --rerankers)
+
+Runs fully offline: the corpus is the committed ``*_products.json`` indexed
+into ``benchmarks/.fixture/`` (see fixtures.py), embeddings use the
+deterministic ``hash`` backend and Groq is a local mock with configurable
+latency. Caches are cleared before every call unless ``--warm-cache``.
+
+Write a report with ``--out``, then pass it as ``--baseline`` on another
+branch: the run exits with status 1 if any p95 regressed by more than
+``--max-regression``.
+
+Usage (from the repo root):
+    python benchmarks/bench_retrieval.py --out main.json
+    python benchmarks/bench_retrieval.py --baseline main.json --max-regression 0.2
+    python benchmarks/bench_retrieval.py --only bm25 rrf --repeat 20 --concurrency 4
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixtures import FIXTURE_DIR, REPO_ROOT, backend_env, build_fixture  # noqa: E402
+from mock_services import MockServices  # noqa: E402
+from stats import compare, latency_summary  # noqa: E402
+
+QUERIES_FILE = Path(__file__).resolve().parent / "queries.json"
+STAGES = ("bm25", "semantic", "rrf", "hybrid", "rerank")
+
+
+def load_queries(path: Path = QUERIES_FILE) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# RUNNER
+# ─────────────────────────────────────────────────────────────────────────────
+
+async def measure(op, items: list, repeat: int, warmup: int, concurrency: int) -> dict:
+    """Call ``await op(item)`` for every item, *repeat* times, and summarise.
+
+    *warmup* untimed passes run first. Up to *concurrency* calls are in
+    flight at once; each latency covers its own call only.
+    """
+    for _ in range(warmup):
+        for item in items:
+            await op(item)
+
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed(item):
+        async with semaphore:
+            start = time.perf_counter()
+            await op(item)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(timed(item) for _ in range(repeat) for item in items))
+    return latency_summary(latencies, time.perf_counter() - start)
+
+
+async def run(args, backend) -> dict:
+    queries = load_queries(Path(args.queries))
+    cases = []
+    for entry in queries:
+        filters = backend.ChatFilters(**entry.get("filters", {}))
+        cases.append({
+            "query": entry["query"],
+            "filters": filters,
+            "filter_text": backend._build_filter_text(filters),
+            "metadata_filter": backend.MetadataFilter.from_chat_filters(filters),
+        })
+
+    generation = backend._generation()
+
+    def clear_caches():
+        if not args.warm_cache:
+            backend.embedding_cache.clear()
+            backend.hybrid_cache.clear()
+
+    # Sync stages run on the retrieval executor, as hybrid_search runs them
+    async def bm25(case):
+        await backend._run_blocking(
+            backend._bm25_search, case["query"], k=args.k_per_query,
+            metadata_filter=case["metadata_filter"], generation=generation,
+        )
+
+    async def semantic(case):
+        clear_caches()
+        await backend._run_blocking(
+            backend._semantic_search, case["query"], k=args.k_per_query,
+            metadata_filter=case["metadata_filter"], generation=generation,
+        )
+
+    async def rrf(case):
+        await backend._run_blocking(backend.reciprocal_rank_fusion, case["result_lists"])
+
+    async def hybrid(case):
+        clear_caches()
+        await backend.hybrid_search(
+            [case["query"]], k_per_query=args.k_per_query, final_k=args.final_k,
+            metadata_filter=case["metadata_filter"],
+        )
+
+    # Inputs of the later stages, computed once so they are not re-timed
+    for case in cases:
+        case["result_lists"] = [
+            backend._semantic_search(
+                case["query"], k=args.k_per_query,
+                metadata_filter=case["metadata_filter"], generation=generation,
+            ),
+            backend._bm25_search(
+                case["query"], k=args.k_per_query,
+                metadata_filter=case["metadata_filter"], generation=generation,
+            ),
+        ]
+        case["candidates"] = backend.reciprocal_rank_fusion(case["result_lists"])[: args.final_k]
+
+    benchmarks = {"bm25": bm25, "semantic": semantic, "rrf": rrf, "hybrid": hybrid}
+    results = {}
+    for name, op in benchmarks.items():
+        if name not in args.only:
+            continue
+        print(f"⏱  {name} ...")
+        results[name] = await measure(op, cases, args.repeat, args.warmup, args.concurrency)
+
+    if "rerank" in args.only:
+        default_reranker = backend.reranker
+        try:
+            for reranker_name in args.rerankers:
+                backend.reranker = backend.make_reranker(
+                    reranker_name,
+                    groq_client=backend.groq_client,
+                    groq_model=backend.GROQ_MODEL_FAST,
+                    run_blocking=backend._run_blocking,
+                )
+
+                async def rerank(case):
+                    await backend.rerank_documents(
+                        query=case["query"], filter_text=case["filter_text"],
+                        docs=case["candidates"], top_k=args.top_k, filters=case["filters"],
+                    )
+
+                print(f"⏱  rerank:{reranker_name} ...")
+                results[f"rerank:{reranker_name}"] = await measure(
+                    rerank, cases, args.repeat, args.warmup, args.concurrency
+                )
+        finally:
+            backend.reranker = default_reranker
+
+    return {
+        "queries": len(cases),
+        "corpus_chunks": len(generation.bm25),
+        "benchmarks": results,
+    }
+
+
+def _print_table(results: dict):
+    print(
+        f"\n{'benchmark':<20}{'n':>6}{'mean ms':>10}{'p50 ms':>10}"
+        f"{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>10}"
+    )
+    for name, s in results.items():
+        print(
+            f"{name:<20}{s['n']:>6}{s['mean_ms']:>10.2f}{s['p50_ms']:>10.2f}"
+            f"{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}{s['ops_per_sec']!s:>10}"
+        )
+
+
+def _print_comparison(rows: list[dict], max_regression: float) -> bool:
+    print(f"\n{'benchmark':<20}{'base p95':>10}{'p95':>10}{'change':>9}")
+    for row in rows:
+        flag = "  ✖ regression" if row["regressed"] else ""
+        print(
+            f"{row['benchmark']:<20}{row['baseline']:>10.2f}{row['current']:>10.2f}"
+            f"{row['change']:>+9.1%}{flag}"
+        )
+    regressed = [r["benchmark"] for r in rows if r["regressed"]]
+    if regressed:
+        print(f"\n✖ p95 regressed by more than {max_regression:.0%}: {', '.join(regressed)}")
+    else:
+        print(f"\n✅ No p95 regression above {max_regression:.0%}")
+    return bool(regressed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--queries", default=str(QUERIES_FILE))
+    parser.add_argument("--only", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--rerankers", nargs="+", default=["groq", "features"])
+    parser.add_argument("--repeat", type=int, default=5, help="timed passes over the query set")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed passes first")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--warm-cache", action="store_true", help="keep query caches between calls")
+    parser.add_argument("--k-per-query", type=int, default=10)
+    parser.add_argument("--final-k", type=int, default=15)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--groq-latency-ms", type=float, default=150.0)
+    parser.add_argument("--groq-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rebuild-fixture", action="store_true")
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--baseline", help="JSON report to compare p95 against")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="allowed p95 increase over the baseline (0.2 = +20%%)")
+    args = parser.parse_args()
+
+    corpus = build_fixture(force=args.rebuild_fixture)
+
+    with MockServices(
+        groq_latency_ms=args.groq_latency_ms, groq_jitter_ms=args.groq_jitter_ms
+    ) as mock:
+        backend_env(mock.url)
+        from backend import main as backend
+
+        started = datetime.now(timezone.utc)
+        data = asyncio.run(run(args, backend))
+        groq_calls = dict(mock.calls)
+
+    report = {
+        "meta": {
+            "started_at": started.isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "fixture": str(FIXTURE_DIR),
+            "corpus": {**corpus, "chunks": data["corpus_chunks"]},
+            "queries": data["queries"],
+            "groq_calls": groq_calls,
+            "config": {
+                key: value for key, value in vars(args).items()
+                if key not in ("out", "baseline", "rebuild_fixture")
+            },
+        },
+        "benchmarks": data["benchmarks"],
+    }
+    _print_table(report["benchmarks"])
+
+    regressed = False
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        rows = compare(report["benchmarks"], baseline["benchmarks"], args.max_regression)
+        report["comparison"] = {
+            "baseline": args.baseline,
+            "baseline_commit": baseline.get("meta", {}).get("git_commit"),
+            "max_regression": args.max_regression,
+            "rows": rows,
+        }
+        regressed = _print_comparison(rows, args.max_regression)
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        print(f"\n💾 Report written to {args.out}")
+
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
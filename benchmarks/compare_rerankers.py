@@ -0,0 +1,172 @@
+"""
+Re-ranker comparison harness
+============================
+Runs the same hybrid-search candidates through several re-rankers and
+reports, per re-ranker:
+
+    • latency (mean / p50 / p95, ms)
+    • agreement with a reference re-ranker (overlap@k, top-1 match)
+    • constraint satisfaction: share of returned products whose type,
+      connectivity and price agree with what the query / filters ask for
+
+Needs the same environment as the backend (Chroma index, Ollama, and a
+GROQ_API_KEY when the ``groq`` re-ranker is included).
+
+Usage (from the repo root):
+    python benchmarks/compare_rerankers.py
+    python benchmarks/compare_rerankers.py --rerankers groq features --out rerank.json
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from backend import main as backend  # noqa: E402
+from backend.product_attributes import (  # noqa: E402
+    budget_cap,
+    infer_connectivity,
+    infer_type,
+    parse_price,
+    query_budget,
+)
+from backend.rerankers import make_reranker  # noqa: E402
+from stats import percentile  # noqa: E402
+
+# (query, ChatFilters kwargs)
+QUERIES = [
+    ("best budget TWS under 3000", {}),
+    ("wireless headphones with ANC for travel", {}),
+    ("gaming headset with RGB and mic", {"use_case": "gaming"}),
+    ("wired earphones under 500", {"connectivity": "wired"}),
+    ("neckband with long battery life", {"product_type": "neckband"}),
+    ("studio monitor headphones", {"use_case": "studio"}),
+    ("JBL bluetooth headphones", {"brand": "JBL"}),
+    ("sony earbuds", {"product_type": "tws", "budget": 8000}),
+    ("cheap headphones for kids", {"budget": 1500}),
+    ("open ear sports headphones", {"connectivity": "wireless"}),
+]
+
+
+def _constraints(query: str, filters) -> dict:
+    """What the query / filters ask for, derived here rather than taken from
+    any re-ranker, so no re-ranker is graded against its own reading."""
+    product_type = filters.product_type if filters.product_type != "all" else None
+    connectivity = filters.connectivity if filters.connectivity != "all" else None
+    return {
+        "type": product_type or infer_type(query),
+        "connectivity": connectivity or infer_connectivity(query),
+        "max_price": budget_cap(filters.budget) or query_budget(query),
+    }
+
+
+def _satisfies(doc, wanted: dict) -> bool:
+    meta = doc.metadata
+    text = f"{meta.get('product_name', '')}\n{doc.page_content}"
+    for key, infer in (("type", infer_type), ("connectivity", infer_connectivity)):
+        actual = meta.get(key) or infer(text)
+        if wanted[key] and actual and actual != wanted[key]:
+            return False
+    price = meta.get("price_current") or parse_price(meta.get("price"))
+    if wanted["max_price"] and price and price > wanted["max_price"]:
+        return False
+    return True
+
+
+async def run(args) -> dict:
+    rerankers = {}
+    for name in args.rerankers:
+        try:
+            rerankers[name] = make_reranker(
+                name,
+                groq_client=backend.groq_client,
+                groq_model=backend.GROQ_MODEL_FAST,
+                run_blocking=backend._run_blocking,
+            )
+        except RuntimeError as e:
+            print(f"⚠  skipping {name}: {e}")
+
+    per_reranker = {name: {"latency_ms": [], "results": []} for name in rerankers}
+    satisfied = {name: [] for name in rerankers}
+
+    for query, filter_kwargs in QUERIES:
+        filters = backend.ChatFilters(**filter_kwargs)
+        filter_text = backend._build_filter_text(filters)
+        candidates = await backend.hybrid_search(
+            [query], k_per_query=args.k_per_query, final_k=args.final_k
+        )
+        wanted = _constraints(query, filters)
+
+        for name, reranker in rerankers.items():
+            start = time.perf_counter()
+            top = await reranker.rerank(
+                query, candidates, top_k=args.top_k,
+                filters=filters, filter_text=filter_text,
+            )
+            per_reranker[name]["latency_ms"].append((time.perf_counter() - start) * 1000)
+            per_reranker[name]["results"].append(
+                [d.metadata.get("product_name") for d in top]
+            )
+            satisfied[name].extend(_satisfies(d, wanted) for d in top)
+
+    reference = per_reranker.get(args.reference)
+    report = {"queries": [q for q, _ in QUERIES], "top_k": args.top_k, "rerankers": {}}
+    for name, data in per_reranker.items():
+        lat = data["latency_ms"]
+        entry = {
+            "latency_ms": {
+                "mean": round(statistics.fmean(lat), 2),
+                "p50": round(percentile(lat, 50), 2),
+                "p95": round(percentile(lat, 95), 2),
+            },
+            "constraint_satisfaction": round(
+                sum(satisfied[name]) / max(1, len(satisfied[name])), 3
+            ),
+            "results": data["results"],
+        }
+        if reference:
+            overlaps, top1 = [], []
+            for mine, ref in zip(data["results"], reference["results"]):
+                overlaps.append(len(set(mine) & set(ref)) / max(1, len(ref)))
+                top1.append(bool(mine) and bool(ref) and mine[0] == ref[0])
+            entry[f"overlap@{args.top_k}_vs_{args.reference}"] = round(
+                statistics.fmean(overlaps), 3
+            )
+            entry[f"top1_match_vs_{args.reference}"] = round(statistics.fmean(top1), 3)
+        report["rerankers"][name] = entry
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rerankers", nargs="+", default=["groq", "features"])
+    parser.add_argument("--reference", default="groq")
+    parser.add_argument("--k-per-query", type=int, default=10)
+    parser.add_argument("--final-k", type=int, default=15)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--out", help="write the JSON report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+
+    print(f"\n{'reranker':<15}{'mean ms':>10}{'p95 ms':>10}{'constraints':>13}{'overlap':>10}")
+    for name, entry in report["rerankers"].items():
+        overlap = entry.get(f"overlap@{args.top_k}_vs_{args.reference}", "-")
+        print(
+            f"{name:<15}{entry['latency_ms']['mean']:>10}{entry['latency_ms']['p95']:>10}"
+            f"{entry['constraint_satisfaction']:>13}{overlap!s:>10}"
+        )
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        print(f"\n💾 Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Retrieval quality evaluation
+============================
+Scores retrieval configurations against a labeled query set
+(``eval_set.json``) and reports quality next to latency, so speed-ups can
+be picked on a cost / quality frontier instead of by guesswork:
+
+    candidate_recall           share of *all* relevant products among the
+                               fused candidates (uncapped, so comparable
+                               across final_k), with the candidate count
+    recall@top_k               … among the final results (capped recall)
+    mrr                        1 / rank of the first relevant result
+    ndcg@top_k                 graded ranking quality of the final results
+    latency                    retrieval + re-ranking per query (ms)
+
+Configurations are the cross product of ``--k-per-query``, ``--final-k``,
+``--rrf-k`` and ``--rerankers`` (``none`` = re-ranking off). Queries go in
+as typed, without the LLM rewrite, through ``hybrid_search`` with the
+query's filters pushed down, exactly like stage ② of ``/chat``.
+
+Labels are drawn from the catalogs by ``--label``: each query has a
+``judge`` of term groups matched against the raw product name, specs and
+description, independently of the inferred brand / type / connectivity
+attributes that the filters push down and the re-rankers score (so the
+eval catches regressions in those inferences). A product is relevant when
+
+    • no ``none`` term is in its name (e.g. "neckband" for headphones)
+    • the first ``all`` group (brand or product kind) is in its name
+    • every other ``all`` group is in its name (grade 2), or at least in
+      its specs or description (grade 1)
+
+Each group lists alternatives (``["bluetooth", "wireless"]``). Hand-picked
+``include`` / ``exclude`` lists (a product_id or any offer URL) override the
+judge. Labels are keyed on the merged catalog's stable ``product_id``, not
+the headline URL, which moves with the cheapest offer. Re-label after
+changing a judge or the committed ``*_products.json``.
+
+Runs offline on the benchmark fixture (see fixtures.py). The ``groq``
+re-ranker then talks to the mock, which keeps the RRF order, so its
+numbers are only meaningful with ``--live-groq`` (real API, GROQ_API_KEY).
+
+Usage (from the repo root):
+    python benchmarks/eval_retrieval.py --label
+    python benchmarks/eval_retrieval.py --out quality.json
+    python benchmarks/eval_retrieval.py --k-per-query 5 10 20 --final-k 10 15 30 --rrf-k 10 60
+"""
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import re
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixtures import FIXTURE_DIR, backend_env, build_fixture  # noqa: E402
+from mock_services import MockServices  # noqa: E402
+from stats import latency_summary, ndcg_at_k, recall, recall_at_k, reciprocal_rank  # noqa: E402
+
+EVAL_SET_FILE = Path(__file__).resolve().parent / "eval_set.json"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# LABELING
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _has_term(terms: list[str], text: str) -> bool:
+    return any(
+        re.search(rf"(?<!\w){re.escape(t)}(?!\w)", text, re.IGNORECASE) for t in terms
+    )
+
+
+def judge_product(judge: dict, product: dict) -> int:
+    """Relevance grade (0–2) of a merged catalog record for one query."""
+    keys = {product["product_id"], *(o.get("url") for o in product.get("offers", ()))}
+    if keys & set(judge.get("exclude", ())):
+        return 0
+    if keys & set(judge.get("include", ())):
+        return 2
+
+    name = product["product_name"]
+    if _has_term(judge.get("none", []), name):
+        return 0
+    identity, *groups = judge["all"]
+    if not _has_term(identity, name):
+        return 0
+    if all(_has_term(terms, name) for terms in groups):
+        return 2
+    specs = " ".join(f"{k} {v}" for k, v in (product.get("specs") or {}).items())
+    details = f"{name} {specs} {product.get('description') or ''}"
+    if all(_has_term(terms, details) for terms in groups):
+        return 1
+    return 0
+
+
+def label(eval_set: list[dict], catalog: Path) -> list[dict]:
+    """Recompute every query's ``relevant`` labels from its judge."""
+    with open(catalog, encoding="utf-8") as f:
+        products = [json.loads(line) for line in f if line.strip()]
+    for entry in eval_set:
+        grades = {p["product_id"]: judge_product(entry["judge"], p) for p in products}
+        entry["relevant"] = {pid: g for pid, g in sorted(grades.items()) if g > 0}
+        graded = sorted(entry["relevant"].values())
+        print(
+            f"  {entry['query']:<45} {len(graded):>4} relevant "
+            f"({graded.count(2)} × grade 2)"
+        )
+        if not graded:
+            print("    ⚠  no relevant products — loosen the judge")
+    return eval_set
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# EVALUATION
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _product_ids(docs) -> list[str]:
+    """Ranked product ids (first occurrence wins)."""
+    seen: dict[str, None] = {}
+    for doc in docs:
+        seen.setdefault(doc.metadata.get("product_id") or doc.metadata.get("product_name", ""))
+    return list(seen)
+
+
+def pareto_frontier(configs: list[dict], quality: str = "ndcg", cost: str = "p95_ms") -> None:
+    """Mark configs no other config beats on both quality and p95 latency."""
+    for c in configs:
+        q, t = c["quality"][quality], c["latency"][cost]
+        c["frontier"] = not any(
+            o["quality"][quality] >= q and o["latency"][cost] <= t
+            and (o["quality"][quality] > q or o["latency"][cost] < t)
+            for o in configs
+        )
+
+
+async def run(args, backend, eval_set: list[dict]) -> list[dict]:
+    cases = []
+    for entry in eval_set:
+        filters = backend.ChatFilters(**entry.get("filters", {}))
+        cases.append({
+            "query": entry["query"],
+            "relevant": entry["relevant"],
+            "filters": filters,
+            "filter_text": backend._build_filter_text(filters),
+            "metadata_filter": backend.MetadataFilter.from_chat_filters(filters),
+        })
+
+    rerankers = {}
+    for name in args.rerankers:
+        try:
+            rerankers[name] = backend.make_reranker(
+                name,
+                groq_client=backend.groq_client,
+                groq_model=backend.GROQ_MODEL_FAST,
+                run_blocking=backend._run_blocking,
+            )
+        except RuntimeError as e:
+            print(f"⚠  skipping {name}: {e}")
+
+    results = []
+    grid = itertools.product(args.k_per_query, args.final_k, args.rrf_k, rerankers)
+    for k_per_query, final_k, rrf_k, reranker_name in grid:
+        reranker = rerankers[reranker_name]
+        scores = {"candidate_recall": [], "recall": [], "mrr": [], "ndcg": []}
+        latencies, rerank_latencies, candidate_counts, per_query = [], [], [], []
+        started = time.perf_counter()
+        for case in cases:
+            if not args.warm_cache:
+                backend.embedding_cache.clear()
+                backend.hybrid_cache.clear()
+            start = time.perf_counter()
+            candidates = await backend.hybrid_search(
+                [case["query"]], k_per_query=k_per_query, final_k=final_k,
+                metadata_filter=case["metadata_filter"], rrf_k=rrf_k,
+            )
+            reranked = time.perf_counter()
+            top = await reranker.rerank(
+                case["query"], candidates, top_k=args.top_k,
+                filters=case["filters"], filter_text=case["filter_text"],
+            )
+            end = time.perf_counter()
+            latencies.append((end - start) * 1000)
+            rerank_latencies.append((end - reranked) * 1000)
+
+            relevant = case["relevant"]
+            ranked = _product_ids(top)
+            candidate_ids = _product_ids(candidates)
+            candidate_counts.append(len(candidate_ids))
+            query_scores = {
+                "candidate_recall": recall(candidate_ids, relevant),
+                "recall": recall_at_k(ranked, relevant, args.top_k),
+                "mrr": reciprocal_rank(ranked, relevant),
+                "ndcg": ndcg_at_k(ranked, relevant, args.top_k),
+            }
+            for metric, value in query_scores.items():
+                scores[metric].append(value)
+            per_query.append({
+                "query": case["query"],
+                "candidates": len(candidate_ids),
+                **{m: round(v, 3) for m, v in query_scores.items()},
+            })
+
+        config = {
+            "k_per_query": k_per_query, "final_k": final_k,
+            "rrf_k": rrf_k, "reranker": reranker_name,
+        }
+        quality = {m: round(statistics.fmean(v), 4) for m, v in scores.items()}
+        results.append({
+            "config": config,
+            "quality": quality,
+            "candidates": round(statistics.fmean(candidate_counts), 1),
+            "latency": latency_summary(latencies, time.perf_counter() - started),
+            "rerank_latency": latency_summary(rerank_latencies, sum(rerank_latencies) / 1000),
+            "per_query": per_query,
+        })
+        print(
+            f"  k/q={k_per_query:<3} final={final_k:<3} rrf={rrf_k:<3} {reranker_name:<14}"
+            f" nDCG {quality['ndcg']:.3f}"
+        )
+
+    pareto_frontier(results)
+    return results
+
+
+def _print_table(results: list[dict], top_k: int):
+    print(
+        f"\n{'k/q':>4}{'final':>6}{'rrf':>5}  {'reranker':<14}{'cands':>7}{'cand R':>8}"
+        f"{f'R@{top_k}':>7}{'MRR':>7}{f'nDCG@{top_k}':>9}{'p50 ms':>9}{'p95 ms':>9}"
+    )
+    for r in sorted(results, key=lambda r: -r["quality"]["ndcg"]):
+        c, q, lat = r["config"], r["quality"], r["latency"]
+        flag = "  ◆" if r["frontier"] else ""
+        print(
+            f"{c['k_per_query']:>4}{c['final_k']:>6}{c['rrf_k']:>5}  {c['reranker']:<14}"
+            f"{r['candidates']:>7.1f}{q['candidate_recall']:>8.3f}{q['recall']:>7.3f}{q['mrr']:>7.3f}{q['ndcg']:>9.3f}"
+            f"{lat['p50_ms']:>9.1f}{lat['p95_ms']:>9.1f}{flag}"
+        )
+    print("\n◆ = on the nDCG / p95-latency frontier")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--eval-set", default=str(EVAL_SET_FILE))
+    parser.add_argument("--label", action="store_true",
+                        help="recompute the labels from each query's judge and exit")
+    parser.add_argument("--k-per-query", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--final-k", type=int, nargs="+", default=[10, 15, 30])
+    parser.add_argument("--rrf-k", type=int, nargs="+", default=[60])
+    parser.add_argument("--rerankers", nargs="+", default=["none", "features"])
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--warm-cache", action="store_true", help="keep query caches between calls")
+    parser.add_argument("--groq-latency-ms", type=float, default=150.0)
+    parser.add_argument("--live-groq", action="store_true",
+                        help="use the real Groq API instead of the mock")
+    parser.add_argument("--rebuild-fixture", action="store_true")
+    parser.add_argument("--out", help="write the JSON report here")
+    args = parser.parse_args()
+
+    eval_path = Path(args.eval_set)
+    eval_set = json.loads(eval_path.read_text(encoding="utf-8"))
+    corpus = build_fixture(force=args.rebuild_fixture)
+
+    if args.label:
+        print(f"🏷  Labeling {len(eval_set)} queries from {FIXTURE_DIR / 'products.jsonl'}")
+        label(eval_set, FIXTURE_DIR / "products.jsonl")
+        eval_path.write_text(json.dumps(eval_set, indent=2, ensure_ascii=False) + "\n", "utf-8")
+        print(f"💾 Labels written to {eval_path}")
+        return
+
+    unlabeled = [e["query"] for e in eval_set if not e.get("relevant")]
+    if unlabeled:
+        sys.exit(f"✖ No labels for {len(unlabeled)} queries (run with --label): {unlabeled}")
+
+    mock = (
+        contextlib.nullcontext()
+        if args.live_groq
+        else MockServices(groq_latency_ms=args.groq_latency_ms)
+    )
+    with mock:
+        backend_env(None if args.live_groq else mock.url)
+        from backend import main as backend
+
+        started = datetime.now(timezone.utc)
+        print(f"📏 Evaluating {len(eval_set)} queries ...")
+        results = asyncio.run(run(args, backend, eval_set))
+
+    _print_table(results, args.top_k)
+    if args.out:
+        report = {
+            "meta": {
+                "started_at": started.isoformat(timespec="seconds"),
+                "eval_set": str(eval_path),
+                "queries": len(eval_set),
+                "corpus": corpus,
+                "top_k": args.top_k,
+                "warm_cache": args.warm_cache,
+                "groq": "live" if args.live_groq else f"mock ({args.groq_latency_ms:.0f} ms)",
+            },
+            "configs": results,
+        }
+        Path(args.out).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        print(f"\n💾 Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark fixtures
+==================
+A self-contained corpus and environment, so benchmarks and load tests run
+offline and give comparable numbers from one checkout to the next:
+
+    • the committed ``<site>_products.json`` files are normalised, merged
+      and indexed into ``benchmarks/.fixture/`` by the real pipeline code
+      (``normalize_file`` → ``merge_products`` → ``embeddding/embedder.py``)
+    • embeddings come from the deterministic ``hash`` backend, not Ollama
+    • Groq is pointed at ``benchmarks/mock_services.py``
+
+The fixture is rebuilt only when the source files or the pipeline code
+change. Call
+``backend_env()`` *before* importing ``backend.main``: the backend reads its
+configuration at import time.
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from normalize.merge_products import merge_products  # noqa: E402
+from normalize.normalize_products import normalize_file, normalized_path  # noqa: E402
+
+SITES = ["pickaboo", "startech", "techland"]
+FIXTURE_DIR = Path(os.getenv("BENCH_FIXTURE_DIR") or REPO_ROOT / "benchmarks" / ".fixture")
+EMBEDDER_SCRIPT = REPO_ROOT / "embeddding" / "embedder.py"
+SOURCE_FILE = "SOURCE"      # fingerprint of the inputs the fixture was built from
+# Pipeline code whose output lands in the fixture: a change rebuilds it
+PIPELINE_FILES = [
+    REPO_ROOT / "normalize" / "normalize_products.py",
+    REPO_ROOT / "normalize" / "merge_products.py",
+    EMBEDDER_SCRIPT,
+]
+
+
+def _source_files() -> list[Path]:
+    return [p for site in SITES if (p := REPO_ROOT / f"{site}_products.json").exists()]
+
+
+def _fingerprint(paths: list[Path]) -> str:
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def build_fixture(fixture_dir: Path = FIXTURE_DIR, force: bool = False) -> dict:
+    """Normalise, merge and index the committed catalogs into *fixture_dir*.
+
+    Returns corpus stats; skips all work when the fixture is up to date.
+    """
+    sources = _source_files()
+    if not sources:
+        raise FileNotFoundError(f"No *_products.json files found in {REPO_ROOT}")
+    fingerprint = _fingerprint(sources + PIPELINE_FILES)
+    stamp = fixture_dir / SOURCE_FILE
+
+    if not force and stamp.exists():
+        stats = json.loads(stamp.read_text("utf-8"))
+        if stats.get("fingerprint") == fingerprint:
+            return stats
+
+    fixture_dir.mkdir(parents=True, exist_ok=True)
+    print(f"🔧 Building benchmark fixture in {fixture_dir} ...")
+    normalized = []
+    records = 0
+    unpriced = {}
+    for source in sources:
+        output = fixture_dir / Path(normalized_path(source.name)).name
+        counts = normalize_file(str(source), str(output))
+        records += counts["products"]
+        unpriced[source.name.removesuffix("_products.json")] = counts["unpriced"]
+        normalized.append(str(output))
+    merged = merge_products(normalized, str(fixture_dir / "products.jsonl"))
+
+    subprocess.run(
+        [sys.executable, str(EMBEDDER_SCRIPT)],
+        cwd=fixture_dir,
+        env={**os.environ, **_index_env(fixture_dir)},
+        check=True,
+    )
+
+    stats = {
+        "fingerprint": fingerprint,
+        "sources": [p.name for p in sources],
+        "records": records,
+        "unpriced": unpriced,
+        "products": merged["products"],
+    }
+    stamp.write_text(json.dumps(stats, indent=2), "utf-8")
+    print(f"✅ Fixture ready — {records} records → {merged['products']} products.")
+    if any(unpriced.values()):
+        print(f"⚠  Records without a price, per site: {unpriced}")
+    return stats
+
+
+def _index_env(fixture_dir: Path) -> dict[str, str]:
+    return {"EMBEDDINGS": "hash", "INDEX_ROOT": str(fixture_dir / "indexes")}
+
+
+def backend_env(groq_url: str | None, fixture_dir: Path = FIXTURE_DIR, **overrides: str):
+    """Point the backend at the fixture index and the mock Groq server.
+
+    With *groq_url* ``None`` the real Groq API (``GROQ_API_KEY``) is used.
+    Explicit variables win over ``.env`` (``load_dotenv`` does not override).
+    """
+    groq = {"GROQ_API_KEY": "bench", "GROQ_BASE_URL": groq_url} if groq_url else {}
+    os.environ.update({
+        **_index_env(fixture_dir),
+        **groq,
+        "INDEX_WATCH_INTERVAL": "0",
+        "SESSION_STORE": "memory",
+        **overrides,
+    })
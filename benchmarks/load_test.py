@@ -0,0 +1,318 @@
+"""
+Chat load test
+==============
+Drives ``/chat`` or ``/chat/stream`` of one uvicorn worker with simulated
+users holding multi-turn conversations (``conversations.json``), stepping
+through a list of concurrency levels. Reports, per level:
+
+    • throughput (completed chats / s) and error rate
+    • latency mean / p50 / p95 / p99 (ms), and time to first token when
+      streaming; together the levels form the throughput and latency curves
+
+By default everything runs offline: the harness starts the mock Groq +
+Ollama server (mock_services.py) and a backend worker on the benchmark
+fixture index (fixtures.py), with injectable latency and failure rates.
+``--url`` targets an already running backend instead.
+
+Each user picks a conversation, sends its turns one after another (with the
+``session_id`` from the previous reply, or re-posting the whole ``history``
+with ``--history client``) and starts a new conversation when done.
+
+Usage (from the repo root):
+    python benchmarks/load_test.py --concurrency 1 2 4 8 16 --duration 20
+    python benchmarks/load_test.py --endpoint stream --groq-latency-ms 400 --out stream.json
+    python benchmarks/load_test.py --groq-failure-rate 0.05 --embed-failure-rate 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixtures import REPO_ROOT, backend_env, build_fixture  # noqa: E402
+from mock_services import free_port  # noqa: E402
+from stats import latency_summary  # noqa: E402
+
+CONVERSATIONS_FILE = Path(__file__).resolve().parent / "conversations.json"
+ENDPOINTS = {"chat": "/chat", "stream": "/chat/stream"}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# LOCAL SERVERS
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _wait_for(name: str, url: str, proc: subprocess.Popen, timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{name} exited with code {proc.returncode}")
+        try:
+            if httpx.get(url, timeout=2).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"{name} not ready at {url} within {timeout:.0f}s")
+
+
+def start_servers(args) -> tuple[str, list[subprocess.Popen]]:
+    """Mock services + one backend worker on free ports; returns the backend URL."""
+    build_fixture()
+
+    mock_port = free_port()
+    mock = subprocess.Popen([
+        sys.executable, str(REPO_ROOT / "benchmarks" / "mock_services.py"),
+        "--port", str(mock_port),
+        "--groq-latency-ms", str(args.groq_latency_ms),
+        "--groq-jitter-ms", str(args.groq_jitter_ms),
+        "--token-latency-ms", str(args.token_latency_ms),
+        "--groq-failure-rate", str(args.groq_failure_rate),
+        "--embed-latency-ms", str(args.embed_latency_ms),
+        "--embed-failure-rate", str(args.embed_failure_rate),
+    ])
+    procs = [mock]
+    mock_url = f"http://127.0.0.1:{mock_port}"
+
+    try:
+        _wait_for("mock services", f"{mock_url}/docs", mock)
+        # Query embeddings go through the mock Ollama API (hash vectors),
+        # so the embedding round trip is part of the measurement
+        backend_env(
+            mock_url,
+            EMBEDDINGS="ollama",
+            OLLAMA_HOST=mock_url,
+            RERANKER=args.reranker,
+            SESSION_STORE=args.session_store,
+        )
+        backend_port = free_port()
+        backend = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "backend.main:app",
+                "--host", "127.0.0.1", "--port", str(backend_port),
+                "--workers", "1", "--log-level", "warning",
+            ],
+            cwd=REPO_ROOT,
+            env=dict(os.environ),
+        )
+        procs.append(backend)
+        backend_url = f"http://127.0.0.1:{backend_port}"
+        _wait_for("backend", f"{backend_url}/health", backend)
+    except Exception:
+        stop_servers(procs)
+        raise
+    return backend_url, procs
+
+
+def stop_servers(procs: list[subprocess.Popen]):
+    for proc in reversed(procs):
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# LOAD GENERATOR
+# ─────────────────────────────────────────────────────────────────────────────
+
+class LevelResult:
+    def __init__(self):
+        self.latencies_ms: list[float] = []
+        self.first_token_ms: list[float] = []
+        self.errors: dict[str, int] = {}
+
+    def error(self, reason: str):
+        self.errors[reason] = self.errors.get(reason, 0) + 1
+
+
+async def _send_chat(client: httpx.AsyncClient, payload: dict, result: LevelResult) -> dict | None:
+    start = time.perf_counter()
+    try:
+        resp = await client.post(ENDPOINTS["chat"], json=payload)
+    except httpx.HTTPError as e:
+        result.error(type(e).__name__)
+        return None
+    if resp.status_code != 200:
+        result.error(f"http_{resp.status_code}")
+        return None
+    result.latencies_ms.append((time.perf_counter() - start) * 1000)
+    data = resp.json()
+    return {"reply": data["reply"], "session_id": data.get("session_id")}
+
+
+async def _send_stream(client: httpx.AsyncClient, payload: dict, result: LevelResult) -> dict | None:
+    start = time.perf_counter()
+    first_token = None
+    event = None
+    try:
+        async with client.stream("POST", ENDPOINTS["stream"], json=payload) as resp:
+            if resp.status_code != 200:
+                result.error(f"http_{resp.status_code}")
+                return None
+            async for line in resp.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: "):
+                    if event == "token" and first_token is None:
+                        first_token = time.perf_counter()
+                    elif event == "error":
+                        result.error("stream_error")
+                        return None
+                    elif event == "done":
+                        done = json.loads(line[len("data: "):])
+                        break
+            else:
+                result.error("stream_truncated")
+                return None
+    except httpx.HTTPError as e:
+        result.error(type(e).__name__)
+        return None
+
+    result.latencies_ms.append((time.perf_counter() - start) * 1000)
+    if first_token is not None:
+        result.first_token_ms.append((first_token - start) * 1000)
+    return {"reply": done["reply"], "session_id": done.get("session_id")}
+
+
+async def _user(client, args, conversations, rng, stop_at, result: LevelResult):
+    send = _send_stream if args.endpoint == "stream" else _send_chat
+    while time.monotonic() < stop_at:
+        conversation = rng.choice(conversations)
+        session_id, history = None, []
+        for message in conversation["turns"]:
+            if time.monotonic() >= stop_at:
+                return
+            payload = {"message": message, "filters": conversation.get("filters")}
+            if args.history == "client":
+                payload["history"] = history
+            elif session_id:
+                payload["session_id"] = session_id
+
+            reply = await send(client, payload, result)
+            if reply is None:
+                break       # a failed turn ends the conversation, as a user would
+            session_id = reply["session_id"]
+            history += [
+                {"role": "user", "content": message},
+                {"role": "assistant", "content": reply["reply"]},
+            ]
+            if args.think_ms:
+                await asyncio.sleep(rng.uniform(0.5, 1.5) * args.think_ms / 1000)
+
+
+async def run_level(url: str, args, conversations: list[dict], concurrency: int) -> dict:
+    result = LevelResult()
+    rng = random.Random(args.seed + concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+        start = time.monotonic()
+        stop_at = start + args.duration
+        users = [
+            _user(client, args, conversations, random.Random(rng.random()), stop_at, result)
+            for _ in range(concurrency)
+        ]
+        await asyncio.gather(*users)
+        # Requests in flight at the deadline still finish and are counted
+        elapsed = time.monotonic() - start
+
+    completed = len(result.latencies_ms)
+    failed = sum(result.errors.values())
+    level = {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "completed": completed,
+        "failed": failed,
+        "errors": result.errors,
+        "error_rate": round(failed / max(1, completed + failed), 4),
+        "throughput_rps": round(completed / elapsed, 2),
+        "latency": latency_summary(result.latencies_ms, elapsed) if completed else None,
+    }
+    if result.first_token_ms:
+        level["first_token"] = latency_summary(result.first_token_ms, elapsed)
+    return level
+
+
+def _print_table(levels: list[dict], streaming: bool):
+    header = f"\n{'users':>6}{'chats/s':>10}{'errors':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header + (f"{'ttft p50':>10}{'ttft p95':>10}" if streaming else ""))
+    for lvl in levels:
+        lat = lvl["latency"] or {}
+        row = (
+            f"{lvl['concurrency']:>6}{lvl['throughput_rps']:>10.2f}{lvl['error_rate']:>9.1%}"
+            f"{lat.get('p50_ms', float('nan')):>10.0f}{lat.get('p95_ms', float('nan')):>10.0f}"
+            f"{lat.get('p99_ms', float('nan')):>10.0f}"
+        )
+        if streaming:
+            ttft = lvl.get("first_token") or {}
+            row += f"{ttft.get('p50_ms', float('nan')):>10.0f}{ttft.get('p95_ms', float('nan')):>10.0f}"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--url", help="existing backend to load (skips the local servers)")
+    parser.add_argument("--endpoint", choices=tuple(ENDPOINTS), default="chat")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per level")
+    parser.add_argument("--history", choices=("session", "client"), default="session",
+                        help="server-side sessions, or re-post the whole history")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean pause between turns")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout (s)")
+    parser.add_argument("--conversations", default=str(CONVERSATIONS_FILE))
+    parser.add_argument("--seed", type=int, default=0)
+    # Local servers only
+    parser.add_argument("--reranker", default="groq")
+    parser.add_argument("--session-store", default="memory")
+    parser.add_argument("--groq-latency-ms", type=float, default=300.0)
+    parser.add_argument("--groq-jitter-ms", type=float, default=50.0)
+    parser.add_argument("--token-latency-ms", type=float, default=10.0)
+    parser.add_argument("--groq-failure-rate", type=float, default=0.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=20.0)
+    parser.add_argument("--embed-failure-rate", type=float, default=0.0)
+    parser.add_argument("--out", help="write the JSON report here")
+    args = parser.parse_args()
+
+    conversations = json.loads(Path(args.conversations).read_text(encoding="utf-8"))
+    procs = []
+    url = args.url
+    if not url:
+        print("🚀 Starting mock services and a backend worker ...")
+        url, procs = start_servers(args)
+
+    started = datetime.now(timezone.utc)
+    levels = []
+    try:
+        for concurrency in args.concurrency:
+            print(f"⏱  {concurrency} concurrent user(s) for {args.duration:.0f}s ...")
+            levels.append(asyncio.run(run_level(url, args, conversations, concurrency)))
+    finally:
+        stop_servers(procs)
+
+    _print_table(levels, streaming=args.endpoint == "stream")
+    report = {
+        "meta": {
+            "started_at": started.isoformat(timespec="seconds"),
+            "target": args.url or "local (mock Groq + Ollama, fixture index)",
+            "endpoint": ENDPOINTS[args.endpoint],
+            "config": {k: v for k, v in vars(args).items() if k not in ("out", "url")},
+        },
+        "levels": levels,
+    }
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        print(f"\n💾 Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Mock external services
+======================
+In-process stand-ins for the Groq and Ollama APIs, so benchmarks and load
+tests run offline with a controlled, repeatable latency and failure rate:
+
+    with MockServices(groq_latency_ms=150) as mock:
+        os.environ["GROQ_BASE_URL"] = mock.url
+        ...
+
+or as a separate process (so it does not share a GIL with the client):
+
+    python benchmarks/mock_services.py --port 9911 --groq-latency-ms 300
+
+Groq: the OpenAI-compatible chat-completions protocol the Groq SDK uses
+(``POST /openai/v1/chat/completions``), both one-shot and streamed (SSE).
+It answers by the prompt it receives:
+
+    query rewrite   → a JSON array of search queries built from the question
+    re-rank         → a JSON array of descending scores, one per candidate
+    summary         → a one-line conversation summary
+    anything else   → a short recommendation, streamed token by token
+
+Every response reports ``usage`` so token metrics have something to count.
+
+Ollama: ``POST /api/embed`` (point ``OLLAMA_HOST`` at the mock) returns the
+``hash`` backend's vectors, so an index built with ``EMBEDDINGS=hash`` gives
+the same results when the backend runs with ``EMBEDDINGS=ollama``.
+
+With a failure rate set, that share of calls answers ``503`` after the
+usual latency (the Groq SDK retries these, as it would in production).
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.embeddings import HashEmbeddings  # noqa: E402
+
+GENERATION_REPLY = (
+    "Based on the products in stock, the **top pick** is the first option: it "
+    "matches your budget and connectivity, with good battery life and ANC. "
+    "The second option is a cheaper alternative with a similar sound profile."
+)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)    # ~4 characters per token
+
+
+class MockServices:
+    """Runs the mock APIs on a local port in a background thread."""
+
+    def __init__(
+        self,
+        groq_latency_ms: float = 150.0,
+        groq_jitter_ms: float = 0.0,
+        token_latency_ms: float = 5.0,
+        groq_failure_rate: float = 0.0,
+        embed_latency_ms: float = 20.0,
+        embed_failure_rate: float = 0.0,
+        port: int | None = None,
+        seed: int = 0,
+    ):
+        self.groq_latency_ms = groq_latency_ms
+        self.groq_jitter_ms = groq_jitter_ms
+        self.token_latency_ms = token_latency_ms
+        self.groq_failure_rate = groq_failure_rate
+        self.embed_latency_ms = embed_latency_ms
+        self.embed_failure_rate = embed_failure_rate
+        self._random = random.Random(seed)
+        self._embeddings = HashEmbeddings()
+        self.port = port or free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.calls: dict[str, int] = {}      # by kind: rewrite, rerank, ..., embed
+        self.failures: dict[str, int] = {}   # injected 503s, by kind
+        self.app = self._build_app()
+        self._server = uvicorn.Server(
+            uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning")
+        )
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    # ── lifecycle ───────────────────────────────────────────────────────────
+    def start(self) -> "MockServices":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("mock services did not start within 10s")
+            time.sleep(0.01)
+        return self
+
+    def serve_forever(self):
+        """Run in the foreground until interrupted."""
+        self._server.run()
+
+    def stop(self):
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+    def __enter__(self) -> "MockServices":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ── behaviour ───────────────────────────────────────────────────────────
+    async def _delay(self, base_ms: float, jitter_ms: float = 0.0):
+        delay = base_ms + (self._random.uniform(-jitter_ms, jitter_ms) if jitter_ms else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+    def _count(self, kind: str):
+        self.calls[kind] = self.calls.get(kind, 0) + 1
+
+    def _fail(self, kind: str, rate: float) -> JSONResponse | None:
+        """A 503 for an injected failure (with probability *rate*), else ``None``."""
+        if rate <= 0 or self._random.random() >= rate:
+            return None
+        self.failures[kind] = self.failures.get(kind, 0) + 1
+        return JSONResponse(
+            {"error": {"message": f"injected {kind} failure", "type": "service_unavailable"}},
+            status_code=503,
+        )
+
+    @staticmethod
+    def _answer(prompt: str) -> tuple[str, str]:
+        """``(kind, content)`` for the system prompt the backend sent."""
+        if "search-query optimiser" in prompt:
+            match = re.search(r"User's latest question: (.*)", prompt)
+            question = match.group(1).strip() if match else "headphones"
+            return "rewrite", json.dumps([question, f"{question} headphones"])
+        if "relevance judge" in prompt:
+            indexes = sorted({int(i) for i in re.findall(r"^\[(\d+)\]", prompt, re.M)})
+            scores = [{"index": i, "score": len(indexes) - rank} for rank, i in enumerate(indexes)]
+            return "rerank", json.dumps(scores)
+        if "running summary" in prompt:
+            return "summary", "The user is looking for wireless headphones on a budget."
+        return "generation", GENERATION_REPLY
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/openai/v1/chat/completions")
+        async def chat_completions(request: Request):
+            body = await request.json()
+            prompt = "\n".join(m.get("content") or "" for m in body["messages"])
+            kind, content = self._answer(body["messages"][0].get("content") or "")
+            self._count(kind)
+            usage = {
+                "prompt_tokens": _tokens(prompt),
+                "completion_tokens": _tokens(content),
+                "total_tokens": _tokens(prompt) + _tokens(content),
+            }
+            await self._delay(self.groq_latency_ms, self.groq_jitter_ms)
+            failure = self._fail(kind, self.groq_failure_rate)
+            if failure is not None:
+                return failure
+
+            if not body.get("stream"):
+                return {
+                    "id": "mock", "object": "chat.completion", "created": int(time.time()),
+                    "model": body["model"],
+                    "choices": [{
+                        "index": 0, "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": content},
+                    }],
+                    "usage": usage,
+                }
+
+            async def events():
+                for i, word in enumerate(content.split(" ")):
+                    chunk = {
+                        "id": "mock", "object": "chat.completion.chunk",
+                        "created": int(time.time()), "model": body["model"],
+                        "choices": [{
+                            "index": 0, "finish_reason": None,
+                            "delta": {"content": word if i == 0 else f" {word}"},
+                        }],
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                    await self._delay(self.token_latency_ms)
+                final = {
+                    "id": "mock", "object": "chat.completion.chunk",
+                    "created": int(time.time()), "model": body["model"],
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                    "x_groq": {"usage": usage},
+                }
+                yield f"data: {json.dumps(final)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        @app.post("/api/embed")
+        async def embed(request: Request):
+            body = await request.json()
+            texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+            self._count("embed")
+            await self._delay(self.embed_latency_ms)
+            failure = self._fail("embed", self.embed_failure_rate)
+            if failure is not None:
+                return failure
+            return {
+                "model": body.get("model", "mock"),
+                "embeddings": self._embeddings.embed_documents(texts),
+                "prompt_eval_count": sum(_tokens(t) for t in texts),
+            }
+
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Groq + Ollama APIs")
+    parser.add_argument("--port", type=int, default=9911)
+    parser.add_argument("--groq-latency-ms", type=float, default=150.0)
+    parser.add_argument("--groq-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--token-latency-ms", type=float, default=5.0)
+    parser.add_argument("--groq-failure-rate", type=float, default=0.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=20.0)
+    parser.add_argument("--embed-failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    mock = MockServices(**vars(args))
+    print(f"🧪 Mock Groq + Ollama on {mock.url}")
+    mock.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
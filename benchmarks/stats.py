@@ -0,0 +1,105 @@
+"""
+Benchmark statistics
+====================
+Latency summaries, baseline comparison and ranking-quality metrics shared
+by the benchmark scripts.
+
+A report maps benchmark names to ``latency_summary`` dicts; comparing two
+reports flags every benchmark whose p95 grew by more than a threshold.
+
+Quality metrics take a ranked list of product ids and the graded labels of
+one query (``{id: grade}``, grade ≥ 1 = relevant).
+"""
+
+import math
+import statistics
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Linear-interpolated percentile (same as numpy's default)."""
+    ordered = sorted(values)
+    if not ordered:
+        return math.nan
+    pos = pct / 100 * (len(ordered) - 1)
+    low, high = math.floor(pos), math.ceil(pos)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+def latency_summary(latencies_ms: list[float], wall_seconds: float) -> dict:
+    """n / mean / p50 / p95 / p99 / min / max (ms) and throughput (ops/s)."""
+    return {
+        "n": len(latencies_ms),
+        "mean_ms": round(statistics.fmean(latencies_ms), 3),
+        "p50_ms": round(percentile(latencies_ms, 50), 3),
+        "p95_ms": round(percentile(latencies_ms, 95), 3),
+        "p99_ms": round(percentile(latencies_ms, 99), 3),
+        "min_ms": round(min(latencies_ms), 3),
+        "max_ms": round(max(latencies_ms), 3),
+        "ops_per_sec": round(len(latencies_ms) / wall_seconds, 2) if wall_seconds else None,
+    }
+
+
+def compare(current: dict, baseline: dict, max_regression: float, metric: str = "p95_ms") -> list[dict]:
+    """Per benchmark in both reports: baseline vs current *metric* and the change.
+
+    ``regressed`` is set when the current value is more than *max_regression*
+    (a fraction, 0.2 = +20%) above the baseline.
+    """
+    rows = []
+    for name, summary in current.items():
+        before = baseline.get(name, {}).get(metric)
+        after = summary.get(metric)
+        if not before or after is None:
+            continue
+        change = (after - before) / before
+        rows.append({
+            "benchmark": name,
+            "baseline": before,
+            "current": after,
+            "change": round(change, 3),
+            "regressed": change > max_regression,
+        })
+    return rows
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# RANKING QUALITY
+# ─────────────────────────────────────────────────────────────────────────────
+
+def recall_at_k(ranked: list[str], relevant: dict[str, int], k: int) -> float:
+    """Share of the relevant products in the top *k*, capped at *k*.
+
+    Capped (divided by ``min(k, |relevant|)``) so broad queries with more
+    relevant products than slots can still reach 1.0.
+    """
+    if not relevant:
+        return 0.0
+    hits = sum(1 for pid in ranked[:k] if relevant.get(pid, 0) > 0)
+    return hits / min(k, len(relevant))
+
+
+def recall(retrieved: list[str], relevant: dict[str, int]) -> float:
+    """Share of all relevant products found anywhere in *retrieved* (uncapped),
+    comparable across list lengths."""
+    if not relevant:
+        return 0.0
+    return sum(1 for pid in set(retrieved) if relevant.get(pid, 0) > 0) / len(relevant)
+
+
+def reciprocal_rank(ranked: list[str], relevant: dict[str, int]) -> float:
+    """1 / rank of the first relevant product (0 when none is retrieved)."""
+    for rank, pid in enumerate(ranked, start=1):
+        if relevant.get(pid, 0) > 0:
+            return 1.0 / rank
+    return 0.0
+
+
+def ndcg_at_k(ranked: list[str], relevant: dict[str, int], k: int) -> float:
+    """Normalised DCG over the top *k* with graded gains (2^grade - 1)."""
+    def dcg(grades: list[int]) -> float:
+        return sum((2 ** g - 1) / math.log2(i + 2) for i, g in enumerate(grades))
+
+    ideal = dcg(sorted(relevant.values(), reverse=True)[:k])
+    if not ideal:
+        return 0.0
+    return dcg([relevant.get(pid, 0) for pid in ranked[:k]]) / ideal
@@ -71,7 +71,7 @@
 # print(f"After splitting: {len(split_docs)} chunks.")
 
 # # -----------------------------
-# # Initialize Ollama Embeddings
+# # Initialize Embeddings
 # # -----------------------------
 # embeddings = OllamaEmbeddings(
 #     model="nomic-embed-text:latest"
@@ -91,18 +91,51 @@
 # print("✅ ChromaDB vectorstore created successfully!")
 
 
+import hashlib
 import json
-from langchain_ollama import OllamaEmbeddings
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+# Allow `python embeddding/embedder.py` to import the shared backend modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend.bm25 import load_or_build_snapshot
+from backend.embeddings import embeddings_key, make_embeddings
+from backend.index_generations import (
+    COLLECTION_NAME,
+    create_generation,
+    current_generation,
+    discard_generation,
+    publish_generation,
+)
+from scraping.jsonl import existing_path, iter_records
+from backend.product_attributes import (
+    infer_brand,
+    infer_connectivity,
+    infer_type,
+    parse_price,
+)
+
 # -----------------------------
 # CONFIG
 # -----------------------------
-JSON_FILE = "products.json"
-PERSIST_DIRECTORY = "./chroma_db"
-COLLECTION_NAME = "products_collection"
+# Merged catalog: JSON Lines from mastercode, or a legacy products.json
+JSON_FILE = existing_path("products.jsonl", "products.json") or "products.jsonl"
+# Chroma + BM25 are written to a new generation under indexes/ and published
+# when complete (backend/index_generations.py); the backend swaps to it live
+DELETE_BATCH_SIZE = 256
+
+# Embedding throughput (override via environment)
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "3"))
+EMBED_RETRY_BACKOFF = float(os.getenv("EMBED_RETRY_BACKOFF", "1.0"))   # seconds
 
 # -----------------------------
 # Convert Product JSON → Documents
@@ -110,25 +143,64 @@ COLLECTION_NAME = "products_collection"
 def extract_products(file_path):
     documents = []
 
-    with open(file_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    for product in data:
+    # Streamed one record at a time
+    for product in iter_records(file_path):
+        name = product.get("product_name") or ""
+        description = product.get("description") or ""
+        specs = product.get("specs") or {}
+
+        # Normalised records (normalize/normalize_products.py) carry typed
+        # fields; raw scraper records fall back to keyword inference.
+        if "price_current" in product:
+            price_current = product.get("price_current")
+            price_regular = product.get("price_regular")
+        else:
+            price_current = price_regular = parse_price(product.get("price"))
+        product_type = product.get("type") or infer_type(name) or infer_type(description)
+        connectivity = (
+            product.get("connectivity")
+            or infer_connectivity(name)
+            or infer_connectivity(description)
+        )
+        brand = product.get("brand") or infer_brand(name)
+        spec_lines = "\n".join(f"{k}: {v}" for k, v in specs.items())
+        # Merged catalog records list every site selling the product
+        offers = product.get("offers") or []
+        offer_text = ", ".join(
+            f"{o.get('source', '?')} ৳{o['price']}" if o.get("price") else o.get("source", "?")
+            for o in offers
+        )
 
         text = f"""
-        Product Name: {product.get('product_name', '')}
-        Description: {product.get('description', '')}
+        Product Name: {name}
+        Brand: {brand or ''}
+        Type: {product_type or ''}
+        Connectivity: {connectivity or ''}
         Price: {product.get('price', '')}
+        Available at: {offer_text}
+        Specifications:
+        {spec_lines}
+        Description: {description}
         """
 
         documents.append(
             Document(
                 page_content=text.strip(),
                 metadata={
-                    "source": file_path,
-                    "product_name": product.get("product_name"),
-                    "price": product.get("price"),
-                    "url": product.get("url")
+                    "source": product.get("source") or file_path,
+                    "product_name": name,
+                    "price": product.get("price") or "",
+                    "product_id": product.get("product_id") or product.get("url") or "",
+                    "url": product.get("url"),
+                    "sources": ",".join(o.get("source", "") for o in offers)
+                    or product.get("source") or "",
+                    # Filterable fields (Chroma `where` + BM25 facets);
+                    # "unknown" / 0 when they cannot be inferred
+                    "type": product_type or "unknown",
+                    "connectivity": connectivity or "unknown",
+                    "brand": brand or "unknown",
+                    "price_current": price_current or 0,
+                    "price_regular": price_regular or 0,
                 }
             )
         )
@@ -136,6 +208,123 @@ def extract_products(file_path):
     return documents
 
 
+# -----------------------------
+# Stable Chunk IDs + Content Hashes
+# -----------------------------
+def product_key(doc):
+    return doc.metadata.get("product_id") or doc.metadata.get("product_name") or ""
+
+
+def chunk_id(doc, chunk_index):
+    """``<product id>::<chunk index>`` — identical across runs for the same product,
+    even when its cheapest offer (and so its headline url) changes."""
+    return f"{product_key(doc)}::{chunk_index}"
+
+
+def content_hash(text, metadata):
+    """sha256 over the chunk text and its metadata (minus the hash itself)."""
+    payload = json.dumps(
+        [text, {k: v for k, v in metadata.items() if k != "content_hash"}],
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def build_chunks(documents, splitter, embedding):
+    """Split every product and key its chunks by stable id (first duplicate wins).
+
+    *embedding* (backend + model) is part of the hashed metadata, so
+    switching embedding models re-embeds everything.
+    """
+    chunks = {}
+    seen = set()
+    skipped = 0
+    for doc in documents:
+        key = product_key(doc)
+        if not key or key in seen:
+            skipped += 1
+            continue
+        seen.add(key)
+        for i, text in enumerate(splitter.split_text(doc.page_content)):
+            metadata = dict(doc.metadata, chunk_index=i, embedding=embedding)
+            metadata["content_hash"] = content_hash(text, metadata)
+            chunks[chunk_id(doc, i)] = Document(page_content=text, metadata=metadata)
+    return chunks, skipped
+
+
+# -----------------------------
+# Parallel Batched Embedding
+# -----------------------------
+def embed_with_retry(embeddings, texts):
+    """Embed one batch, retrying with exponential backoff."""
+    for attempt in range(1, EMBED_MAX_RETRIES + 1):
+        try:
+            return embeddings.embed_documents(texts)
+        except Exception as e:
+            if attempt == EMBED_MAX_RETRIES:
+                raise
+            delay = EMBED_RETRY_BACKOFF * 2 ** (attempt - 1)
+            print(f"  ⚠  batch of {len(texts)} failed ({e}); retry {attempt}/{EMBED_MAX_RETRIES - 1} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def embed_and_upsert(collection, embeddings, chunks, ids):
+    """
+    Embed *ids* in EMBED_BATCH_SIZE batches, EMBED_CONCURRENCY at a time,
+    and upsert each batch into Chroma as soon as it is embedded.
+
+    Writes stay on this thread; at most 2 × EMBED_CONCURRENCY batches are
+    in flight, so memory does not grow with the catalog. Batches that still
+    fail after retries are skipped — their old hash stays in Chroma, so the
+    next run picks them up again.
+    """
+    batches = iter(
+        ids[i:i + EMBED_BATCH_SIZE] for i in range(0, len(ids), EMBED_BATCH_SIZE)
+    )
+    done, failed = 0, []
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=EMBED_CONCURRENCY) as pool:
+        pending = {}
+
+        def submit_next():
+            batch_ids = next(batches, None)
+            if batch_ids:
+                texts = [chunks[cid].page_content for cid in batch_ids]
+                pending[pool.submit(embed_with_retry, embeddings, texts)] = batch_ids
+
+        for _ in range(2 * EMBED_CONCURRENCY):
+            submit_next()
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                batch_ids = pending.pop(future)
+                try:
+                    vectors = future.result()
+                except Exception as e:
+                    failed.extend(batch_ids)
+                    print(f"  ✖  batch of {len(batch_ids)} chunks failed: {e}")
+                else:
+                    batch_docs = [chunks[cid] for cid in batch_ids]
+                    collection.upsert(
+                        ids=batch_ids,
+                        embeddings=vectors,
+                        documents=[doc.page_content for doc in batch_docs],
+                        metadatas=[doc.metadata for doc in batch_docs],
+                    )
+                    done += len(batch_ids)
+                    rate = done / max(time.perf_counter() - start, 1e-9)
+                    print(f"  ↑ upserted {done}/{len(ids)}  ({rate:.1f} chunks/sec)")
+                submit_next()
+
+    if ids:
+        elapsed = time.perf_counter() - start
+        print(f"Embedded {done} chunks in {elapsed:.1f}s — {done / max(elapsed, 1e-9):.1f} chunks/sec")
+    return done, failed
+
+
 # -----------------------------
 # Load Products
 # -----------------------------
@@ -145,6 +334,11 @@ print(f"Loaded {len(all_docs)} products.")
 if not all_docs:
     raise ValueError("No documents loaded. Check file paths or JSON structure.")
 
+# -----------------------------
+# Initialize Embeddings
+# -----------------------------
+embeddings = make_embeddings()    # EMBEDDINGS=ollama (default) | hash
+
 # -----------------------------
 # Split Long Descriptions
 # -----------------------------
@@ -153,27 +347,90 @@ text_splitter = RecursiveCharacterTextSplitter(
     chunk_overlap=100
 )
 
-split_docs = text_splitter.split_documents(all_docs)
-print(f"After splitting: {len(split_docs)} chunks.")
+chunks, duplicate_products = build_chunks(
+    all_docs, text_splitter, embeddings_key(embeddings)
+)
+print(f"After splitting: {len(chunks)} chunks.")
+if duplicate_products:
+    print(f"⚠  Skipped {duplicate_products} product(s) with a duplicate or missing URL.")
 
 # -----------------------------
-# Initialize Ollama Embeddings
+# New Index Generation
 # -----------------------------
-embeddings = OllamaEmbeddings(
-    model="nomic-embed-text:latest"
-)
+# A copy of the live generation, updated in place while the backend keeps
+# serving the original; published only once Chroma and BM25 are both done.
+live_generation = current_generation()
+generation = create_generation()
+print(f"Building index generation {generation.name} (from {live_generation.name}).")
 
 # -----------------------------
-# Create Chroma Vectorstore
+# Diff Against the Existing Collection
 # -----------------------------
-vectorstore = Chroma.from_documents(
-    documents=split_docs,
-    embedding=embeddings,
-    persist_directory=PERSIST_DIRECTORY,
-    collection_name=COLLECTION_NAME
+vectorstore = Chroma(
+    collection_name=COLLECTION_NAME,
+    embedding_function=embeddings,
+    persist_directory=str(generation.chroma_dir),
 )
+collection = vectorstore._collection
+
+existing = collection.get(include=["metadatas"])
+existing_hashes = {
+    doc_id: (meta or {}).get("content_hash")
+    for doc_id, meta in zip(existing["ids"], existing["metadatas"])
+}
+
+changed_ids = [
+    cid for cid, doc in chunks.items()
+    if existing_hashes.get(cid) != doc.metadata["content_hash"]
+]
+stale_ids = [doc_id for doc_id in existing_hashes if doc_id not in chunks]
+unchanged = len(chunks) - len(changed_ids)
+
+print(
+    f"Diff: {len(changed_ids)} new/changed, {unchanged} unchanged, "
+    f"{len(stale_ids)} stale chunk(s)."
+)
+
+if not changed_ids and not stale_ids:
+    discard_generation(generation)
+    print(f"✅ Index up to date — still serving generation {live_generation.name}.")
+    sys.exit(0)
+
+# -----------------------------
+# Embed + Upsert Changed Chunks
+# -----------------------------
+embedded, failed_ids = embed_and_upsert(collection, embeddings, chunks, changed_ids)
 
-vectorstore.persist()
+# -----------------------------
+# Delete Vanished Chunks
+# -----------------------------
+# Products that left the catalog, chunks past a product's new chunk count,
+# and legacy random-id chunks from earlier full rebuilds.
+for start in range(0, len(stale_ids), DELETE_BATCH_SIZE):
+    collection.delete(ids=stale_ids[start:start + DELETE_BATCH_SIZE])
+
+print(
+    f"✅ ChromaDB synced — {embedded} upserted, {len(stale_ids)} deleted, "
+    f"{collection.count()} chunks total."
+)
 
-print("✅ ChromaDB vectorstore created successfully!")
+# -----------------------------
+# Persist BM25 Snapshot
+# -----------------------------
+# Written here so the backend can memory-map it instead of re-tokenising
+# the whole collection on every start. Skipped when the collection (ids +
+# content hashes) still matches the snapshot on disk.
+bm25_index, _, _ = load_or_build_snapshot(collection, generation.bm25_dir)
+print(f"✅ BM25 snapshot ready — {len(bm25_index)} chunks → {generation.bm25_dir}")
 
+# -----------------------------
+# Publish the Generation
+# -----------------------------
+# Failed chunks keep their previous vectors (or stay missing) and are
+# retried next run, exactly as with an in-place update.
+publish_generation(generation)
+print(f"✅ Published index generation {generation.name}.")
+
+if failed_ids:
+    print(f"⚠  {len(failed_ids)} chunk(s) failed to embed; they will be retried next run.")
+    sys.exit(1)
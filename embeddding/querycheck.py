@@ -1,12 +1,18 @@
-from langchain_ollama import OllamaEmbeddings
+import sys
+from pathlib import Path
+
 from langchain_chroma import Chroma
 
-embeddings = OllamaEmbeddings(model="nomic-embed-text:latest")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend.embeddings import make_embeddings
+from backend.index_generations import COLLECTION_NAME, current_generation
+
+embeddings = make_embeddings()    # EMBEDDINGS=ollama (default) | hash
 
 vectorstore = Chroma(
-    persist_directory="./chroma_db",
+    persist_directory=str(current_generation().chroma_dir),
     embedding_function=embeddings,
-    collection_name="products_collection"
+    collection_name=COLLECTION_NAME
 )
 
 results = vectorstore.similarity_search("wireless earphone for travel", k=3)
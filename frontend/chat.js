@@ -6,8 +6,8 @@ document.getElementById('navToggle').addEventListener('click', () => {
 // ===== API CONFIG =====
 const API_BASE = window.audioIntelAuth?.API_BASE || 'http://localhost:8000'; // No auth required
 
-// ===== CONVERSATION HISTORY (sent to backend for multi-turn memory) =====
-let conversationHistory = [];  // [{role: 'user'|'assistant', content: '...'}]
+// ===== CONVERSATION SESSION (history is kept server-side) =====
+let sessionId = null;  // issued by the backend with the first reply
 
 // ===== PRODUCT PANEL (replaces embedded browser) =====
 // Most websites block iframe embedding (X-Frame-Options / CSP).
@@ -100,6 +100,10 @@ document.querySelectorAll('#connectChips .type-chip').forEach(chip => {
 });
 
 // ===== BUDGET SLIDER =====
+// No price cap is sent until the user picks a budget: the slider's resting
+// value is only a starting point, not a choice.
+let budgetTouched = false;
+
 function formatTaka(val) {
   return '৳' + Number(val).toLocaleString('en-IN');
 }
@@ -118,7 +122,9 @@ function updateBudget(val) {
   if (fill) fill.style.width = pct + '%';
 
   // Update display
-  if (numVal >= 10000) {
+  if (!budgetTouched) {
+    display.innerHTML = '<strong>Any budget</strong>';
+  } else if (numVal >= 10000) {
     display.innerHTML = 'Around <strong>' + formatTaka(numVal) + '+</strong>';
   } else {
     display.innerHTML = 'Around <strong>' + formatTaka(numVal) + '</strong>';
@@ -140,6 +146,7 @@ window.addEventListener('DOMContentLoaded', () => {
     tick.addEventListener('click', () => {
       const val = tick.dataset.val;
       document.getElementById('budgetSlider').value = val;
+      budgetTouched = true;
       updateBudget(val);
     });
   });
@@ -151,6 +158,8 @@ function applyFilters() {
   const connect = activeConnect === 'all' ? '' : activeConnect;
   const budget = document.getElementById('budgetSlider').value;
   const useCase = document.getElementById('useCaseFilter').value;
+  budgetTouched = true;
+  updateBudget(budget);
   let msg = `I'm looking for ${connect ? connect + ' ' : ''}${type} headphones`;
   msg += ` around ${formatTaka(budget)}`;
   if (useCase !== 'general') msg += ` for ${useCase}`;
@@ -165,6 +174,7 @@ function resetFilters() {
   document.querySelectorAll('#connectChips .type-chip').forEach(c => c.classList.remove('active'));
   document.querySelector('#connectChips .type-chip[data-connect="all"]').classList.add('active');
   document.getElementById('budgetSlider').value = 5000;
+  budgetTouched = false;
   updateBudget(5000);
   document.getElementById('useCaseFilter').value = 'general';
 }
@@ -174,7 +184,7 @@ function getActiveFilters() {
   return {
     product_type: activeType,
     connectivity: activeConnect,
-    budget: parseInt(document.getElementById('budgetSlider').value, 10),
+    budget: budgetTouched ? parseInt(document.getElementById('budgetSlider').value, 10) : null,
     use_case: document.getElementById('useCaseFilter').value,
   };
 }
@@ -377,17 +387,19 @@ function removeTyping() {
 }
 
 // ===== CALL THE BACKEND RAG CHATBOT =====
-async function getAIResponse(message) {
-  const filters = getActiveFilters();
+function buildChatPayload(message) {
+  return JSON.stringify({
+    message,
+    filters: getActiveFilters(),
+    session_id: sessionId,   // only the new message is sent; the server has the rest
+  });
+}
 
+async function getAIResponse(message) {
   const res = await fetch(`${API_BASE}/chat`, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify({
-      message,
-      filters,
-      history: conversationHistory,   // send full conversation history
-    }),
+    body: buildChatPayload(message),
   });
 
   if (!res.ok) {
@@ -396,7 +408,96 @@ async function getAIResponse(message) {
   }
 
   const data = await res.json();
-  return data; // { reply, sources }
+  if (data.session_id) sessionId = data.session_id;
+  return data; // { reply, sources, session_id }
+}
+
+/**
+ * Stream the answer from /chat/stream (Server-Sent Events over fetch).
+ * handlers.onSources(sources) fires once retrieval + re-ranking are done,
+ * handlers.onToken(text) for every generated chunk. Resolves to the full reply.
+ */
+/** Apply one SSE frame to *state*; sets state.done on the final event. */
+function handleSseFrame(frame, handlers, state) {
+  let event = 'message';
+  let data = '';
+  frame.split('\n').forEach(line => {
+    if (line.startsWith('event:')) event = line.slice(6).trim();
+    else if (line.startsWith('data:')) data += line.slice(5).trim();
+  });
+  if (!data) return;
+  const payload = JSON.parse(data);
+
+  if (payload.session_id) sessionId = payload.session_id;
+
+  if (event === 'sources') {
+    handlers.onSources(payload.sources || []);
+  } else if (event === 'token') {
+    state.reply += payload.content;
+    handlers.onToken(payload.content);
+  } else if (event === 'done') {
+    state.reply = payload.reply || state.reply;
+    state.done = true;
+  } else if (event === 'error') {
+    throw new Error(payload.detail || 'Failed to get response from AI');
+  }
+}
+
+async function streamAIResponse(message, handlers) {
+  const res = await fetch(`${API_BASE}/chat/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', 'Accept': 'text/event-stream' },
+    body: buildChatPayload(message),
+  });
+
+  if (!res.ok) {
+    const err = await res.json().catch(() => ({}));
+    throw new Error(err.detail || 'Failed to get response from AI');
+  }
+
+  const state = { reply: '', done: false };
+
+  // Browsers without streamable bodies: read the same response in one go.
+  // Re-posting to /chat would run (and record) the turn a second time.
+  if (!res.body || !res.body.getReader) {
+    const frames = (await res.text()).split('\n\n');
+    for (const frame of frames) {
+      handleSseFrame(frame, handlers, state);
+      if (state.done) break;
+    }
+    return state.reply;
+  }
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // SSE frames are separated by a blank line
+    let sep;
+    while ((sep = buffer.indexOf('\n\n')) !== -1) {
+      const frame = buffer.slice(0, sep);
+      buffer = buffer.slice(sep + 2);
+      handleSseFrame(frame, handlers, state);
+      if (state.done) return state.reply;
+    }
+  }
+  return state.reply;
+}
+
+/** Create an empty bot bubble that can be re-rendered as tokens arrive. */
+function addStreamingMessage() {
+  const container = document.getElementById('chatMessages');
+  const div = document.createElement('div');
+  div.className = 'message bot';
+  div.innerHTML = `<div class="msg-avatar">🎧</div><div class="msg-content"></div>`;
+  container.appendChild(div);
+  container.scrollTop = container.scrollHeight;
+  return div.querySelector('.msg-content');
 }
 
 // ===== SEND MESSAGE =====
@@ -413,28 +514,35 @@ async function sendMessage() {
     openInBrowser(urlMatch[0]);
   }
 
-  // Push user message to conversation history
-  conversationHistory.push({ role: 'user', content: text });
-
   showTyping();
 
+  let botContent = null;
+  let partial = '';
+
   try {
-    const data = await getAIResponse(text);
+    const reply = await streamAIResponse(text, {
+      // Show product cards in the right panel as soon as re-ranking is done
+      onSources: (sources) => {
+        if (sources && sources.length > 0) showProductPanel(sources);
+      },
+      // Swap the typing indicator for the live answer on the first token
+      onToken: (chunk) => {
+        if (!botContent) {
+          removeTyping();
+          botContent = addStreamingMessage();
+        }
+        partial += chunk;
+        botContent.innerHTML = formatBotReply(partial);
+        const container = document.getElementById('chatMessages');
+        container.scrollTop = container.scrollHeight;
+      },
+    });
     removeTyping();
-    addMessage(data.reply, 'bot');
-
-    // Push assistant reply to conversation history
-    conversationHistory.push({ role: 'assistant', content: data.reply });
-
-    // Show product cards in the right panel from RAG sources
-    if (data.sources && data.sources.length > 0) {
-      showProductPanel(data.sources);
-    }
+    if (!botContent) addMessage(reply, 'bot');
+    else botContent.innerHTML = formatBotReply(reply);
   } catch (err) {
     removeTyping();
     addMessage(`Sorry, something went wrong: ${err.message}. Please try again.`, 'bot');
-    // Remove the last user message from history since the exchange failed
-    conversationHistory.pop();
   }
 }
 
@@ -1,44 +1,39 @@
-import time
+import os
+import sys
 import json
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By
 
+# Allow `python get_urls/<site>.py` to import the shared scraping helpers
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraping.browser import DriverPool  # noqa: E402
+from scraping.waits import scroll_until_stable, site_timeout, wait_for_selectors  # noqa: E402
+
+PRODUCT_LINK_SELECTOR = "a[href*='/product-detail/']"
+
 
 class PickabooProductScraper:
-    def __init__(self, url):
-        self.driver = None
+    """Reads the infinite-scroll results page through a shared browser session."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._url = None
+
+    def open(self, url):
+        """Navigate the existing session to *url* (no new browser)."""
         self._url = url
-        self._initialize_driver(url)
-
-    def _initialize_driver(self, url):
-        options = webdriver.ChromeOptions()
-        options.add_argument("--start-maximized")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        self.driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()),
-            options=options
-        )
         self.driver.get(url)
-        time.sleep(8)
+        if not wait_for_selectors(self.driver, [PRODUCT_LINK_SELECTOR], site_timeout("pickaboo")):
+            print(f"⚠  No products rendered within timeout: {url}")
 
     def _scroll_to_load_all(self):
         """Scroll until all lazy-loaded products appear."""
-        last_height = self.driver.execute_script("return document.body.scrollHeight")
-        while True:
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(3)
-            new_height = self.driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
-                break
-            last_height = new_height
+        scroll_until_stable(self.driver, PRODUCT_LINK_SELECTOR)
 
     def get_product_urls(self):
         """Scroll to load all products, then extract product URLs."""
         self._scroll_to_load_all()
 
-        elements = self.driver.find_elements(By.CSS_SELECTOR, "a[href*='/product-detail/']")
+        elements = self.driver.find_elements(By.CSS_SELECTOR, PRODUCT_LINK_SELECTOR)
         seen = set()
         urls = []
         for elem in elements:
@@ -53,11 +48,6 @@ class PickabooProductScraper:
                 print(f"Skipping a product link due to error: {e}")
         return urls
 
-    def quit(self):
-        """Close the browser driver."""
-        if self.driver:
-            self.driver.quit()
-
 
 def scrape_pickaboo(search_query):
     """
@@ -68,11 +58,12 @@ def scrape_pickaboo(search_query):
     all_product_urls = []
 
     # Pickaboo uses infinite scroll (no pagination), so one page load + scroll is enough
-    scraper = PickabooProductScraper(base_url)
-    urls = scraper.get_product_urls()
-    all_product_urls.extend(urls)
+    with DriverPool(size=1) as pool, pool.driver() as driver:
+        scraper = PickabooProductScraper(driver)
+        scraper.open(base_url)
+        urls = scraper.get_product_urls()
+        all_product_urls.extend(urls)
     print(f"Completed scraping. Found {len(all_product_urls)} product URLs.")
-    scraper.quit()
 
     return json.dumps(all_product_urls, indent=2)
 
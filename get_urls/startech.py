@@ -1,28 +1,34 @@
-import time
+import os
+import sys
 import json
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By
 
+# Allow `python get_urls/<site>.py` to import the shared scraping helpers
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scraping.browser import DriverPool  # noqa: E402
+from scraping.waits import site_timeout, wait_for_selectors  # noqa: E402
+
 
 class StarTechProductScraper:
-    def __init__(self, url):
-        self.driver = None
-        self._url = url
-        self.current_page = 1
+    """Reads search-result pages through one long-lived browser session."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._url = None
         self.total_pages = 1
-        self._initialize_driver(url)
-        page_count = self._get_search_result_page_count()
-        if page_count > 0:
-            self.total_pages = page_count
 
-    def _initialize_driver(self, url):
-        self.driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
+    def open(self, url):
+        """Navigate the existing session to *url* (no new browser)."""
+        self._url = url
         self.driver.get(url)
-        time.sleep(5)
+        # Ready as soon as the product grid has rendered
+        if not wait_for_selectors(self.driver, ["div.p-item"], site_timeout("startech")):
+            print(f"⚠  Product grid not found within timeout: {url}")
 
     def get_page_count(self):
+        page_count = self._get_search_result_page_count()
+        if page_count > 0:
+            self.total_pages = page_count
         return self.total_pages
 
     def _get_search_result_page_count(self):
@@ -54,11 +60,6 @@ class StarTechProductScraper:
                 print(f"Skipping a product div due to error: {e}")
         return urls
 
-    def quit(self):
-        """Close the browser driver."""
-        if self.driver:
-            self.driver.quit()
-
 
 def scrape_startech(search_query):
     """
@@ -68,23 +69,25 @@ def scrape_startech(search_query):
     base_url = f"https://www.startech.com.bd/product/search?search={search_query}"
     all_product_urls = []
 
-    # First page — also determines total page count
-    scraper = StarTechProductScraper(base_url)
-    total_pages = scraper.get_page_count()
+    # One browser session for every results page
+    with DriverPool(size=1) as pool, pool.driver() as driver:
+        scraper = StarTechProductScraper(driver)
 
-    urls = scraper.get_product_urls()
-    all_product_urls.extend(urls)
-    print(f"Completed page: 1 of {total_pages}")
-    scraper.quit()
+        # First page — also determines total page count
+        scraper.open(base_url)
+        total_pages = scraper.get_page_count()
 
-    # Remaining pages
-    for page_num in range(2, total_pages + 1):
-        page_url = f"{base_url}&page={page_num}"
-        scraper = StarTechProductScraper(page_url)
         urls = scraper.get_product_urls()
         all_product_urls.extend(urls)
-        print(f"Completed page: {page_num} of {total_pages}")
-        scraper.quit()
+        print(f"Completed page: 1 of {total_pages}")
+
+        # Remaining pages
+        for page_num in range(2, total_pages + 1):
+            page_url = f"{base_url}&page={page_num}"
+            scraper.open(page_url)
+            urls = scraper.get_product_urls()
+            all_product_urls.extend(urls)
+            print(f"Completed page: {page_num} of {total_pages}")
 
     return json.dumps(all_product_urls, indent=2)
 
@@ -1,33 +1,47 @@
 import os
-import time
-import json
 import subprocess
 import signal
 import sys
-from datetime import datetime, timedelta
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Callable, NamedTuple
+
+from apscheduler.schedulers.blocking import BlockingScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+
+from normalize.merge_products import merge_products
+from normalize.normalize_products import normalize_file, normalized_path, raw_products_path
+from scraping.jsonl import JsonlWriter
 
 # ─────────────────────────────────────────────
 #  CONFIGURATION
 # ─────────────────────────────────────────────
 TEST = True                        # ← Change to False for production mode
 
-GET_URLS_FOLDER     = "get_urls"      # Folder containing URL-fetching scripts
-GET_PRODUCTS_FOLDER = "get_products"  # Folder containing product-scraping scripts
+GET_URLS_FOLDER     = "get_urls"      # get_urls/<site>.py  → <site>_product_urls.json
+GET_PRODUCTS_FOLDER = "get_products"  # get_products/<site>_products.py → <site>_products.jsonl
 
-# JSON files to merge (must exist after get_products finishes)
-JSON_FILES_TO_MERGE = [
-    "pickaboo_products.json",
-    "startech_products.json",
-    "techland_products.json",
-]
-MERGED_OUTPUT_FILE  = "products.json"
+# Sites whose <site>_products.jsonl (or legacy .json) get_products writes
+SITES = ["pickaboo", "startech", "techland"]
+
+# JSON Lines files to merge — the normalised copies written by the normalize stages
+JSON_FILES_TO_MERGE = [f"{site}_products_normalized.jsonl" for site in SITES]
+MERGED_OUTPUT_FILE  = "products.jsonl"
 
 # Embedder script to run after merging
 EMBEDDER_SCRIPT     = os.path.join("embeddding", "embedder.py")   # note: folder name as given
 
+# Per-stage timing of every cycle, one JSON line per cycle
+TIMINGS_FILE        = "pipeline_timings.jsonl"
+
 # Derived timing constants
-URL_TIMEOUT_SECONDS = 60    if TEST else None   # 1 min limit in TEST, unlimited otherwise
+URL_TIMEOUT_SECONDS = 60    if TEST else None   # per get_urls stage: 1 min in TEST, unlimited otherwise
 SCHEDULE_INTERVAL   = 240   if TEST else 86400  # 4 min in TEST, 24 hrs otherwise
+# Cron expression (e.g. "0 3 * * *") — replaces the fixed interval when set
+SCHEDULE_CRON       = os.getenv("SCHEDULE_CRON")
 
 # ─────────────────────────────────────────────
 #  HELPERS
@@ -38,19 +52,6 @@ def log(msg: str):
     print(f"[{ts}]  {msg}", flush=True)
 
 
-def get_python_files(folder: str) -> list[str]:
-    """Return sorted list of .py files inside *folder*."""
-    if not os.path.isdir(folder):
-        log(f"WARNING: folder '{folder}' not found – skipping.")
-        return []
-    files = sorted(
-        os.path.join(folder, f)
-        for f in os.listdir(folder)
-        if f.endswith(".py")
-    )
-    return files
-
-
 def run_script(path: str) -> subprocess.Popen:
     """Start a script in a subprocess and return the Popen handle."""
     log(f"  ▶ Starting: {path}")
@@ -61,168 +62,253 @@ def run_script(path: str) -> subprocess.Popen:
     )
 
 
-# ─────────────────────────────────────────────
-#  PHASE 1 – run get_urls (with optional timeout)
-# ─────────────────────────────────────────────
+def run_script_stage(path: str, timeout: int | None = None) -> str:
+    """Run *path* to completion; returns ``"ok"``, ``"failed"`` or ``"timeout"``."""
+    if not os.path.isfile(path):
+        log(f"  ⚠  Script not found: {path}")
+        return "failed"
 
-def run_get_urls():
-    scripts = get_python_files(GET_URLS_FOLDER)
-    if not scripts:
-        log("No scripts found in get_urls – skipping phase.")
-        return
-
-    log(f"━━━ Phase 1 · get_urls  (timeout={'%ds' % URL_TIMEOUT_SECONDS if URL_TIMEOUT_SECONDS else 'none'}) ━━━")
-
-    processes: list[subprocess.Popen] = []
-    for script in scripts:
-        proc = run_script(script)
-        processes.append(proc)
+    proc = run_script(path)
+    try:
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        log(f"  ⏱  Timeout ({timeout}s) reached – terminating {path} (pid={proc.pid})")
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        return "timeout"
 
-    if URL_TIMEOUT_SECONDS is None:
-        # No time limit – wait for all to finish naturally
-        for proc in processes:
-            proc.wait()
-    else:
-        # Wait up to URL_TIMEOUT_SECONDS, then kill any still-running process
-        deadline = time.time() + URL_TIMEOUT_SECONDS
-        for proc in processes:
-            remaining = deadline - time.time()
-            if remaining <= 0:
-                log(f"  ⏱  Timeout reached – terminating remaining get_urls processes.")
-                proc.terminate()
-                continue
-            try:
-                proc.wait(timeout=remaining)
-            except subprocess.TimeoutExpired:
-                log(f"  ⏱  Timeout reached – terminating process pid={proc.pid}")
-                proc.terminate()
-                try:
-                    proc.wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    proc.kill()
-
-    log("━━━ Phase 1 complete ━━━")
+    if proc.returncode != 0:
+        log(f"  ✖  {path} exited with code {proc.returncode}")
+        return "failed"
+    return "ok"
 
 
 # ─────────────────────────────────────────────
-#  PHASE 2 – run get_products (no time limit)
+#  STAGES
 # ─────────────────────────────────────────────
+#  Per site:   urls:<site> → products:<site> → normalize:<site> → publish:<site>
+#
+#  Sites run independently, so StarTech products are scraped as soon as the
+#  StarTech URLs are in, whatever the other sites are doing. Each publish
+#  stage merges every normalised file on disk (the fresh one for its site,
+#  the last cycle's for sites still running) and runs the incremental
+#  embedder, so a site's products are searchable as soon as they arrive and
+#  later publishes only embed what changed since.
+
+def get_urls_stage(site: str) -> str:
+    # A collector killed at its deadline keeps the last cycle's URL list,
+    # so the site's scrape still goes ahead (status "timeout", not "failed")
+    return run_script_stage(os.path.join(GET_URLS_FOLDER, f"{site}.py"), URL_TIMEOUT_SECONDS)
+
+
+def get_products_stage(site: str) -> str:
+    return run_script_stage(os.path.join(GET_PRODUCTS_FOLDER, f"{site}_products.py"))
+
+
+def normalize_site(site: str) -> str:
+    filename = raw_products_path(".", site)
+    if filename is None:
+        log(f"  ⚠  No scraped products for {site}, skipping.")
+        return "failed"
+    output = normalized_path(filename)
+    try:
+        counts = normalize_file(filename, output)
+    except Exception as e:
+        log(f"  ✖  Failed to normalise {filename}: {e}")
+        return "failed"
+    log(f"  ✔  {filename}  →  {output}  ({counts['products']} products)")
+    if counts["unpriced"]:
+        log(
+            f"  ⚠  {site}: {counts['unpriced']} of {counts['products']} products have no "
+            f"parseable price (budget filtering and price ranking skip them)"
+        )
+    return "ok"
+
+
+def normalize_products():
+    """Normalise every site's scraped products (outside the pipeline)."""
+    for site in SITES:
+        normalize_site(site)
+
+
+def merge_json_files() -> str:
+    # Streaming two-pass merge: one product per URL / brand+model, with an
+    # offer per source; memory holds dedup keys only, never the records
+    try:
+        stats = merge_products(JSON_FILES_TO_MERGE, MERGED_OUTPUT_FILE)
+    except Exception as e:
+        log(f"  ✖  Failed to write {MERGED_OUTPUT_FILE}: {e}")
+        return "failed"
+
+    for filename in stats["missing_inputs"]:
+        log(f"  ⚠  File not found, skipping: {filename}")
+    log(
+        f"  ✔  {stats['records']} records → {stats['products']} products "
+        f"({stats['url_duplicates']} duplicate URLs, {stats['model_matches']} brand+model matches, "
+        f"{stats['multi_source']} sold by several sites)"
+    )
+    log(f"  ✔  Merged catalog → {MERGED_OUTPUT_FILE}")
+    return "ok"
 
-def run_get_products():
-    scripts = get_python_files(GET_PRODUCTS_FOLDER)
-    if not scripts:
-        log("No scripts found in get_products – skipping phase.")
-        return
 
-    log("━━━ Phase 2 · get_products  (no time limit) ━━━")
+def run_embedder() -> str:
+    status = run_script_stage(EMBEDDER_SCRIPT)
+    if status == "ok":
+        log("  ✔  Embedder finished successfully (exit code 0)")
+    return status
 
-    for script in scripts:
-        proc = run_script(script)
-        proc.wait()   # Run sequentially; swap for parallel if preferred
 
-    log("━━━ Phase 2 complete ━━━")
+class CatalogPublisher:
+    """Serialises merge + embed across sites and skips redundant publishes.
 
+    Only one publish runs at a time (they share products.jsonl and the
+    index). A site whose normalised file was already picked up by a publish
+    that started after it finished has nothing new to publish.
+    """
 
-# ─────────────────────────────────────────────
-#  PHASE 3 – merge JSON files → products.json
-# ─────────────────────────────────────────────
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._normalized_at: dict[str, float] = {}
+        self._last_publish = 0.0
 
-def merge_json_files():
-    log("━━━ Phase 3 · Merging JSON files ━━━")
+    def normalized(self, site: str):
+        self._normalized_at[site] = time.monotonic()
 
-    merged: list = []
-    missing: list[str] = []
+    def publish(self, site: str) -> str:
+        with self._lock:
+            if self._normalized_at.get(site, 0.0) < self._last_publish:
+                log(f"  ✔  {site} already included in the latest publish")
+                return "ok"
+            self._last_publish = time.monotonic()
+            status = merge_json_files()
+            return run_embedder() if status == "ok" else status
 
-    for filename in JSON_FILES_TO_MERGE:
-        if not os.path.isfile(filename):
-            log(f"  ⚠  File not found, skipping: {filename}")
-            missing.append(filename)
-            continue
 
+# ─────────────────────────────────────────────
+#  DAG EXECUTOR
+# ─────────────────────────────────────────────
+
+class Stage(NamedTuple):
+    name: str
+    run: Callable[[], str]          # returns "ok" | "failed" | "timeout"
+    deps: tuple[str, ...] = ()
+
+
+def build_pipeline(sites: list[str] = SITES) -> list[Stage]:
+    publisher = CatalogPublisher()
+
+    def normalize(site):
+        status = normalize_site(site)
+        if status == "ok":
+            publisher.normalized(site)
+        return status
+
+    stages = []
+    for site in sites:
+        stages += [
+            Stage(f"urls:{site}", lambda s=site: get_urls_stage(s)),
+            Stage(f"products:{site}", lambda s=site: get_products_stage(s), (f"urls:{site}",)),
+            Stage(f"normalize:{site}", lambda s=site: normalize(s), (f"products:{site}",)),
+            Stage(f"publish:{site}", lambda s=site: publisher.publish(s), (f"normalize:{site}",)),
+        ]
+    return stages
+
+
+def run_dag(stages: list[Stage]) -> dict[str, dict]:
+    """
+    Run *stages* as soon as their dependencies are done, concurrently.
+
+    A dependency that ends "ok" or "timeout" unblocks its dependents; one
+    that fails (or raises) skips them. Returns ``{name: {"status",
+    "seconds", "started", "finished"}}`` with times relative to the start.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        for dep in stage.deps:
+            if dep not in by_name:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+    results: dict[str, dict] = {}
+    t0 = time.perf_counter()
+
+    def timed(stage: Stage) -> dict:
+        started = time.perf_counter() - t0
+        log(f"━━━ ▶ {stage.name} ━━━")
         try:
-            with open(filename, "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            if isinstance(data, list):
-                merged.extend(data)
-                log(f"  ✔  {filename}  →  {len(data)} records loaded")
-            elif isinstance(data, dict):
-                # If the file wraps products in a key, flatten it; otherwise wrap in list
-                # Try common wrapper keys first, then fall back to the whole dict
-                found = False
-                for key in ("products", "data", "items", "results"):
-                    if key in data and isinstance(data[key], list):
-                        merged.extend(data[key])
-                        log(f"  ✔  {filename}  →  {len(data[key])} records loaded (key='{key}')")
-                        found = True
-                        break
-                if not found:
-                    merged.append(data)
-                    log(f"  ✔  {filename}  →  1 record loaded (single dict)")
-            else:
-                log(f"  ⚠  Unexpected JSON type in {filename} – skipping.")
-
-        except json.JSONDecodeError as e:
-            log(f"  ✖  JSON decode error in {filename}: {e}")
+            status = stage.run()
         except Exception as e:
-            log(f"  ✖  Error reading {filename}: {e}")
-
-    if missing:
-        log(f"  ℹ  {len(missing)} file(s) were missing and skipped.")
-
-    try:
-        with open(MERGED_OUTPUT_FILE, "w", encoding="utf-8") as f:
-            json.dump(merged, f, ensure_ascii=False, indent=2)
-        log(f"  ✔  Merged {len(merged)} total records → {MERGED_OUTPUT_FILE}")
-    except Exception as e:
-        log(f"  ✖  Failed to write {MERGED_OUTPUT_FILE}: {e}")
-
-    log("━━━ Phase 3 complete ━━━")
+            log(f"  ✖  {stage.name} raised: {e}")
+            status = "failed"
+        finished = time.perf_counter() - t0
+        return {"status": status, "seconds": round(finished - started, 2),
+                "started": round(started, 2), "finished": round(finished, 2)}
+
+    pending = list(stages)
+    with ThreadPoolExecutor(max_workers=max(1, len(stages)), thread_name_prefix="stage") as pool:
+        running = {}
+        while pending or running:
+            scheduled = False
+            for stage in list(pending):
+                dep_status = [results[d]["status"] for d in stage.deps if d in results]
+                if any(s in ("failed", "skipped") for s in dep_status):
+                    pending.remove(stage)
+                    results[stage.name] = {"status": "skipped", "seconds": 0.0,
+                                           "started": None, "finished": None}
+                    log(f"  ⏭  {stage.name} skipped (a dependency failed)")
+                    scheduled = True
+                elif len(dep_status) == len(stage.deps):
+                    pending.remove(stage)
+                    running[pool.submit(timed, stage)] = stage
+                    scheduled = True
+
+            if not running:
+                if not scheduled:
+                    raise ValueError(f"Dependency cycle among: {[s.name for s in pending]}")
+                continue        # only skips happened; re-scan what they unblocked
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                results[stage.name] = future.result()
+                r = results[stage.name]
+                mark = {"ok": "✔", "timeout": "⏱"}.get(r["status"], "✖")
+                log(f"━━━ {mark} {stage.name} {r['status']} in {r['seconds']:.1f}s ━━━")
+
+    return results
 
 
 # ─────────────────────────────────────────────
-#  PHASE 4 – run embedding/embedder.py
+#  ONE FULL CYCLE
 # ─────────────────────────────────────────────
 
-def run_embedder():
-    log("━━━ Phase 4 · Running embedder ━━━")
-
-    if not os.path.isfile(EMBEDDER_SCRIPT):
-        log(f"  ⚠  Embedder script not found at '{EMBEDDER_SCRIPT}' – skipping.")
-        log("━━━ Phase 4 skipped ━━━")
-        return
-
-    log(f"  ▶ Starting: {EMBEDDER_SCRIPT}")
-    proc = subprocess.Popen(
-        [sys.executable, EMBEDDER_SCRIPT],
-        stdout=sys.stdout,
-        stderr=sys.stderr,
-    )
-    proc.wait()
-
-    if proc.returncode == 0:
-        log(f"  ✔  Embedder finished successfully (exit code 0)")
-    else:
-        log(f"  ✖  Embedder exited with code {proc.returncode}")
+def record_timings(cycle_number: int, started: datetime, results: dict[str, dict]):
+    total = max((r["finished"] or 0.0) for r in results.values()) if results else 0.0
+    log(f"Stage timings (cycle #{cycle_number}, {total:.1f}s wall clock):")
+    for name, r in sorted(results.items(), key=lambda kv: float("inf") if kv[1]["started"] is None else kv[1]["started"]):
+        window = f"{r['started']:7.1f}s → {r['finished']:7.1f}s" if r["started"] is not None else " " * 21
+        log(f"    {name:<22} {r['status']:<8} {window}  {r['seconds']:7.1f}s")
 
-    log("━━━ Phase 4 complete ━━━")
+    with JsonlWriter(TIMINGS_FILE) as out:
+        out.write({"cycle": cycle_number, "started": started.isoformat(timespec="seconds"),
+                   "seconds": round(total, 2), "stages": results})
 
 
-# ─────────────────────────────────────────────
-#  ONE FULL CYCLE
-# ─────────────────────────────────────────────
-
 def run_cycle(cycle_number: int):
     log(f"╔══════════════════════════════════════╗")
     log(f"  Cycle #{cycle_number}  |  TEST={TEST}")
     log(f"╚══════════════════════════════════════╝")
 
-    run_get_urls()
-    run_get_products()
-    merge_json_files()
-    run_embedder()
+    started = datetime.now()
+    results = run_dag(build_pipeline())
+    record_timings(cycle_number, started, results)
 
-    log(f"✔  Cycle #{cycle_number} finished.\n")
+    failed = [name for name, r in results.items() if r["status"] in ("failed", "skipped")]
+    if failed:
+        log(f"⚠  Cycle #{cycle_number} finished with {len(failed)} failed/skipped stage(s): {', '.join(failed)}\n")
+    else:
+        log(f"✔  Cycle #{cycle_number} finished.\n")
 
 
 # ─────────────────────────────────────────────
@@ -230,22 +316,35 @@ def run_cycle(cycle_number: int):
 # ─────────────────────────────────────────────
 
 def scheduler():
-    cycle = 1
-    interval_label = "4 minutes" if TEST else "24 hours"
+    if SCHEDULE_CRON:
+        trigger = CronTrigger.from_crontab(SCHEDULE_CRON)
+        interval_label = f"cron '{SCHEDULE_CRON}'"
+    else:
+        trigger = IntervalTrigger(seconds=SCHEDULE_INTERVAL)
+        interval_label = "4 minutes" if TEST else "24 hours"
 
-    log(f"Scheduler started  |  TEST={TEST}  |  interval={interval_label}")
+    cycle = 0
 
-    while True:
+    def job():
+        nonlocal cycle
+        cycle += 1
         run_cycle(cycle)
+        next_run = sched.get_job("pipeline").next_run_time
+        if next_run is not None:
+            log(f"Next cycle scheduled at {next_run.strftime('%Y-%m-%d %H:%M:%S')}  ({interval_label})\n")
+
+    # One cycle at a time: a run still going at the next fire time makes
+    # APScheduler skip that fire (max_instances=1), and missed fires while
+    # the process was busy collapse into one (coalesce)
+    sched = BlockingScheduler()
+    sched.add_job(
+        job, trigger, id="pipeline",
+        max_instances=1, coalesce=True, misfire_grace_time=None,
+        next_run_time=None if SCHEDULE_CRON else datetime.now(),
+    )
 
-        next_run = datetime.now() + timedelta(seconds=SCHEDULE_INTERVAL)
-        log(f"Next cycle scheduled at {next_run.strftime('%Y-%m-%d %H:%M:%S')}  ({interval_label} from now)\n")
-
-        # Sleep in small ticks so Ctrl-C is responsive
-        for _ in range(SCHEDULE_INTERVAL):
-            time.sleep(1)
-
-        cycle += 1
+    log(f"Scheduler started  |  TEST={TEST}  |  interval={interval_label}")
+    sched.start()
 
 
 # ─────────────────────────────────────────────
@@ -260,4 +359,4 @@ def handle_signal(sig, frame):
 if __name__ == "__main__":
     signal.signal(signal.SIGINT,  handle_signal)
     signal.signal(signal.SIGTERM, handle_signal)
-    scheduler()
\ No newline at end of file
+    scheduler()
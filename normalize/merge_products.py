@@ -0,0 +1,235 @@
+"""
+Streaming product merge
+=======================
+Merges the per-site normalised JSON Lines files into one catalog where each
+physical product appears once, with an ``offers`` list holding every
+source's URL and price:
+
+    {"product_id": "sony:wh1000xm5", "product_name": "...", "brand": "sony",
+     "model": "WH-1000XM5", ..., "price_current": 38500,
+     "offers": [{"source": "startech", "url": "...", "price_current": 38500, ...},
+                {"source": "techland", "url": "...", "price_current": 39000, ...}]}
+
+Two records are the same product when their normalised URL matches (the
+same page scraped twice) or their brand + model matches (the same product
+on two sites).
+
+``product_id`` is the group's brand + model key, or the normalised URL of
+the richest record when there is none. It stays put when prices move;
+the headline ``url`` / ``source`` follow the cheapest offer and are for
+display only.
+
+Memory stays flat in catalog size: pass 1 streams every file keeping only
+dedup keys and byte offsets; pass 2 re-reads each group's lines by offset
+and writes the merged product. Output is compact JSON Lines (no
+indentation, empty fields dropped).
+
+Usage:
+    python normalize/merge_products.py out.jsonl in1.jsonl in2.jsonl ...
+"""
+
+import json
+import os
+import re
+import sys
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.product_attributes import infer_brand  # noqa: E402
+from scraping.jsonl import JsonlWriter  # noqa: E402
+
+OFFER_FIELDS = ("source", "url", "price_current", "price_regular", "price")
+# Words that make a different product, not a colour / packaging variant
+VARIANT_WORDS = {
+    "plus", "pro", "max", "ultra", "lite", "mini", "se", "neo", "air",
+    "x", "s", "ii", "iii", "2", "3", "4", "5",
+}
+_MODEL_TOKEN_RE = re.compile(r"^(?=.*\d)[a-z0-9][a-z0-9-]{1,}$", re.IGNORECASE)
+
+
+# ─────────────────────────────────────────────
+#  DEDUP KEYS
+# ─────────────────────────────────────────────
+
+def normalize_url(url: str) -> str:
+    """``https://www.Site.com/Path/?q=1#x`` → ``site.com/path``."""
+    parsed = urlparse((url or "").strip())
+    host = parsed.netloc.lower().removeprefix("www.")
+    return f"{host}{parsed.path.rstrip('/').lower()}"
+
+
+def infer_model(product_name: str, brand: str | None = None) -> str | None:
+    """Model from a product name: the first token with a digit ("WH-1000XM5"),
+    prefixed by the series word when it is only digits ("Tune 500") and
+    followed by any variant words ("W55 Plus", "Q30 Pro Max")."""
+    words = [w.strip("()[],") for w in (product_name or "").split()]
+    if words and brand and words[0].lower() == brand.lower():
+        words = words[1:]
+    for i, word in enumerate(words):
+        if not _MODEL_TOKEN_RE.match(word):
+            continue
+        parts = [word]
+        if word.isdigit() and i > 0:
+            parts.insert(0, words[i - 1])
+        for follower in words[i + 1:]:
+            if follower.lower() not in VARIANT_WORDS:
+                break
+            parts.append(follower)
+        return " ".join(parts)
+    return None
+
+
+def model_key(record: dict) -> str | None:
+    brand = record.get("brand") or infer_brand(record.get("product_name"))
+    model = record.get("model") or infer_model(record.get("product_name"), brand)
+    if not brand or not model:
+        return None
+    squash = lambda s: re.sub(r"[^a-z0-9]", "", s.lower())  # noqa: E731
+    return f"{squash(brand)}:{squash(model)}"
+
+
+# ─────────────────────────────────────────────
+#  PASS 1 — index
+# ─────────────────────────────────────────────
+
+def _iter_lines_with_offsets(path: str):
+    with open(path, "rb") as f:
+        while True:
+            offset = f.tell()
+            line = f.readline()
+            if not line:
+                return
+            if line.strip():
+                yield offset, line
+
+
+def build_groups(paths: list[str]) -> tuple[list[list[tuple[int, int]]], dict]:
+    """Group records across *paths*; returns ``(groups, stats)``.
+
+    Each group is a list of ``(path index, byte offset)`` — no record
+    content is kept.
+    """
+    groups: list[list[tuple[int, int]]] = []
+    by_url: dict[str, int] = {}
+    by_model: dict[str, int] = {}
+    stats = {"records": 0, "url_duplicates": 0, "model_matches": 0, "malformed": 0}
+
+    for path_idx, path in enumerate(paths):
+        for offset, line in _iter_lines_with_offsets(path):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                stats["malformed"] += 1
+                continue
+            stats["records"] += 1
+
+            url_key = normalize_url(record.get("url", ""))
+            m_key = model_key(record)
+            if url_key and url_key in by_url:
+                group = by_url[url_key]
+                stats["url_duplicates"] += 1
+            elif m_key and m_key in by_model:
+                group = by_model[m_key]
+                stats["model_matches"] += 1
+            else:
+                group = len(groups)
+                groups.append([])
+
+            groups[group].append((path_idx, offset))
+            if url_key:
+                by_url.setdefault(url_key, group)
+            if m_key:
+                by_model.setdefault(m_key, group)
+
+    return groups, stats
+
+
+# ─────────────────────────────────────────────
+#  PASS 2 — merge + write
+# ─────────────────────────────────────────────
+
+def _compact(record: dict) -> dict:
+    return {k: v for k, v in record.items() if v not in (None, "", [], {})}
+
+
+def merge_group(records: list[dict]) -> dict:
+    """One product from the records of a group, with per-source offers."""
+    # Richest record first: the most specs, then the longest description
+    primary = max(
+        records, key=lambda r: (len(r.get("specs") or {}), len(r.get("description") or ""))
+    )
+    merged = dict(primary)
+    merged["product_id"] = next(
+        (key for r in records if (key := model_key(r))), None
+    ) or normalize_url(primary.get("url", ""))
+
+    offers, seen_urls = [], set()
+    for record in records:
+        url_key = normalize_url(record.get("url", ""))
+        if url_key in seen_urls:
+            continue        # the same page scraped twice
+        seen_urls.add(url_key)
+        offers.append(_compact({k: record.get(k) for k in OFFER_FIELDS}))
+
+    for field in ("brand", "model", "type", "connectivity"):
+        merged[field] = merged.get(field) or next(
+            (r[field] for r in records if r.get(field)), None
+        )
+    specs = {}
+    for record in records:
+        for key, value in (record.get("specs") or {}).items():
+            specs.setdefault(key, value)
+    merged["specs"] = specs
+
+    # Headline offer: the cheapest known one, with its own url and source so
+    # the price shown links to the page that sells at it
+    priced = [o for o in offers if o.get("price_current")]
+    if priced:
+        best = min(priced, key=lambda o: o["price_current"])
+        merged["url"] = best.get("url") or merged.get("url")
+        merged["source"] = best.get("source") or merged.get("source")
+        merged["price_current"] = best["price_current"]
+        merged["price"] = best.get("price") or f"{best['price_current']:,}"
+        merged["price_regular"] = best.get("price_regular") or best["price_current"]
+    merged["offers"] = offers
+    return _compact(merged)
+
+
+def merge_products(input_paths: list[str], output_path: str) -> dict:
+    """Merge *input_paths* into *output_path*; returns counts for logging."""
+    paths = [p for p in input_paths if os.path.isfile(p)]
+    groups, stats = build_groups(paths)
+
+    tmp_path = output_path + ".tmp"
+    handles = [open(p, "rb") for p in paths]
+    try:
+        with JsonlWriter(tmp_path, mode="w") as out:
+            seen_ids = set()
+            for group in groups:
+                records = []
+                for path_idx, offset in group:
+                    handles[path_idx].seek(offset)
+                    records.append(json.loads(handles[path_idx].readline()))
+                product = merge_group(records)
+                # A model key claimed by two URL-linked groups: keep ids unique
+                if product["product_id"] in seen_ids:
+                    product["product_id"] += "@" + normalize_url(records[0].get("url", ""))
+                seen_ids.add(product["product_id"])
+                out.write(product)
+    finally:
+        for handle in handles:
+            handle.close()
+    os.replace(tmp_path, output_path)
+
+    stats["products"] = len(groups)
+    stats["multi_source"] = sum(
+        1 for g in groups if len({path_idx for path_idx, _ in g}) > 1
+    )
+    stats["missing_inputs"] = [p for p in input_paths if p not in paths]
+    return stats
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.exit("usage: python normalize/merge_products.py out.jsonl in1.jsonl [in2.jsonl ...]")
+    print(json.dumps(merge_products(sys.argv[2:], sys.argv[1]), indent=2))
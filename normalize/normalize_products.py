@@ -0,0 +1,281 @@
+"""
+Product normalisation
+=====================
+Sits between ``get_products/*`` and the embedder. It turns each raw scraped
+record ({product_name, price, description, url}) into a typed product:
+
+    {
+      "product_name": "DAREU EH416s Wired RGB Gaming Headset",
+      "url": "...", "source": "startech",
+      "brand": "dareu", "model": "EH416s",
+      "type": "headphone", "connectivity": "wired",
+      "price_current": 1600, "price_regular": 3570, "price": "1,600",
+      "specs": {"Driver Size": "50 mm", "Impedance": "32 Ω", ...},
+      "description": "<marketing copy without page chrome>"
+    }
+
+Fixes what the scrapers cannot: StarTech's concatenated price strings
+("1,6003,250"), Techland's hotline number in place of a price, and the
+share/save/EMI page chrome captured with StarTech descriptions.
+
+Input is the scrapers' JSON Lines output (or a legacy .json list); output
+is ``<site>_products_normalized.jsonl``, one product per line.
+
+Usage:
+    python normalize/normalize_products.py            # all three sites
+    python normalize/normalize_products.py in.jsonl out.jsonl
+"""
+
+import os
+import re
+import sys
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.product_attributes import (  # noqa: E402
+    infer_brand,
+    infer_connectivity,
+    infer_type,
+    parse_price,
+)
+from scraping.jsonl import JsonlWriter, existing_path, iter_records  # noqa: E402
+
+SITE_BY_DOMAIN = {
+    "startech.com.bd": "startech",
+    "techlandbd.com": "techland",
+    "pickaboo.com": "pickaboo",
+}
+
+# StarTech's spec table is "<Key> <Value>" with no separator, so keys are
+# matched against the labels the site actually uses (longest first).
+STARTECH_SPEC_KEYS = sorted(
+    [
+        "Manufacturing Warranty", "Frequency Range", "Frequency", "Driver Diameter",
+        "Driver Magnet", "Driver Size", "Input Jack", "Battery Life",
+        "Battery Capacity", "Cable Length", "Connectivity", "Pick-up Pattern",
+        "Microphone Size", "Impedance", "Impendance", "Sensitivity", "Color",
+        "Weight", "Dimensions", "Others", "Bluetooth Version", "Charging Time",
+        "Play Time", "Model", "MPN",
+    ],
+    key=len,
+    reverse=True,
+)
+STARTECH_CHROME = {
+    "Share:", "bookmark_border", "Save", "library_add", "Add to Compare", "alarm",
+    "remove", "add", "Buy Now", "View More Info", "Payment Options",
+}
+SPEC_KEY_ALIASES = {"Impendance": "Impedance", "MPN": "Model"}
+
+_TAKA_RE = re.compile(r"(\d[\d,]*)\s*৳")
+# "Driver Size: 50 mm" — short label, short value (longer lines are prose)
+_COLON_SPEC_RE = re.compile(r"^([A-Za-z][\w ./()®™&-]{1,40}?)\s*[:：]\s*(.{1,80})$")
+
+
+# ─────────────────────────────────────────────
+#  FIELD PARSERS
+# ─────────────────────────────────────────────
+
+def site_for_url(url: str) -> str | None:
+    host = urlparse(url or "").netloc.lower()
+    for domain, site in SITE_BY_DOMAIN.items():
+        if host.endswith(domain):
+            return site
+    return None
+
+
+def _taka_amounts(line: str) -> list[int]:
+    return [int(m.replace(",", "")) for m in _TAKA_RE.findall(line)]
+
+
+def parse_prices(record: dict, site: str | None) -> tuple[int | None, int | None]:
+    """``(price_current, price_regular)`` in taka, ``None`` when unknown."""
+    if site == "startech":
+        current = regular = None
+        for line in (record.get("description") or "").split("\n"):
+            if line.startswith("Price ") and current is None:
+                amounts = _taka_amounts(line)
+                if amounts:
+                    current = min(amounts)
+                    regular = max(amounts)
+            elif line.startswith("Regular Price") and _taka_amounts(line):
+                regular = _taka_amounts(line)[0]
+                break
+        if current is not None:
+            return current, max(regular or current, current)
+
+    current = parse_price(record.get("price"))
+    return current, current
+
+
+def _split_startech_spec(line: str) -> tuple[str, str] | None:
+    match = _COLON_SPEC_RE.match(line)
+    if match:
+        return match.group(1).strip(), match.group(2).strip()
+    for key in STARTECH_SPEC_KEYS:
+        if line.startswith(key + " ") and len(line) > len(key) + 1:
+            return key, line[len(key):].strip()
+    return None
+
+
+def _startech_sections(lines: list[str]) -> tuple[list[str], list[str], list[str]]:
+    """Split a StarTech page into (key features, spec table, description)."""
+    def index_of(label, start=0):
+        try:
+            return lines.index(label, start)
+        except ValueError:
+            return -1
+
+    kf_start, kf_end = index_of("Key Features"), index_of("View More Info")
+    key_features = lines[kf_start + 1:kf_end] if 0 <= kf_start < kf_end else []
+
+    # The real description follows the *last* "Description" heading; earlier
+    # ones are tab labels.
+    desc_start = len(lines) - 1 - lines[::-1].index("Description") if "Description" in lines else -1
+    spec_start = index_of("Technical Specification")
+    specs = lines[spec_start + 1:desc_start] if 0 <= spec_start < desc_start else []
+
+    description = lines[desc_start + 1:] if desc_start >= 0 else []
+    for i, line in enumerate(description):
+        if line.startswith("Questions (") or line.startswith("Buy ") and "Star Tech" in line:
+            description = description[:i]
+            break
+    return key_features, specs, description
+
+
+def parse_specs(lines: list[str], site: str | None) -> dict[str, str]:
+    """Spec table as an ordered ``{label: value}`` dict."""
+    specs: dict[str, str] = {}
+
+    def put(key, value):
+        key = SPEC_KEY_ALIASES.get(key, key)
+        if value and key not in specs:
+            specs[key] = value
+
+    if site == "techland" and lines and lines[0].endswith("Overview"):
+        # "<name> Overview" followed by alternating label / value lines
+        block = []
+        for line in lines[1:]:
+            if "Bangladesh" in line:
+                break
+            block.append(line)
+        for key, value in zip(block[::2], block[1::2]):
+            if len(key) <= 40:
+                put(key.strip(), value.strip())
+
+    for line in lines:
+        pair = (
+            _split_startech_spec(line) if site == "startech"
+            else (_COLON_SPEC_RE.match(line) and _COLON_SPEC_RE.match(line).groups())
+        )
+        if pair:
+            put(pair[0].strip(), pair[1].strip())
+    return specs
+
+
+def clean_description(lines: list[str], product_name: str) -> str:
+    kept = []
+    for line in lines:
+        line = line.strip()
+        if not line or line in STARTECH_CHROME or line == product_name:
+            continue
+        kept.append(line)
+    return "\n".join(kept)
+
+
+# ─────────────────────────────────────────────
+#  RECORD / FILE
+# ─────────────────────────────────────────────
+
+def normalize_product(record: dict) -> dict:
+    """Map one raw scraped record to the normalised schema."""
+    name = (record.get("product_name") or "").strip()
+    url = (record.get("url") or "").strip()
+    site = record.get("source") or site_for_url(url)
+    lines = (record.get("description") or "").split("\n")
+
+    brand = None
+    if site == "startech":
+        key_features, spec_lines, desc_lines = _startech_sections(lines)
+        specs = parse_specs(key_features + spec_lines, site)
+        for line in lines[:30]:
+            if line.startswith("Brand "):
+                brand = line[len("Brand "):].strip().lower()
+                break
+    else:
+        specs = parse_specs(lines, site)
+        desc_lines = lines
+
+    description = clean_description(desc_lines, name)
+    spec_text = " ".join(f"{k} {v}" for k, v in specs.items())
+    price_current, price_regular = parse_prices(record, site)
+
+    return {
+        "product_name": name,
+        "url": url,
+        "source": site,
+        "brand": brand or infer_brand(name),
+        "model": specs.get("Model"),
+        "type": infer_type(name) or infer_type(spec_text) or infer_type(description),
+        "connectivity": infer_connectivity(name)
+        or infer_connectivity(spec_text)
+        or infer_connectivity(description),
+        "price_current": price_current,
+        "price_regular": price_regular,
+        "price": f"{price_current:,}" if price_current else "",
+        "specs": specs,
+        "description": description,
+    }
+
+
+def normalize_file(input_file: str, output_file: str) -> dict:
+    """Stream a scraper output file (.jsonl or legacy .json) into normalised
+    JSON Lines; returns counts for logging.
+
+    ``unpriced`` counts products whose price could not be parsed (e.g. a
+    hotline number scraped instead of the price): the budget filter keeps
+    them and the re-rankers cannot score their price, so it is reported.
+    """
+    tmp_path = output_file + ".tmp"
+    unpriced = 0
+    with JsonlWriter(tmp_path, mode="w") as out:
+        for record in iter_records(input_file):
+            if record.get("product_name") and record.get("url"):
+                product = normalize_product(record)
+                unpriced += product["price_current"] is None
+                out.write(product)
+        count = out.count
+    os.replace(tmp_path, output_file)
+    return {"products": count, "unpriced": unpriced}
+
+
+def normalized_path(raw_path: str) -> str:
+    """``startech_products.jsonl`` → ``startech_products_normalized.jsonl``."""
+    root, _ = os.path.splitext(raw_path)
+    return f"{root}_normalized.jsonl"
+
+
+def raw_products_path(base_dir: str, site: str) -> str | None:
+    """A site's scraper output: the streamed .jsonl, else a legacy .json."""
+    return existing_path(
+        os.path.join(base_dir, f"{site}_products.jsonl"),
+        os.path.join(base_dir, f"{site}_products.json"),
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        pairs = [(sys.argv[1], sys.argv[2])]
+    else:
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        pairs = [
+            (path, normalized_path(path))
+            for path in (raw_products_path(base_dir, site) for site in SITE_BY_DOMAIN.values())
+            if path
+        ]
+
+    for input_path, output_path in pairs:
+        counts = normalize_file(input_path, output_path)
+        print(
+            f"Normalised {counts['products']} products ({counts['unpriced']} without a price): "
+            f"{input_path} → {output_path}"
+        )
@@ -0,0 +1,123 @@
+"""
+Shared Chrome sessions for the scrapers
+=======================================
+Launching Chrome and resolving a matching chromedriver are the slow parts
+of a Selenium scrape, so both happen as rarely as possible:
+
+    • ``chromedriver_path()`` resolves the driver binary once per process
+      (``$CHROMEDRIVER`` → webdriver-manager → Selenium Manager)
+    • ``DriverPool`` keeps a few long-lived Chrome sessions that callers
+      borrow, navigate with ``driver.get(...)`` and hand back
+
+Usage:
+    with DriverPool(size=1) as pool, pool.driver() as driver:
+        for url in page_urls:
+            driver.get(url)
+            ...
+"""
+
+import functools
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+
+
+@functools.lru_cache(maxsize=None)
+def chromedriver_path() -> str | None:
+    """Path of the chromedriver binary, resolved once per process.
+
+    ``None`` lets Selenium resolve it itself at every launch (the slow path,
+    only taken when neither resolver is available).
+    """
+    path = os.getenv("CHROMEDRIVER")
+    if path:
+        return path
+    try:
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        return ChromeDriverManager().install()
+    except ImportError:
+        pass
+    try:
+        from selenium.webdriver.common.selenium_manager import SeleniumManager
+
+        return SeleniumManager().binary_paths(["--browser", "chrome"])["driver_path"]
+    except Exception as e:
+        print(f"⚠  Could not pre-resolve chromedriver ({e}); Selenium will resolve it per launch.")
+        return None
+
+
+def chrome_options(headless: bool | None = None) -> webdriver.ChromeOptions:
+    """Options shared by every scraper (``SCRAPER_HEADLESS=1`` to hide the window)."""
+    if headless is None:
+        headless = os.getenv("SCRAPER_HEADLESS", "0") == "1"
+    options = webdriver.ChromeOptions()
+    options.add_argument("--start-maximized")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--window-size=1920,1080")
+    return options
+
+
+def new_driver(options: webdriver.ChromeOptions | None = None) -> webdriver.Chrome:
+    """Launch one Chrome session using the cached driver binary."""
+    path = chromedriver_path()
+    service = Service(executable_path=path) if path else Service()
+    return webdriver.Chrome(service=service, options=options or chrome_options())
+
+
+class DriverPool:
+    """
+    Up to *size* Chrome sessions, launched lazily and reused until
+    ``close()``. Thread-safe: ``driver()`` blocks while all sessions are
+    borrowed.
+    """
+
+    def __init__(self, size: int = 1, options: webdriver.ChromeOptions | None = None):
+        self.size = size
+        self.options = options
+        self._idle: queue.Queue = queue.Queue()
+        self._all: list[webdriver.Chrome] = []
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> webdriver.Chrome:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._all) < self.size:
+                driver = new_driver(self.options)
+                self._all.append(driver)
+                return driver
+        return self._idle.get()
+
+    @contextmanager
+    def driver(self):
+        """Borrow a session; it goes back to the pool (still open) afterwards."""
+        driver = self._acquire()
+        try:
+            yield driver
+        finally:
+            self._idle.put(driver)
+
+    def close(self):
+        with self._lock:
+            for driver in self._all:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+            self._all.clear()
+        self._idle = queue.Queue()
+
+    def __enter__(self) -> "DriverPool":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,134 @@
+"""
+Concurrent crawl engine
+=======================
+Runs a per-URL task over a URL list with
+
+    • N worker threads per site
+    • a per-domain rate limit (minimum spacing between request starts)
+    • retry with exponential backoff + jitter for transient failures
+    • progress and failure counts printed as the crawl goes
+
+Per-site settings live in ``SITE_CRAWL`` and can be overridden with
+``CRAWL_WORKERS_<SITE>`` / ``CRAWL_RATE_<SITE>`` (requests per second).
+"""
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+from scraping.fetch import RetryableFetchError
+
+SITE_CRAWL = {
+    "startech": {"workers": 4, "rate": 4.0},
+    "techland": {"workers": 4, "rate": 3.0},
+    "pickaboo": {"workers": 2, "rate": 1.0},   # SPA — most pages need the browser
+}
+DEFAULT_CRAWL = {"workers": 2, "rate": 1.0}
+
+MAX_RETRIES = 3
+BACKOFF_BASE = 1.0    # seconds; doubled per attempt
+BACKOFF_MAX = 30.0
+PROGRESS_EVERY = 25   # URLs between progress lines
+
+
+def site_crawl_settings(site: str) -> tuple[int, float]:
+    """``(workers, requests_per_second)`` for *site*."""
+    defaults = SITE_CRAWL.get(site, DEFAULT_CRAWL)
+    workers = int(os.getenv(f"CRAWL_WORKERS_{site.upper()}", defaults["workers"]))
+    rate = float(os.getenv(f"CRAWL_RATE_{site.upper()}", defaults["rate"]))
+    return max(1, workers), rate
+
+
+class DomainRateLimiter:
+    """Spaces request starts to at most *rate* per second for each domain."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str):
+        if not self.interval:
+            return
+        domain = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(domain, now))
+            self._next_slot[domain] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _backoff(attempt: int) -> float:
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def crawl(
+    urls: list[str],
+    task,
+    *,
+    label: str,
+    workers: int,
+    rate: float,
+    max_retries: int = MAX_RETRIES,
+    on_result=None,
+    on_error=None,
+) -> dict:
+    """
+    Run ``task(url)`` for every URL with *workers* threads. Transient errors
+    (``RetryableFetchError``) are retried with backoff; any other exception
+    fails the URL immediately.
+
+    ``on_result(url, result)`` / ``on_error(url, exc)`` are called from the
+    calling thread as each URL completes, in completion order. Returns the counts
+    ``{"total", "done", "failed", "retries", "seconds"}``.
+    """
+    limiter = DomainRateLimiter(rate)
+    counts = {"total": len(urls), "done": 0, "failed": 0, "retries": 0}
+    counts_lock = threading.Lock()
+    start = time.perf_counter()
+
+    def run(url):
+        for attempt in range(1, max_retries + 2):
+            limiter.wait(url)
+            try:
+                return task(url)
+            except RetryableFetchError as e:
+                if attempt > max_retries:
+                    raise
+                delay = _backoff(attempt)
+                with counts_lock:
+                    counts["retries"] += 1
+                print(f"  ↻ [{label}] {e} — retry {attempt}/{max_retries} in {delay:.1f}s: {url}")
+                time.sleep(delay)
+
+    print(f"━━ [{label}] crawling {len(urls)} URLs · {workers} workers · {rate:g} req/s ━━")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"crawl-{label}") as pool:
+        futures = {pool.submit(run, url): url for url in urls}
+        for i, future in enumerate(as_completed(futures), start=1):
+            url = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                counts["failed"] += 1
+                print(f"  ✖ [{label}] {url}: {e}")
+                if on_error is not None:
+                    on_error(url, e)
+            else:
+                counts["done"] += 1
+                if on_result is not None:
+                    on_result(url, result)
+            if i % PROGRESS_EVERY == 0 or i == len(urls):
+                elapsed = time.perf_counter() - start
+                print(
+                    f"  [{label}] {i}/{len(urls)} · {counts['done']} ok · "
+                    f"{counts['failed']} failed · {counts['retries']} retries · "
+                    f"{i / max(elapsed, 1e-9):.1f} pages/s"
+                )
+
+    counts["seconds"] = round(time.perf_counter() - start, 2)
+    return counts
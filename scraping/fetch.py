@@ -0,0 +1,80 @@
+"""
+Pooled HTTP client for the scrapers
+===================================
+One ``httpx.Client`` per scraper process: connections are kept alive and
+reused across every product page on the same host. ``fetch_page`` sends
+ETag / Last-Modified validators so unchanged pages come back as 304.
+"""
+
+from typing import NamedTuple
+
+import httpx
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/126.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+def make_client(max_connections: int = 10, timeout: float = 20.0) -> httpx.Client:
+    return httpx.Client(
+        headers=DEFAULT_HEADERS,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        ),
+        timeout=timeout,
+        follow_redirects=True,
+    )
+
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class RetryableFetchError(Exception):
+    """Transient failure (network error, 429, 5xx) — worth retrying later."""
+
+
+class Page(NamedTuple):
+    status: int
+    html: str | None              # None for 304 / non-200 / non-HTML
+    etag: str | None
+    last_modified: str | None
+
+
+def fetch_page(
+    client: httpx.Client,
+    url: str,
+    etag: str | None = None,
+    last_modified: str | None = None,
+) -> Page:
+    """GET *url*, conditionally when validators from a previous fetch are given.
+
+    Transient failures raise ``RetryableFetchError`` so the crawler can
+    back off and retry.
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    try:
+        resp = client.get(url, headers=headers)
+    except httpx.HTTPError as e:
+        raise RetryableFetchError(f"{type(e).__name__}: {e}") from e
+    if resp.status_code in RETRYABLE_STATUS:
+        raise RetryableFetchError(f"HTTP {resp.status_code}")
+
+    html = None
+    if resp.status_code == 200 and "html" in resp.headers.get("content-type", ""):
+        html = resp.text
+    elif resp.status_code != 304:
+        print(f"  ⚠ HTTP {resp.status_code} ({resp.headers.get('content-type', '?')}): {url}")
+    return Page(
+        resp.status_code, html, resp.headers.get("etag"), resp.headers.get("last-modified")
+    )
+
@@ -0,0 +1,129 @@
+"""
+JSON Lines I/O for the pipeline
+===============================
+Scrapers append one product per line as soon as it is scraped, so a crash
+loses at most the records since the last fsync, and every later stage
+(normalize → merge → embedder) reads the files as a stream.
+
+    with JsonlWriter("startech_products.jsonl.partial") as out:
+        out.write(record)
+
+    for record in iter_records("startech_products.jsonl"):   # or a legacy .json
+        ...
+"""
+
+import json
+import os
+import time
+from typing import Iterator
+
+FSYNC_EVERY = 50          # records
+FSYNC_INTERVAL = 5.0      # seconds
+
+# Wrapper keys a legacy .json file may nest its product list under
+_LIST_KEYS = ("products", "data", "items", "results")
+
+
+def _drop_torn_tail(path: str):
+    """Cut a half-written last line (crash mid-write) before appending to *path*."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) == b"\n":
+            return
+        # Walk back to the last complete line
+        pos = f.tell()
+        while pos > 0:
+            step = min(4096, pos)
+            f.seek(pos - step)
+            chunk = f.read(step)
+            idx = chunk.rfind(b"\n")
+            if idx != -1:
+                f.truncate(pos - step + idx + 1)
+                return
+            pos -= step
+        f.truncate(0)
+
+
+class JsonlWriter:
+    """Append-only JSONL writer, flushed per record and fsynced periodically."""
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = "a",
+        fsync_every: int = FSYNC_EVERY,
+        fsync_interval: float = FSYNC_INTERVAL,
+    ):
+        self.path = path
+        if mode == "a":
+            _drop_torn_tail(path)
+        self._f = open(path, mode, encoding="utf-8")
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.count = 0
+
+    def write(self, record: dict):
+        self._f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._f.flush()
+        self.count += 1
+        self._unsynced += 1
+        if (
+            self._unsynced >= self.fsync_every
+            or time.monotonic() - self._last_sync >= self.fsync_interval
+        ):
+            self.sync()
+
+    def sync(self):
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if not self._f.closed:
+            self.sync()
+            self._f.close()
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_jsonl(path: str) -> Iterator[dict]:
+    """Records of a JSONL file; a torn last line (crash mid-write) is skipped."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"  ⚠ skipping malformed line {line_no} in {path}")
+
+
+def iter_records(path: str) -> Iterator[dict]:
+    """Stream records from ``.jsonl``; legacy ``.json`` lists are loaded whole."""
+    if path.endswith(".jsonl") or path.endswith(".jsonl.partial"):
+        yield from iter_jsonl(path)
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = next(
+            (data[key] for key in _LIST_KEYS if isinstance(data.get(key), list)),
+            [data],
+        )
+    yield from data
+
+
+def existing_path(*candidates: str) -> str | None:
+    """First of *candidates* that exists (e.g. the .jsonl, then a legacy .json)."""
+    return next((p for p in candidates if os.path.isfile(p)), None)
@@ -0,0 +1,172 @@
+"""
+Offline HTML parsers for product pages
+======================================
+Pure functions from server-rendered HTML to the scraper record
+
+    {"product_name", "price", "description", "url"}
+
+using the same selectors the Selenium scrapers use, so the HTTP path and
+the browser fallback produce interchangeable output. Nothing here touches
+the network — parse saved pages to check a site's markup:
+
+    python scraping/parsers.py startech saved_page.html
+
+``tests/test_parsers.py`` runs them over one saved page per site
+(``tests/pages/``).
+"""
+
+import json
+import re
+import sys
+
+from bs4 import BeautifulSoup, Comment, NavigableString, Tag
+
+NAME_SELECTOR = "h1"
+PRICE_SELECTOR = ".price, [class*='price']"
+# Techland's first price-classed element is its hotline, "(+88) 09613828201"
+_PHONE_RE = re.compile(r"\+\s*88|\(\+?88\)|\d{9,}")
+DESCRIPTION_SELECTORS = {
+    "startech": ".description, [class*='description'], [class*='desc'], .product-details, [class*='details']",
+    "techland": ".description, [class*='prose prose-sm sm:prose lg:prose-lg max-w-none'],[class*='description'], [class*='desc'], .product-details, [class*='details']",
+    "pickaboo": "div.description div.read-more.full",
+}
+
+# ─────────────────────────────────────────────
+#  innerText
+# ─────────────────────────────────────────────
+# Approximates Selenium's ``element.text``: block elements start new lines,
+# inline elements run together, table cells are space-separated and
+# source-formatting whitespace collapses.
+
+_BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "caption", "dd", "details",
+    "div", "dl", "dt", "fieldset", "figcaption", "figure", "footer", "form",
+    "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav",
+    "ol", "p", "pre", "section", "summary", "table", "tbody", "tfoot",
+    "thead", "tr", "ul",
+}
+_CELL_TAGS = {"td", "th"}
+_SKIP_TAGS = {"script", "style", "noscript", "template", "head", "iframe", "svg"}
+_SPACE_RE = re.compile(r"\s+")
+
+
+def _is_hidden(tag: Tag) -> bool:
+    style = (tag.get("style") or "").replace(" ", "").lower()
+    return tag.has_attr("hidden") or "display:none" in style
+
+
+def _walk(node, parts: list[str]):
+    for child in node.children:
+        if isinstance(child, Comment):
+            continue
+        if isinstance(child, NavigableString):
+            parts.append(_SPACE_RE.sub(" ", str(child)))
+            continue
+        if not isinstance(child, Tag) or child.name in _SKIP_TAGS or _is_hidden(child):
+            continue
+        if child.name == "br":
+            parts.append("\n")
+        elif child.name in _BLOCK_TAGS:
+            parts.append("\n")
+            _walk(child, parts)
+            parts.append("\n")
+        elif child.name in _CELL_TAGS:
+            _walk(child, parts)
+            parts.append(" ")
+        else:
+            _walk(child, parts)
+
+
+def inner_text(element: Tag | None) -> str:
+    if element is None:
+        return ""
+    parts: list[str] = []
+    _walk(element, parts)
+    lines = (_SPACE_RE.sub(" ", line).strip() for line in "".join(parts).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+# ─────────────────────────────────────────────
+#  PRICE
+# ─────────────────────────────────────────────
+
+def clean_price(text: str) -> str:
+    """First line of a price element without the ৳ sign; "" when it holds no
+    amount or is a phone number."""
+    # Often price is formatted, so split by newline (if there's a discounted price)
+    price = (text or "").strip().split("\n")[0].replace("৳", "").strip()
+    if not re.search(r"\d", price) or _PHONE_RE.search(price):
+        return ""
+    return price
+
+
+def structured_price(page: "str | BeautifulSoup") -> str:
+    """Price from schema.org markup: ``itemprop="price"`` or JSON-LD offers."""
+    soup = BeautifulSoup(page, "lxml") if isinstance(page, str) else page
+    tag = soup.select_one("[itemprop='price']")
+    if tag is not None:
+        price = clean_price(tag.get("content") or inner_text(tag))
+        if price:
+            return price
+    for script in soup.select("script[type='application/ld+json']"):
+        try:
+            data = json.loads(script.string or "")
+        except ValueError:
+            continue
+        items = data.get("@graph", [data]) if isinstance(data, dict) else data
+        for item in items if isinstance(items, list) else []:
+            offers = item.get("offers") if isinstance(item, dict) else None
+            for offer in offers if isinstance(offers, list) else [offers]:
+                if isinstance(offer, dict) and offer.get("price") not in (None, ""):
+                    price = clean_price(str(offer["price"]))
+                    if price:
+                        return price
+    return ""
+
+
+# ─────────────────────────────────────────────
+#  PRODUCT PAGE
+# ─────────────────────────────────────────────
+
+def parse_product_html(html: str, url: str, site: str) -> dict:
+    """Extract the scraper record from a product page's HTML."""
+    soup = BeautifulSoup(html, "lxml")
+
+    product_name = inner_text(soup.select_one(NAME_SELECTOR))
+
+    # First price-classed element holding an amount, else schema.org data
+    price = ""
+    for el in soup.select(PRICE_SELECTOR):
+        price = clean_price(inner_text(el))
+        if price:
+            break
+    price = price or structured_price(soup)
+
+    description = ""
+    for el in soup.select(DESCRIPTION_SELECTORS[site]):
+        text = inner_text(el)
+        if text:
+            description = text
+            break
+
+    return {
+        "product_name": product_name,
+        "price": price,
+        "description": description,
+        "url": url,
+    }
+
+
+def needs_browser(product: dict) -> bool:
+    """True when the static HTML lacked the content (client-rendered page)."""
+    return not product.get("product_name") or not product.get("description")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] not in DESCRIPTION_SELECTORS:
+        sys.exit(f"usage: python scraping/parsers.py {{{'|'.join(DESCRIPTION_SELECTORS)}}} page.html")
+    with open(sys.argv[2], "r", encoding="utf-8") as f:
+        record = parse_product_html(f.read(), url=sys.argv[2], site=sys.argv[1])
+    print(json.dumps(record, indent=2, ensure_ascii=False))
+    if needs_browser(record):
+        print("⚠  incomplete without JavaScript — the scraper would fall back to Selenium")
@@ -0,0 +1,291 @@
+"""
+HTTP-first product-page scraping
+================================
+Each product page is fetched over a pooled HTTP connection and parsed from
+its server-rendered HTML (scraping/parsers.py). Only when that HTML lacks
+the name or description — a page that needs JavaScript — is the URL
+loaded in Chrome, through one lazily launched browser session.
+
+URLs are crawled concurrently by scraping/crawler.py (per-site workers,
+rate limit and retries). Pages are requested conditionally against the
+per-URL state in scraping/state.py; unchanged ones (304, or the same body)
+reuse their stored record without parsing or a browser, so they also
+produce identical chunks and the incremental embedder skips them.
+
+``SCRAPE_MODE`` selects the path:
+    auto     HTTP, Selenium fallback (default)
+    http     HTTP only (no browser is ever launched)
+    browser  Selenium only (the previous behaviour)
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+from selenium.webdriver.common.by import By
+
+from scraping.browser import DriverPool
+from scraping.crawler import crawl, site_crawl_settings
+from scraping.fetch import fetch_page, make_client
+from scraping.jsonl import JsonlWriter, iter_jsonl, iter_records
+from scraping.parsers import (
+    DESCRIPTION_SELECTORS,
+    NAME_SELECTOR,
+    PRICE_SELECTOR,
+    clean_price,
+    needs_browser,
+    parse_product_html,
+    structured_price,
+)
+from scraping.state import STALE_AFTER_DAYS, ScrapeStateStore
+from scraping.waits import site_timeout, wait_for_selectors
+
+SCRAPE_MODES = ("auto", "http", "browser")
+
+
+def scrape_with_browser(driver, url: str, site: str) -> dict:
+    """Render *url* in Chrome and read the same fields as the HTML parser."""
+    driver.get(url)
+    # Wait until the name and description have rendered (not a fixed sleep)
+    selectors = [NAME_SELECTOR, DESCRIPTION_SELECTORS[site]]
+    if not wait_for_selectors(driver, selectors, site_timeout(site)):
+        print("  ⚠ page not fully rendered within timeout; reading what is there")
+
+    # 1. Product Name
+    try:
+        product_name = driver.find_element(By.CSS_SELECTOR, NAME_SELECTOR).text.strip()
+    except Exception:
+        product_name = ""
+
+    # 2. Price — first price-classed element holding an amount (Techland's
+    #    first one is its hotline), else schema.org data in the page source
+    price = ""
+    try:
+        for el in driver.find_elements(By.CSS_SELECTOR, PRICE_SELECTOR):
+            price = clean_price(el.text)
+            if price:
+                break
+        price = price or structured_price(driver.page_source)
+    except Exception:
+        price = ""
+
+    # 3. Description — first non-empty match of the site's selectors
+    description = ""
+    try:
+        for el in driver.find_elements(By.CSS_SELECTOR, DESCRIPTION_SELECTORS[site]):
+            text = el.text.strip()
+            if text:
+                description = text
+                break
+    except Exception:
+        pass
+
+    return {
+        "product_name": product_name,
+        "price": price,
+        "description": description,
+        "url": url,
+    }
+
+
+class ProductScraper:
+    """Scrapes product pages of one site, HTTP first, Chrome as a fallback."""
+
+    def __init__(
+        self,
+        site: str,
+        mode: str | None = None,
+        workers: int = 1,
+        state: ScrapeStateStore | None = None,
+    ):
+        self.site = site
+        self.mode = mode or os.getenv("SCRAPE_MODE", "auto")
+        if self.mode not in SCRAPE_MODES:
+            raise ValueError(f"Unknown SCRAPE_MODE '{self.mode}', expected one of {SCRAPE_MODES}")
+        # Safe to share between crawl workers: httpx pools connections per
+        # host, and each Chrome session is lent to one worker at a time
+        self.client = make_client(max_connections=workers) if self.mode != "browser" else None
+        browsers = min(workers, int(os.getenv("SCRAPER_BROWSERS", "2")))
+        self.browser = DriverPool(size=max(1, browsers))   # Chrome starts on first fallback only
+        self.state = state
+        # SCRAPE_FORCE=1 ignores stored records (full re-scrape)
+        self.max_age_days = 0 if os.getenv("SCRAPE_FORCE") == "1" else STALE_AFTER_DAYS
+        self.stats = {"http": 0, "browser": 0, "unchanged": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, path: str):
+        with self._stats_lock:
+            self.stats[path] += 1
+
+    def scrape(self, url: str) -> dict:
+        previous = self.state.get(url) if self.state else None
+        reusable = previous is not None and previous.reusable(self.max_age_days)
+
+        if self.client is None:
+            product = self._scrape_in_browser(url)
+            self._remember(url, product, previous, None, None)
+            return product
+
+        # Conditional GET: validators only when the stored record may be reused
+        page = fetch_page(
+            self.client, url,
+            etag=previous.etag if reusable else None,
+            last_modified=previous.last_modified if reusable else None,
+        )
+        content_hash = hashlib.sha256(page.html.encode()).hexdigest() if page.html else None
+
+        if reusable and (
+            page.status == 304
+            or (content_hash and content_hash == previous.content_hash)
+        ):
+            self.state.record_unchanged(url, page.etag, page.last_modified)
+            self._count("unchanged")
+            return previous.record
+
+        if page.html is not None:
+            product = parse_product_html(page.html, url, self.site)
+            if not needs_browser(product) or self.mode == "http":
+                self._count("http")
+                self._remember(url, product, previous, page, content_hash)
+                return product
+        elif self.mode == "http":
+            raise ValueError(f"no HTML to parse (HTTP {page.status})")
+
+        print(f"  ↪ falling back to the browser: {url}")
+        product = self._scrape_in_browser(url)
+        self._remember(url, product, previous, page, content_hash)
+        return product
+
+    def _scrape_in_browser(self, url: str) -> dict:
+        with self.browser.driver() as driver:
+            product = scrape_with_browser(driver, url, self.site)
+        self._count("browser")
+        return product
+
+    def _remember(self, url, product, previous, page, content_hash):
+        if self.state is None:
+            return
+        if previous is None or not previous.record:
+            status = "new"
+        else:
+            status = "unchanged" if product == previous.record else "changed"
+        self.state.record_scrape(
+            url, self.site, product,
+            etag=page.etag if page else None,
+            last_modified=page.last_modified if page else None,
+            content_hash=content_hash,
+            status=status,
+        )
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+        self.browser.close()
+        if self.state is not None:
+            self.state.close()
+
+    def __enter__(self) -> "ProductScraper":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _publish_in_input_order(checkpoint: str, output_file: str, urls: list[str]) -> int:
+    """Write the checkpoint's records to *output_file* in *urls* order; returns the count.
+
+    Workers finish in any order, so the checkpoint is in completion order.
+    Lines are copied verbatim (one site's catalog fits in memory) through a
+    temporary file, so the output is replaced atomically.
+    """
+    lines: dict[str, str] = {}
+    with open(checkpoint, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                url = json.loads(line).get("url")
+            except json.JSONDecodeError:
+                continue    # torn last line of a crashed run
+            lines[url] = line if line.endswith("\n") else line + "\n"
+
+    tmp = output_file + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as out:
+        count = 0
+        for url in urls:
+            if url in lines:
+                out.write(lines[url])
+                count += 1
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp, output_file)
+    os.remove(checkpoint)
+    return count
+
+
+def scrape_products(site: str, input_file: str, output_file: str) -> dict | None:
+    """Crawl every URL in *input_file* concurrently, streaming records to *output_file*.
+
+    Records are appended to ``<output_file>.partial`` (JSON Lines) as each
+    page completes. Once the whole list is done they are written to
+    *output_file* in the input URL order. If a previous run died, its
+    ``.partial`` is picked up and only the URLs missing from it are crawled.
+
+    A page that fails (after retries) keeps its last good record from the
+    scrape state, so a transient error does not drop the product from the
+    catalog, nor its chunks from the index. Returns the crawl counts.
+    """
+    if not os.path.exists(input_file):
+        print(f"Input file not found: {input_file}")
+        return None
+
+    urls = list(dict.fromkeys(
+        item["url"] for item in iter_records(input_file) if item.get("url")
+    ))
+
+    checkpoint = output_file + ".partial"
+    done = set()
+    if os.path.exists(checkpoint):
+        done = {r.get("url") for r in iter_jsonl(checkpoint)}
+        print(f"↻ Resuming from {checkpoint}: {len(done)} URLs already scraped")
+    todo = [url for url in urls if url not in done]
+
+    workers, rate = site_crawl_settings(site)
+    kept = 0
+
+    with JsonlWriter(checkpoint) as out, \
+            ProductScraper(site, workers=workers, state=ScrapeStateStore()) as scraper:
+
+        def on_result(url, product_info):
+            out.write(product_info)
+            print(f"  -> {product_info['product_name'] or '(no name)'} | {product_info['price'] or '-'}")
+
+        def on_error(url, error):
+            nonlocal kept
+            previous = scraper.state.get(url)
+            scraper.state.record_error(url, site, str(error))
+            if previous is not None and previous.record:
+                out.write(previous.record)
+                kept += 1
+                print(f"  ↺ keeping the last good record: {url}")
+
+        counts = crawl(
+            todo, scraper.scrape,
+            label=site, workers=workers, rate=rate,
+            on_result=on_result,
+            on_error=on_error,
+        )
+        print(
+            f"Pages unchanged: {scraper.stats['unchanged']}, parsed via HTTP: "
+            f"{scraper.stats['http']}, via browser: {scraper.stats['browser']}"
+        )
+
+    # Complete: publish the checkpoint, in input order, as the run's output
+    total = _publish_in_input_order(checkpoint, output_file, urls)
+    counts["kept_previous"] = kept
+
+    print(
+        f"\nSaved {total} products to {output_file} "
+        f"({counts['failed']} failed, {kept} of them kept from the last run, "
+        f"{counts['retries']} retries, {counts['seconds']}s)"
+    )
+    return counts
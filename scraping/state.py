@@ -0,0 +1,136 @@
+"""
+Per-URL scrape state
+====================
+A small SQLite store remembering, for every product URL:
+
+    etag, last_modified   validators for conditional requests
+    content_hash          sha256 of the last HTML body
+    last_scraped          when the page was last fully parsed (epoch s)
+    last_checked          when it was last requested at all
+    status                new | changed | unchanged | error
+    record                the last scraped product record (JSON)
+
+Unchanged pages (HTTP 304, or an identical body) reuse ``record`` instead
+of being parsed again; they are force-refreshed once ``last_scraped`` is
+older than ``STALE_AFTER_DAYS``.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import NamedTuple
+
+STATE_DB = os.getenv("SCRAPE_STATE_DB") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scrape_state.sqlite3"
+)
+STALE_AFTER_DAYS = float(os.getenv("SCRAPE_STALE_AFTER_DAYS", "7"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url           TEXT PRIMARY KEY,
+    site          TEXT NOT NULL,
+    etag          TEXT,
+    last_modified TEXT,
+    content_hash  TEXT,
+    last_scraped  REAL,
+    last_checked  REAL,
+    status        TEXT,
+    error         TEXT,
+    record        TEXT
+)
+"""
+
+
+class PageState(NamedTuple):
+    url: str
+    site: str
+    etag: str | None
+    last_modified: str | None
+    content_hash: str | None
+    last_scraped: float | None
+    last_checked: float | None
+    status: str | None
+    error: str | None
+    record: dict | None
+
+    def is_stale(self, max_age_days: float = STALE_AFTER_DAYS) -> bool:
+        return not self.last_scraped or time.time() - self.last_scraped > max_age_days * 86400
+
+    def reusable(self, max_age_days: float = STALE_AFTER_DAYS) -> bool:
+        """A stored record that may be served for an unchanged page."""
+        return bool(self.record) and not self.is_stale(max_age_days)
+
+
+class ScrapeStateStore:
+    """Thread-safe (one connection, one lock) — crawl workers share it."""
+
+    def __init__(self, path: str = STATE_DB):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> PageState | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, site, etag, last_modified, content_hash, last_scraped, "
+                "last_checked, status, error, record FROM pages WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        return PageState(*row[:-1], json.loads(row[-1]) if row[-1] else None)
+
+    def record_scrape(
+        self,
+        url: str,
+        site: str,
+        record: dict,
+        *,
+        etag: str | None,
+        last_modified: str | None,
+        content_hash: str | None,
+        status: str,
+    ):
+        """Store a freshly parsed page."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO pages (url, site, etag, last_modified, content_hash, "
+                "last_scraped, last_checked, status, error, record) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL, ?) "
+                "ON CONFLICT(url) DO UPDATE SET site = excluded.site, etag = excluded.etag, "
+                "last_modified = excluded.last_modified, content_hash = excluded.content_hash, "
+                "last_scraped = excluded.last_scraped, last_checked = excluded.last_checked, "
+                "status = excluded.status, error = NULL, record = excluded.record",
+                (url, site, etag, last_modified, content_hash, now, now, status,
+                 json.dumps(record, ensure_ascii=False)),
+            )
+
+    def record_unchanged(self, url: str, etag: str | None = None, last_modified: str | None = None):
+        """Page confirmed unchanged; keep the record, refresh validators if sent."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE pages SET last_checked = ?, status = 'unchanged', error = NULL, "
+                "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) "
+                "WHERE url = ?",
+                (time.time(), etag, last_modified, url),
+            )
+
+    def record_error(self, url: str, site: str, error: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO pages (url, site, last_checked, status, error) "
+                "VALUES (?, ?, ?, 'error', ?) "
+                "ON CONFLICT(url) DO UPDATE SET last_checked = excluded.last_checked, "
+                "status = 'error', error = excluded.error",
+                (url, site, time.time(), error[:500]),
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
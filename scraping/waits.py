@@ -0,0 +1,115 @@
+"""
+Readiness-based waits for the Selenium scrapers
+===============================================
+Replaces fixed ``time.sleep(...)`` calls: each helper polls the page and
+returns as soon as it is ready, or gives up after a per-site timeout.
+
+    wait_for_selectors(driver, ["h1", ".price"], timeout=site_timeout("startech"))
+    wait_for_network_idle(driver, timeout=...)
+    scroll_until_stable(driver, "a[href*='/product-detail/']", timeout=...)
+
+Timeouts never raise — the scrapers read whatever is on the page, exactly
+as they did after a fixed sleep — but the helpers return ``False`` so the
+caller can log it.
+"""
+
+import os
+import time
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Upper bounds in seconds (override with SCRAPER_TIMEOUT_<SITE>=…)
+SITE_TIMEOUTS = {
+    "startech": 15.0,
+    "techland": 20.0,
+    "pickaboo": 25.0,   # client-rendered SPA, slowest to hydrate
+}
+DEFAULT_TIMEOUT = 15.0
+SCROLL_STEP_TIMEOUT = 5.0   # the last scroll always waits this long for nothing
+POLL_INTERVAL = 0.1
+
+
+def site_timeout(site: str) -> float:
+    override = os.getenv(f"SCRAPER_TIMEOUT_{site.upper()}")
+    return float(override) if override else SITE_TIMEOUTS.get(site, DEFAULT_TIMEOUT)
+
+
+def _until(driver, condition, timeout: float) -> bool:
+    try:
+        WebDriverWait(
+            driver, timeout, poll_frequency=POLL_INTERVAL,
+            ignored_exceptions=(WebDriverException,),
+        ).until(condition)
+        return True
+    except TimeoutException:
+        return False
+
+
+def wait_for_document_ready(driver, timeout: float = DEFAULT_TIMEOUT) -> bool:
+    return _until(
+        driver,
+        lambda d: d.execute_script("return document.readyState") == "complete",
+        timeout,
+    )
+
+
+def wait_for_selectors(driver, selectors: list[str], timeout: float = DEFAULT_TIMEOUT) -> bool:
+    """Wait until *every* CSS selector matches at least one element.
+
+    A selector may itself be a comma-separated group ("a, b") to accept
+    any one of several alternatives.
+    """
+    return _until(
+        driver,
+        lambda d: all(d.find_elements(By.CSS_SELECTOR, sel) for sel in selectors),
+        timeout,
+    )
+
+
+def wait_for_network_idle(
+    driver, quiet: float = 0.5, timeout: float = DEFAULT_TIMEOUT
+) -> bool:
+    """Wait until no new resources have been fetched for *quiet* seconds."""
+    deadline = time.monotonic() + timeout
+    count, stable_since = -1, time.monotonic()
+    while time.monotonic() < deadline:
+        try:
+            current = driver.execute_script(
+                "return performance.getEntriesByType('resource').length"
+            )
+        except WebDriverException:
+            current = count
+        now = time.monotonic()
+        if current != count:
+            count, stable_since = current, now
+        elif now - stable_since >= quiet:
+            return True
+        time.sleep(POLL_INTERVAL)
+    return False
+
+
+def scroll_until_stable(
+    driver, item_selector: str, timeout: float = SCROLL_STEP_TIMEOUT, max_rounds: int = 200
+) -> int:
+    """
+    Infinite-scroll helper: scroll to the bottom, wait until more items
+    (or a taller page) appear, repeat until a scroll loads nothing new
+    within *timeout* (per scroll). Returns the final item count.
+    """
+    def snapshot(d):
+        return (
+            len(d.find_elements(By.CSS_SELECTOR, item_selector)),
+            d.execute_script("return document.body.scrollHeight"),
+        )
+
+    before = snapshot(driver)
+    for _ in range(max_rounds):
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        if not _until(driver, lambda d: snapshot(d) != before, timeout):
+            break
+        # Let the batch that triggered the change finish rendering
+        wait_for_network_idle(driver, quiet=0.3, timeout=timeout)
+        before = snapshot(driver)
+    return before[0]
@@ -0,0 +1,118 @@
+"""
+Offline parser tests
+====================
+Runs ``scraping/parsers.py`` over a saved product page per site
+(``tests/pages/``), so a selector or innerText regression shows up here
+instead of on the next live crawl.
+
+    python -m pytest tests/
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scraping.parsers import needs_browser, parse_product_html  # noqa: E402
+
+PAGES_DIR = Path(__file__).resolve().parent / "pages"
+
+# site → (product name, price, description lines that must be extracted)
+EXPECTED = {
+    "startech": (
+        "Havit H633BT Bluetooth Foldable Headphone",
+        "1,600",
+        [
+            "Havit H633BT Bluetooth Foldable Headphone",
+            "Price 1,600৳",
+            "Regular Price 1,620৳",
+            "Key Features",
+            "Model: H633BT",
+            "Up to 22 hours of playtime",
+            "Frequency Range 20Hz-20kHz (Speaker)",
+            "Connectivity Bluetooth",
+            "Description",
+        ],
+    ),
+    "techland": (
+        "HAVIT HV-H2212D GAMING HEADPHONES",
+        "",
+        [
+            "BEST HAVIT HV-H2212D GAMING HEADPHONES BD",
+            "Havit Hv-h2212d Gaming Headphones come with USB, 3.5 mm jack Additional "
+            "Functions LED backlight Width 16.5 cm Depth 10.5 cm Height 16 cm Weight 335 g "
+            "Color Black Headphones Headphones Form Factor Circumaural Connectivity "
+            "Technology Wired Sound Output Mode Stereo Max Input Power 30 mW Sensitivity "
+            "112 dB Impedance 32 Ohm Diaphragm 40 mm Microphone Type Boom Sensitivity "
+            "-48 dB Impedance 2.2 kOhm Frequency Response 100 – 20000 Hz Connections "
+            "Connector Type Headset (mini-phone stereo 3.5 mm 4-pole) Headset (4 pin USB Type A)",
+        ],
+    ),
+    "pickaboo": (
+        "Anobik Fusion Pro In-Ear Headphones",
+        "349",
+        [
+            "Anobik Fusion Pro In-Ear Headphones",
+            "Speaker Size: 12mm",
+            "Impedance: 16 ohms",
+            "Frequency Range: 20-20000Hz",
+            "Sensitivity: 104±3dB",
+            "Cable length: 120cm",
+            "Jack Type: 3.5mm",
+        ],
+    ),
+}
+
+
+def _parse(site: str) -> dict:
+    html = (PAGES_DIR / f"{site}_product.html").read_text("utf-8")
+    return parse_product_html(html, url=f"https://example.test/{site}", site=site)
+
+
+@pytest.mark.parametrize("site", sorted(EXPECTED))
+def test_parse_product_page(site):
+    name, price, description_lines = EXPECTED[site]
+    record = _parse(site)
+
+    assert record["product_name"] == name
+    assert record["price"] == price
+    lines = record["description"].split("\n")
+    missing = [line for line in description_lines if line not in lines]
+    assert not missing, f"description lines not extracted: {missing}"
+    assert not needs_browser(record)
+
+
+def test_hidden_and_script_text_is_skipped():
+    record = _parse("pickaboo")
+    # The collapsed "read-more short" block is hidden; only the full one counts
+    assert "…" not in record["description"]
+    assert "__NEXT_DATA__" not in record["description"]
+
+
+def test_client_rendered_page_needs_browser():
+    shell = "<html><body><div id='__next'><h1>Loading…</h1></div></body></html>"
+    record = parse_product_html(shell, url="https://example.test/p", site="pickaboo")
+    assert record["description"] == ""
+    assert needs_browser(record)
+
+
+def test_price_skips_hotline_number():
+    html = (
+        "<div class='hotline-price'>(+88) 09613828201</div>"
+        "<h1>Fantech WH01</h1><span class='product-price'>3,750৳</span>"
+    )
+    record = parse_product_html(html, url="https://example.test/p", site="techland")
+    assert record["price"] == "3,750"
+
+
+def test_price_falls_back_to_structured_data():
+    html = (
+        "<div class='call-for-price'>(+88) 09613828201</div><h1>Fantech WH01</h1>"
+        "<script type='application/ld+json'>"
+        '{"@type": "Product", "offers": {"@type": "Offer", "price": "3750"}}'
+        "</script>"
+    )
+    record = parse_product_html(html, url="https://example.test/p", site="techland")
+    assert record["price"] == "3750"